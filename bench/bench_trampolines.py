@@ -0,0 +1,106 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# Each benchmark runs the call `loops` times and returns the elapsed nanoseconds, keeping the
+# timed loop free of anything but the call itself.
+
+import array
+from time import perf_counter_ns
+
+from example import buffers, classes, functions, hello, iterators, operators
+
+
+# --8<-- [start:ex]
+def bench_noargs(loops):
+    f = hello.hello
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f()
+    return perf_counter_ns() - start
+
+
+# --8<-- [end:ex]
+
+
+def bench_positional(loops):
+    f = functions.double
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f(21)
+    return perf_counter_ns() - start
+
+
+def bench_kwargs(loops):
+    f = functions.with_kwargs
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f(1.0, y=2.0)
+    return perf_counter_ns() - start
+
+
+def bench_varargs(loops):
+    f = functions.variadic
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f("world", 1, 2, a=3)
+    return perf_counter_ns() - start
+
+
+def bench_construct(loops):
+    cls = classes.ConstructableClass
+    start = perf_counter_ns()
+    for _ in range(loops):
+        cls(1)
+    return perf_counter_ns() - start
+
+
+def bench_method(loops):
+    f = classes.Counter().increment
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f()
+    return perf_counter_ns() - start
+
+
+def bench_binary_operator(loops):
+    a, b = operators.Ops(3), operators.Ops(4)
+    start = perf_counter_ns()
+    for _ in range(loops):
+        a + b
+    return perf_counter_ns() - start
+
+
+def bench_iterator_next(loops):
+    it = iter(iterators.Range(0, loops, 1))
+    start = perf_counter_ns()
+    for _ in range(loops):
+        next(it)
+    return perf_counter_ns() - start
+
+
+def bench_buffer_sum(loops):
+    f = buffers.sum
+    buf = array.array("q", range(1024))
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f(buf)
+    return perf_counter_ns() - start
+
+
+def bench_callback(loops):
+    f = functions.apply
+    start = perf_counter_ns()
+    for _ in range(loops):
+        f(abs, -1)
+    return perf_counter_ns() - start
@@ -0,0 +1,126 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+# A synthetic compile-time benchmark of Pydust's comptime discovery. It generates a module with thousands of classes
+# and functions, and times the semantic analysis of the module by the Zig compiler, without emitting a binary.
+#
+#     python bench/comptime_discovery.py --classes 2000 --methods 4 --functions 2000
+
+import argparse
+import subprocess
+import sys
+import sysconfig
+import tempfile
+import time
+from pathlib import Path
+
+import pydust
+
+PYDUST_SOURCE = Path(pydust.__file__).parent / "src" / "pydust.zig"
+
+
+def generate(classes: int, methods: int, functions: int) -> str:
+    lines = ['const py = @import("pydust");', ""]
+    for c in range(classes):
+        lines += [
+            f"pub const Class{c} = py.class(struct {{",
+            "    const Self = @This();",
+            "    value: i64,",
+            "    pub fn __init__(self: *Self, args: struct { value: i64 }) void {",
+            "        self.value = args.value;",
+            "    }",
+        ]
+        for m in range(methods):
+            lines += [
+                f"    pub fn method{m}(self: *const Self, args: struct {{ x: i64 }}) i64 {{",
+                f"        return self.value + args.x + {m};",
+                "    }",
+            ]
+        # Reference another class, so trampolines look up the definitions of their argument types.
+        if c > 0:
+            lines += [
+                f"    pub fn other(self: *const Self, other: *const Class{c - 1}) i64 {{",
+                "        return self.value + other.value;",
+                "    }",
+            ]
+        lines += ["});", ""]
+
+    for f in range(functions):
+        lines += [
+            f"pub fn function{f}(args: struct {{ x: i64, y: i64 }}) i64 {{",
+            f"    return args.x * {f} + args.y;",
+            "}",
+            "",
+        ]
+
+    lines += ["comptime {", "    py.rootmodule(@This());", "}", ""]
+    return "\n".join(lines)
+
+
+def compile_time(root: Path, zig_exe: list[str]) -> float:
+    pyconf = root.parent / "pyconf.zig"
+    pyconf.write_text(
+        'pub const module_name: [:0]const u8 = "synthetic";\n'
+        "pub const limited_api = true;\n"
+        f'pub const hexversion = "{sys.hexversion:#010x}";\n'
+    )
+    cmd = [
+        *zig_exe,
+        "build-lib",
+        "-dynamic",
+        "-fno-emit-bin",
+        "-lc",
+        "-I",
+        sysconfig.get_path("include"),
+        "--mod",
+        f"pyconf::{pyconf}",
+        "--mod",
+        f"pydust:pyconf:{PYDUST_SOURCE}",
+        "--deps",
+        "pydust",
+        # Analysis results are cached, so each run uses its own cache.
+        "--cache-dir",
+        str(root.parent / "zig-cache"),
+        str(root),
+    ]
+    start = time.perf_counter()
+    subprocess.run(cmd, check=True)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="A synthetic compile-time benchmark of Pydust's comptime discovery. It generates a module with "
+        "thousands of classes and functions, and times the semantic analysis of the module by the Zig compiler."
+    )
+    parser.add_argument("--classes", type=int, default=2000)
+    parser.add_argument("--methods", type=int, default=4, help="Methods per class")
+    parser.add_argument("--functions", type=int, default=2000)
+    parser.add_argument("--zig-exe", default=None, help="Defaults to the ziglang package")
+    args = parser.parse_args()
+
+    zig_exe = [args.zig_exe] if args.zig_exe else [sys.executable, "-m", "ziglang"]
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "synthetic.zig"
+        root.write_text(generate(args.classes, args.methods, args.functions))
+        elapsed = compile_time(root, zig_exe)
+
+    print(
+        f"Analyzed {args.classes} classes with {args.methods} methods each "
+        f"and {args.functions} functions in {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
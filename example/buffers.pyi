@@ -1,11 +1,33 @@
 from __future__ import annotations
 
-def sum(buf, /): ...
+def sum(buf: object, /) -> int: ...
+def arrow_sum(array: object, /) -> int: ...
+def mapped_sum(buf: MappedBuffer, /) -> int: ...
+def count_lines(file: object, /) -> int: ...
+def write_squares(file: object, n: int, /) -> None: ...
+def read_line_direct(file: object, /) -> bytes: ...
 
 class ConstantBuffer:
     """
     A class implementing a buffer protocol
     """
 
-    def __init__(self, elem, length, /):
-        pass
+    def __init__(self, elem: int, length: int, /) -> None: ...
+
+class Int64Column:
+    """
+    A column exporting its values through the Arrow PyCapsule interface
+    """
+
+    def __init__(self, length: int, /) -> None: ...
+    def __arrow_c_array__(self, *args, requested_schema: object | None = None) -> tuple: ...
+
+class MappedBuffer:
+    """
+    A read-only or read-write memory-mapped file
+    """
+
+    def __init__(self, source: object, /, *, writable: bool = False, format: str = "B") -> None: ...
+    def __len__(self) -> int: ...
+    def close(self) -> None: ...
+    def madvise(self, advice: str, /) -> None: ...
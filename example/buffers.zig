@@ -57,6 +57,100 @@ pub fn sum(args: struct { buf: py.PyObject }) !i64 {
     return bufferSum;
 }
 
+// --8<-- [start:arrow]
+pub const Int64Column = py.class(struct {
+    pub const __doc__ = "A column exporting its values through the Arrow PyCapsule interface";
+    const Self = @This();
+
+    values: []i64,
+    validity: []u8,
+
+    pub fn __init__(self: *Self, args: struct { length: u32 }) !void {
+        const values = try py.allocator.alloc(i64, args.length);
+        for (values, 0..) |*v, i| v.* = @intCast(i);
+
+        // Mark every third value as null.
+        const validity = try py.allocator.alloc(u8, (args.length + 7) / 8);
+        @memset(validity, 0);
+        for (0..args.length) |i| {
+            if (i % 3 != 2) validity[i / 8] |= @as(u8, 1) << @intCast(i % 8);
+        }
+
+        self.* = .{ .values = values, .validity = validity };
+    }
+
+    pub fn __del__(self: *Self) void {
+        py.allocator.free(self.values);
+        py.allocator.free(self.validity);
+    }
+
+    pub fn __arrow_c_array__(self: *const Self, args: struct { args: py.Args, requested_schema: ?py.PyObject = null }) !py.PyTuple {
+        // Consumers pass the requested schema either positionally or by keyword.
+        if (args.args.len > 1) {
+            return py.TypeError.raise("__arrow_c_array__ takes at most one requested schema");
+        }
+        // We only support exporting our native type, so we ignore any requested schema.
+        return py.arrowCArray(i64, self.values, self.validity, self);
+    }
+});
+
+pub fn arrow_sum(args: struct { array: py.PyObject }) !i64 {
+    const view = try py.ArrowArrayView(i64).fromObject(args.array);
+    defer view.deinit();
+
+    var total: i64 = 0;
+    for (0..view.len()) |i| total += view.get(i) orelse 0;
+    return total;
+}
+// --8<-- [end:arrow]
+
+// --8<-- [start:mapped]
+pub const MappedBuffer = py.MappedBuffer;
+
+pub fn mapped_sum(args: struct { buf: *const py.MappedBuffer }) !i64 {
+    var total: i64 = 0;
+    for (try args.buf.slice(i64)) |value| total += value;
+    return total;
+}
+// --8<-- [end:mapped]
+
+// --8<-- [start:io]
+pub fn count_lines(args: struct { file: py.PyObject }) !u64 {
+    var fr = try py.FileReader.init(args.file, .{});
+    defer fr.deinit();
+
+    var count: u64 = 0;
+    var buffered = std.io.bufferedReader(fr.reader());
+    while (true) {
+        const byte = buffered.reader().readByte() catch |err| switch (err) {
+            error.EndOfStream => break,
+            else => |e| return e,
+        };
+        if (byte == '\n') count += 1;
+    }
+    return count;
+}
+
+pub fn write_squares(args: struct { file: py.PyObject, n: u64 }) !void {
+    var fw = try py.FileWriter.init(args.file, .{});
+    defer fw.deinit();
+
+    for (0..args.n) |i| {
+        try fw.writer().print("{d}\n", .{i * i});
+    }
+    try fw.flush();
+}
+// --8<-- [end:io]
+
+/// Read up to the next newline from the file's descriptor, leaving the file positioned after it.
+pub fn read_line_direct(args: struct { file: py.PyObject }) !py.PyBytes {
+    var fr = try py.FileReader.init(args.file, .{ .direct = true, .buffer_size = 4 });
+    defer fr.deinit();
+
+    var line: [256]u8 = undefined;
+    return py.PyBytes.create(try fr.reader().readUntilDelimiterOrEof(&line, '\n') orelse "");
+}
+
 comptime {
     py.rootmodule(@This());
 }
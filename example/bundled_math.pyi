@@ -0,0 +1,3 @@
+from __future__ import annotations
+
+def add(x: int, y: int, /) -> int: ...
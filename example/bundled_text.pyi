@@ -0,0 +1,3 @@
+from __future__ import annotations
+
+def greet(name: str, /) -> str: ...
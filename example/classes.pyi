@@ -1,68 +1,86 @@
 from __future__ import annotations
 
-class Animal:
-    def species(self, /): ...
+def pop_dog(dogs: set, /) -> Dog: ...
+def translate(points: Points, dx: float, dy: float, /) -> None: ...
 
-class Callable:
-    def __init__(self, /):
-        pass
-    def __call__(self, /, *args, **kwargs):
-        """
-        Call self as a function.
-        """
-        ...
+class SomeClass:
+    """
+    Some class defined in Zig accessible from Python
+    """
 
 class ConstructableClass:
-    def __init__(self, count, /):
-        pass
+    def __init__(self, count: int, /) -> None: ...
 
-class Counter:
-    def __init__(self, /):
-        pass
-    def increment(self, /): ...
+class Animal:
+    def species(self) -> str: ...
 
-    count: ...
+class Dog(Animal):
+    def __init__(self, breed: str, /) -> None: ...
+    def breed(self) -> str: ...
 
-class GetAttr:
-    def __init__(self, /):
-        pass
-    def __getattribute__(self, name, /):
-        """
-        Return getattr(self, name).
-        """
-        ...
+class User:
+    def __init__(self, name: str, /) -> None: ...
+    @property
+    def email(self) -> str | None: ...
+    @email.setter
+    def email(self, value: str) -> None: ...
+    @property
+    def greeting(self) -> str: ...
 
-class Hash:
-    def __init__(self, x, /):
-        pass
-    def __hash__(self, /):
-        """
-        Return hash(self).
-        """
-        ...
+class Counter:
+    count: int
+    def __init__(self) -> None: ...
+    def increment(self) -> None: ...
 
 class Math:
-    def add(x, y, /): ...
+    @staticmethod
+    def add(x: int, y: int, /) -> int: ...
 
-class SomeClass:
+class ZigOnlyMethod:
+    def __init__(self, x: int, /) -> None: ...
+    def reexposed(self) -> int: ...
+
+class WeakRefable:
+    def __init__(self) -> None: ...
+
+class WeakRefableDog(Animal):
+    def __init__(self) -> None: ...
+
+class Histogram:
+    def __init__(self, bins: int, /) -> None: ...
+    def add(self, bin: int, /) -> None: ...
+    def count(self, bin: int, /) -> int: ...
+    def size(self) -> int: ...
+
+class Tagged:
+    def __init__(self, tag: object, /) -> None: ...
+    def tag(self) -> object: ...
+
+class Point:
+    def __init__(self, x: float, y: float, /) -> None: ...
+    def norm(self) -> float: ...
+
+class Points:
     """
-    Some class defined in Zig accessible from Python
+    A compact vector of class instances stored as a struct-of-arrays
     """
 
-class User:
-    def __init__(self, name, /):
-        pass
-    @property
-    def email(self): ...
-    @property
-    def greeting(self): ...
+    def __init__(self) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, key: int, /) -> Point: ...
+    def __setitem__(self, key: int, value: Point, /) -> None: ...
+    def append(self, value: Point, /) -> None: ...
+    def clear(self) -> None: ...
+    def column(self, name: str, /) -> memoryview: ...
 
-class ZigOnlyMethod:
-    def __init__(self, x, /):
-        pass
-    def reexposed(self, /): ...
+class Hash:
+    def __init__(self, x: int, /) -> None: ...
+    def __hash__(self) -> int: ...
 
-class Dog(Animal):
-    def __init__(self, breed, /):
-        pass
-    def breed(self, /): ...
+class Callable:
+    def __init__(self) -> None: ...
+    def __call__(self, i: int, /) -> int: ...
+
+class GetAttr:
+    def __init__(self) -> None: ...
+    def __getattr__(self, name: str, /) -> object: ...
@@ -63,6 +63,11 @@ pub const Dog = py.class(struct {
 
 // --8<-- [end:subclass]
 
+/// Pop an arbitrary dog from the set.
+pub fn pop_dog(args: struct { dogs: py.PySet }) !*Dog {
+    return args.dogs.pop(*Dog);
+}
+
 // --8<-- [start:properties]
 pub const User = py.class(struct {
     const Self = @This();
@@ -151,6 +156,112 @@ pub const ZigOnlyMethod = py.class(struct {
 });
 // --8<-- [end:zigonly]
 
+// --8<-- [start:weakref]
+pub const WeakRefable = py.class(struct {
+    pub const __weakref__ = true;
+
+    pub fn __init__(self: *@This()) void {
+        _ = self;
+    }
+});
+
+// Subclasses may opt-in to weak references even if their base class does not.
+pub const WeakRefableDog = py.class(struct {
+    pub const __weakref__ = true;
+    const Self = @This();
+
+    animal: Animal,
+
+    pub fn __init__(self: *Self) !void {
+        self.* = .{ .animal = .{ .species = try py.PyString.create("dog") } };
+    }
+});
+// --8<-- [end:weakref]
+
+// --8<-- [start:pickle]
+pub const Histogram = py.class(struct {
+    pub const __pickle__ = true;
+    const Self = @This();
+
+    total: u64,
+    counts: []u64,
+
+    pub fn __init__(self: *Self, args: struct { bins: u32 }) !void {
+        const counts = try py.allocator.alloc(u64, args.bins);
+        @memset(counts, 0);
+        self.* = .{ .total = 0, .counts = counts };
+    }
+
+    pub fn __del__(self: *Self) void {
+        py.allocator.free(self.counts);
+    }
+
+    pub fn add(self: *Self, args: struct { bin: u32 }) !void {
+        if (args.bin >= self.counts.len) {
+            return py.IndexError.raise("bin out of range");
+        }
+        self.counts[args.bin] += 1;
+        self.total += 1;
+    }
+
+    pub fn count(self: *const Self, args: struct { bin: u32 }) !u64 {
+        if (args.bin >= self.counts.len) {
+            return py.IndexError.raise("bin out of range");
+        }
+        return self.counts[args.bin];
+    }
+
+    pub fn size(self: *const Self) u64 {
+        return self.total;
+    }
+});
+// --8<-- [end:pickle]
+
+pub const Tagged = py.class(struct {
+    pub const __pickle__ = true;
+    const Self = @This();
+
+    tag: py.PyObject,
+
+    pub fn __init__(self: *Self, args: struct { tag: py.PyObject }) void {
+        args.tag.incref();
+        self.tag = args.tag;
+    }
+
+    pub fn __del__(self: *Self) void {
+        self.tag.decref();
+    }
+
+    pub fn tag(self: *const Self) py.PyObject {
+        return self.tag;
+    }
+});
+
+// --8<-- [start:vec]
+pub const Point = py.class(struct {
+    const Self = @This();
+
+    x: f64,
+    y: f64,
+
+    pub fn __init__(self: *Self, args: struct { x: f64, y: f64 }) void {
+        self.* = .{ .x = args.x, .y = args.y };
+    }
+
+    pub fn norm(self: *const Self) f64 {
+        return @sqrt(self.x * self.x + self.y * self.y);
+    }
+});
+
+pub const Points = py.Vec(Point);
+
+/// Translate every point in place, looping over the packed columns.
+pub fn translate(args: struct { points: *Points, dx: f64, dy: f64 }) void {
+    for (args.points.values(.x)) |*x| x.* += args.dx;
+    for (args.points.values(.y)) |*y| y.* += args.dy;
+}
+// --8<-- [end:vec]
+
 pub const Hash = py.class(struct {
     const Self = @This();
     number: u32,
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-def file_name(): ...
-def first_line_number(): ...
-def function_name(): ...
-def line_number(): ...
+def line_number() -> int: ...
+def function_name() -> str: ...
+def file_name() -> str: ...
+def first_line_number() -> int: ...
@@ -1,4 +1,4 @@
 from __future__ import annotations
 
-def raise_custom_error(): ...
-def raise_value_error(message, /): ...
+def raise_value_error(message: str, /) -> None: ...
+def raise_custom_error() -> None: ...
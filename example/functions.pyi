@@ -1,5 +1,11 @@
 from __future__ import annotations
 
-def double(x, /): ...
-def variadic(hello, /, *args, **kwargs): ...
-def with_kwargs(x, /, *, y=42.0): ...
+def double(x: int, /) -> int: ...
+def with_kwargs(x: float, /, *, y: float = 42.0) -> float: ...
+def variadic(hello: str, /, *args, **kwargs) -> str: ...
+def hypot(x: float, y: float, /) -> float: ...
+def hypot_batch(x: object, y: object, /, *, out: object | None = None) -> object: ...
+def apply(func: object, x: int, /) -> int: ...
+def collatz(n: int, /) -> object: ...
+def collatz_cache_info() -> dict: ...
+def collatz_cache_clear() -> None: ...
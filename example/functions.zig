@@ -36,3 +36,30 @@ pub fn variadic(args: struct { hello: py.PyString, args: py.Args, kwargs: py.Kwa
     );
 }
 // --8<-- [end:varargs]
+
+// --8<-- [start:vectorize]
+pub fn hypot(args: struct { x: f64, y: f64 }) f64 {
+    return @sqrt(args.x * args.x + args.y * args.y);
+}
+
+pub const hypot_batch = py.vectorize(hypot);
+// --8<-- [end:vectorize]
+
+// --8<-- [start:callback]
+pub fn apply(args: struct { func: py.PyObject, x: i64 }) !i64 {
+    return py.call(i64, args.func, .{args.x}, .{});
+}
+// --8<-- [end:callback]
+
+// --8<-- [start:memoize]
+fn collatzSteps(args: struct { n: u64 }) u64 {
+    var n = args.n;
+    var steps: u64 = 0;
+    while (n > 1) : (steps += 1) {
+        n = if (n % 2 == 0) n / 2 else 3 * n + 1;
+    }
+    return steps;
+}
+
+pub const collatz = py.memoize(collatzSteps, .{ .capacity = 2 });
+// --8<-- [end:memoize]
@@ -1,4 +1,4 @@
 from __future__ import annotations
 
-def sleep(millis, /): ...
-def sleep_release(millis, /): ...
+def sleep(millis: int, /) -> None: ...
+def sleep_release(millis: int, /) -> None: ...
@@ -1,3 +1,3 @@
 from __future__ import annotations
 
-def hello(): ...
+def hello() -> str: ...
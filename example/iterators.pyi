@@ -5,21 +5,12 @@ class Range:
     An example of iterable class
     """
 
-    def __init__(self, lower, upper, step, /):
-        pass
-    def __iter__(self, /):
-        """
-        Implement iter(self).
-        """
-        ...
+    def __init__(self, lower: int, upper: int, step: int, /) -> None: ...
+    def __iter__(self) -> RangeIterator: ...
 
 class RangeIterator:
     """
     Range iterator
     """
 
-    def __next__(self, /):
-        """
-        Implement next(self).
-        """
-        ...
+    def __next__(self) -> int: ...
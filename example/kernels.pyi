@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+def sum_squares(values: list, /) -> float: ...
+
+class Checked:
+    @staticmethod
+    def add(x: int, y: int, /) -> int: ...
+
+class Unchecked:
+    @staticmethod
+    def add(x: int, y: int, /) -> int: ...
@@ -0,0 +1,41 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+const py = @import("pydust");
+
+pub fn sum_squares(args: struct { values: py.PyList }) !f64 {
+    var result: f64 = 0;
+    for (0..args.values.length()) |i| {
+        const value = try args.values.getItem(f64, @intCast(i));
+        result += value * value;
+    }
+    return result;
+}
+
+// Both classes define add, but runtime safety is only enabled for Checked.add, which panics on overflow.
+pub const Checked = py.class(struct {
+    pub fn add(args: struct { x: u8, y: u8 }) u8 {
+        @setRuntimeSafety(py.runtimeSafety(@This(), @src()));
+        return args.x + args.y;
+    }
+});
+
+pub const Unchecked = py.class(struct {
+    pub fn add(args: struct { x: u8, y: u8 }) u8 {
+        @setRuntimeSafety(py.runtimeSafety(@This(), @src()));
+        return args.x + args.y;
+    }
+});
+
+comptime {
+    py.rootmodule(@This());
+}
@@ -1,4 +1,4 @@
 from __future__ import annotations
 
-def append(left, /): ...
-def concat(left, /): ...
+def append(left: str, /) -> str: ...
+def concat(left: str, /) -> str: ...
@@ -5,12 +5,25 @@ Zig multi-line strings make it easy to define a docstring...
 
 P.S. I'm sure one day we'll hook into Zig's AST and read the Zig doc comments ;)
 """
+
 from __future__ import annotations
 
-def count(): ...
-def hello(name, /): ...
-def increment(): ...
-def whoami(): ...
+def increment() -> None: ...
+def count() -> int: ...
+def whoami() -> str: ...
+def hello(name: str, /) -> str: ...
 
 class submod:
-    def world(): ...
+    def world() -> str: ...
+
+class lazy:
+    """
+    A submodule whose classes and submodules are created on first access
+    """
+
+    class Point:
+        def __init__(self, x: int, /) -> None: ...
+        def double(self) -> int: ...
+
+    class inner:
+        def answer() -> int: ...
@@ -68,3 +68,30 @@ comptime {
     py.rootmodule(@This()); // (7)!
 }
 // --8<-- [end:ex]
+
+// --8<-- [start:lazy]
+pub const lazy = py.module(struct {
+    pub const __doc__ = "A submodule whose classes and submodules are created on first access";
+    pub const __lazy__ = true;
+
+    pub const Point = py.class(struct {
+        const Self = @This();
+
+        x: i64,
+
+        pub fn __init__(self: *Self, args: struct { x: i64 }) void {
+            self.x = args.x;
+        }
+
+        pub fn double(self: *const Self) i64 {
+            return self.x * 2;
+        }
+    });
+
+    pub const inner = py.module(struct {
+        pub fn answer() u64 {
+            return 42;
+        }
+    });
+});
+// --8<-- [end:lazy]
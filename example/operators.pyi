@@ -1,373 +1,81 @@
 from __future__ import annotations
 
+class Ops:
+    def __init__(self, num: int, /) -> None: ...
+    def num(self) -> int: ...
+    def __add__(self, other: Ops, /) -> Ops: ...
+    def __iadd__(self, other: Ops, /) -> Ops: ...
+    def __sub__(self, other: Ops, /) -> Ops: ...
+    def __isub__(self, other: Ops, /) -> Ops: ...
+    def __mul__(self, other: Ops, /) -> Ops: ...
+    def __imul__(self, other: Ops, /) -> Ops: ...
+    def __mod__(self, other: Ops, /) -> Ops: ...
+    def __imod__(self, other: Ops, /) -> Ops: ...
+    def __divmod__(self, other: Ops, /) -> tuple: ...
+    def __pow__(self, other: Ops, /) -> Ops: ...
+    def __ipow__(self, other: Ops, /) -> Ops: ...
+    def __lshift__(self, other: Ops, /) -> Ops: ...
+    def __ilshift__(self, other: Ops, /) -> Ops: ...
+    def __rshift__(self, other: Ops, /) -> Ops: ...
+    def __irshift__(self, other: Ops, /) -> Ops: ...
+    def __and__(self, other: Ops, /) -> Ops: ...
+    def __iand__(self, other: Ops, /) -> Ops: ...
+    def __xor__(self, other: Ops, /) -> Ops: ...
+    def __ixor__(self, other: Ops, /) -> Ops: ...
+    def __or__(self, other: Ops, /) -> Ops: ...
+    def __ior__(self, other: Ops, /) -> Ops: ...
+    def __truediv__(self, other: Ops, /) -> Ops: ...
+    def __itruediv__(self, other: Ops, /) -> Ops: ...
+    def __floordiv__(self, other: Ops, /) -> Ops: ...
+    def __ifloordiv__(self, other: Ops, /) -> Ops: ...
+    def __matmul__(self, other: Ops, /) -> Ops: ...
+    def __imatmul__(self, other: Ops, /) -> Ops: ...
+
+class UnaryOps:
+    def __init__(self, num: int, /) -> None: ...
+    def num(self) -> int: ...
+    def __neg__(self) -> int: ...
+    def __pos__(self) -> UnaryOps: ...
+    def __abs__(self) -> UnaryOps: ...
+    def __invert__(self) -> UnaryOps: ...
+    def __int__(self) -> int: ...
+    def __float__(self) -> float: ...
+    def __index__(self) -> int: ...
+    def __bool__(self) -> bool: ...
+
+class Operator:
+    def __init__(self, num: int, /) -> None: ...
+    def num(self) -> int: ...
+    def __truediv__(self, other: object, /) -> object: ...
+
 class Comparator:
-    def __init__(self, num, /):
-        pass
-    def __lt__(self, value, /):
-        """
-        Return self<value.
-        """
-        ...
-    def __le__(self, value, /):
-        """
-        Return self<=value.
-        """
-        ...
-    def __eq__(self, value, /):
-        """
-        Return self==value.
-        """
-        ...
-    def __ne__(self, value, /):
-        """
-        Return self!=value.
-        """
-        ...
-    def __gt__(self, value, /):
-        """
-        Return self>value.
-        """
-        ...
-    def __ge__(self, value, /):
-        """
-        Return self>=value.
-        """
-        ...
+    def __init__(self, num: int, /) -> None: ...
+    def __lt__(self, other: Comparator, /) -> bool: ...
+    def __le__(self, other: Comparator, /) -> bool: ...
+    def __eq__(self, other: Comparator, /) -> bool: ...
+    def __ne__(self, other: Comparator, /) -> bool: ...
+    def __gt__(self, other: Comparator, /) -> bool: ...
+    def __ge__(self, other: Comparator, /) -> bool: ...
 
 class Equals:
-    def __init__(self, num, /):
-        pass
-    def __lt__(self, value, /):
-        """
-        Return self<value.
-        """
-        ...
-    def __le__(self, value, /):
-        """
-        Return self<=value.
-        """
-        ...
-    def __eq__(self, value, /):
-        """
-        Return self==value.
-        """
-        ...
-    def __ne__(self, value, /):
-        """
-        Return self!=value.
-        """
-        ...
-    def __gt__(self, value, /):
-        """
-        Return self>value.
-        """
-        ...
-    def __ge__(self, value, /):
-        """
-        Return self>=value.
-        """
-        ...
+    def __init__(self, num: int, /) -> None: ...
+    def __eq__(self, other: Equals, /) -> bool: ...
 
 class LessThan:
-    def __init__(self, name, /):
-        pass
-    def __lt__(self, value, /):
-        """
-        Return self<value.
-        """
-        ...
-    def __le__(self, value, /):
-        """
-        Return self<=value.
-        """
-        ...
-    def __eq__(self, value, /):
-        """
-        Return self==value.
-        """
-        ...
-    def __ne__(self, value, /):
-        """
-        Return self!=value.
-        """
-        ...
-    def __gt__(self, value, /):
-        """
-        Return self>value.
-        """
-        ...
-    def __ge__(self, value, /):
-        """
-        Return self>=value.
-        """
-        ...
+    def __init__(self, name: str, /) -> None: ...
+    def __lt__(self, other: LessThan, /) -> bool: ...
+    def __le__(self, other: LessThan, /) -> bool: ...
 
-class Operator:
-    def __init__(self, num, /):
-        pass
-    def __truediv__(self, value, /):
-        """
-        Return self/value.
-        """
-        ...
-    def __rtruediv__(self, value, /):
-        """
-        Return value/self.
-        """
-        ...
-    def num(self, /): ...
+class Sequence:
+    def __init__(self) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, key: int, /) -> int: ...
+    def __setitem__(self, key: int, value: int, /) -> None: ...
+    def __contains__(self, key: int, /) -> bool: ...
 
-class Ops:
-    def __init__(self, num, /):
-        pass
-    def __add__(self, value, /):
-        """
-        Return self+value.
-        """
-        ...
-    def __radd__(self, value, /):
-        """
-        Return value+self.
-        """
-        ...
-    def __sub__(self, value, /):
-        """
-        Return self-value.
-        """
-        ...
-    def __rsub__(self, value, /):
-        """
-        Return value-self.
-        """
-        ...
-    def __mul__(self, value, /):
-        """
-        Return self*value.
-        """
-        ...
-    def __rmul__(self, value, /):
-        """
-        Return value*self.
-        """
-        ...
-    def __mod__(self, value, /):
-        """
-        Return self%value.
-        """
-        ...
-    def __rmod__(self, value, /):
-        """
-        Return value%self.
-        """
-        ...
-    def __divmod__(self, value, /):
-        """
-        Return divmod(self, value).
-        """
-        ...
-    def __rdivmod__(self, value, /):
-        """
-        Return divmod(value, self).
-        """
-        ...
-    def __pow__(self, value, mod=None, /):
-        """
-        Return pow(self, value, mod).
-        """
-        ...
-    def __rpow__(self, value, mod=None, /):
-        """
-        Return pow(value, self, mod).
-        """
-        ...
-    def __lshift__(self, value, /):
-        """
-        Return self<<value.
-        """
-        ...
-    def __rlshift__(self, value, /):
-        """
-        Return value<<self.
-        """
-        ...
-    def __rshift__(self, value, /):
-        """
-        Return self>>value.
-        """
-        ...
-    def __rrshift__(self, value, /):
-        """
-        Return value>>self.
-        """
-        ...
-    def __and__(self, value, /):
-        """
-        Return self&value.
-        """
-        ...
-    def __rand__(self, value, /):
-        """
-        Return value&self.
-        """
-        ...
-    def __xor__(self, value, /):
-        """
-        Return self^value.
-        """
-        ...
-    def __rxor__(self, value, /):
-        """
-        Return value^self.
-        """
-        ...
-    def __or__(self, value, /):
-        """
-        Return self|value.
-        """
-        ...
-    def __ror__(self, value, /):
-        """
-        Return value|self.
-        """
-        ...
-    def __iadd__(self, value, /):
-        """
-        Return self+=value.
-        """
-        ...
-    def __isub__(self, value, /):
-        """
-        Return self-=value.
-        """
-        ...
-    def __imul__(self, value, /):
-        """
-        Return self*=value.
-        """
-        ...
-    def __imod__(self, value, /):
-        """
-        Return self%=value.
-        """
-        ...
-    def __ipow__(self, value, /):
-        """
-        Return self**=value.
-        """
-        ...
-    def __ilshift__(self, value, /):
-        """
-        Return self<<=value.
-        """
-        ...
-    def __irshift__(self, value, /):
-        """
-        Return self>>=value.
-        """
-        ...
-    def __iand__(self, value, /):
-        """
-        Return self&=value.
-        """
-        ...
-    def __ixor__(self, value, /):
-        """
-        Return self^=value.
-        """
-        ...
-    def __ior__(self, value, /):
-        """
-        Return self|=value.
-        """
-        ...
-    def __floordiv__(self, value, /):
-        """
-        Return self//value.
-        """
-        ...
-    def __rfloordiv__(self, value, /):
-        """
-        Return value//self.
-        """
-        ...
-    def __truediv__(self, value, /):
-        """
-        Return self/value.
-        """
-        ...
-    def __rtruediv__(self, value, /):
-        """
-        Return value/self.
-        """
-        ...
-    def __ifloordiv__(self, value, /):
-        """
-        Return self//=value.
-        """
-        ...
-    def __itruediv__(self, value, /):
-        """
-        Return self/=value.
-        """
-        ...
-    def __matmul__(self, value, /):
-        """
-        Return self@value.
-        """
-        ...
-    def __rmatmul__(self, value, /):
-        """
-        Return value@self.
-        """
-        ...
-    def __imatmul__(self, value, /):
-        """
-        Return self@=value.
-        """
-        ...
-    def num(self, /): ...
-
-class UnaryOps:
-    def __init__(self, num, /):
-        pass
-    def __neg__(self, /):
-        """
-        -self
-        """
-        ...
-    def __pos__(self, /):
-        """
-        +self
-        """
-        ...
-    def __abs__(self, /):
-        """
-        abs(self)
-        """
-        ...
-    def __bool__(self, /):
-        """
-        True if self else False
-        """
-        ...
-    def __invert__(self, /):
-        """
-        ~self
-        """
-        ...
-    def __int__(self, /):
-        """
-        int(self)
-        """
-        ...
-    def __float__(self, /):
-        """
-        float(self)
-        """
-        ...
-    def __index__(self, /):
-        """
-        Return self converted to an integer, if self is suitable for use as an index into a list.
-        """
-        ...
-    def num(self, /): ...
+class Mapping:
+    def __init__(self) -> None: ...
+    def __getitem__(self, key: str, /) -> object: ...
+    def __setitem__(self, key: str, value: object, /) -> None: ...
+    def __delitem__(self, key: str, /) -> None: ...
+    def __contains__(self, key: str, /) -> bool: ...
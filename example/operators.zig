@@ -324,6 +324,74 @@ pub const LessThan = py.class(struct {
 });
 // --8<-- [end:lessthan]
 
+// --8<-- [start:sequence]
+pub const Sequence = py.class(struct {
+    const Self = @This();
+
+    values: [4]i64 = .{ 0, 0, 0, 0 },
+
+    pub fn __init__(self: *Self) void {
+        self.* = .{};
+    }
+
+    pub fn __len__(self: *const Self) usize {
+        return self.values.len;
+    }
+
+    pub fn __getitem__(self: *const Self, idx: usize) !i64 {
+        if (idx >= self.values.len) {
+            return py.IndexError.raise("index out of range");
+        }
+        return self.values[idx];
+    }
+
+    pub fn __setitem__(self: *Self, idx: usize, value: i64) !void {
+        if (idx >= self.values.len) {
+            return py.IndexError.raise("index out of range");
+        }
+        self.values[idx] = value;
+    }
+
+    pub fn __contains__(self: *const Self, value: i64) bool {
+        return std.mem.indexOfScalar(i64, &self.values, value) != null;
+    }
+});
+// --8<-- [end:sequence]
+
+// --8<-- [start:mapping]
+pub const Mapping = py.class(struct {
+    const Self = @This();
+
+    entries: py.PyDict,
+
+    pub fn __init__(self: *Self) !void {
+        self.entries = try py.PyDict.new();
+    }
+
+    pub fn __del__(self: *Self) void {
+        self.entries.decref();
+    }
+
+    pub fn __getitem__(self: *const Self, key: py.PyString) !py.PyObject {
+        const value = try self.entries.getItem(py.PyObject, key) orelse return py.KeyError.raise(try key.asSlice());
+        value.incref();
+        return value;
+    }
+
+    pub fn __setitem__(self: *Self, key: py.PyString, value: py.PyObject) !void {
+        try self.entries.setItem(key, value);
+    }
+
+    pub fn __delitem__(self: *Self, key: py.PyString) !void {
+        try self.entries.delItem(key);
+    }
+
+    pub fn __contains__(self: *const Self, key: py.PyString) !bool {
+        return self.entries.contains(key);
+    }
+});
+// --8<-- [end:mapping]
+
 comptime {
     py.rootmodule(@This());
 }
@@ -35,6 +35,26 @@ test "pydust-expected-failure" {
     try std.testing.expectEqualStrings("world", try str.asSlice());
 }
 
+// --8<-- [start:bench]
+fn sum(allocator: std.mem.Allocator, args: struct { n: usize }) !u64 {
+    const values = try allocator.alloc(u64, args.n);
+    defer allocator.free(values);
+    for (values, 0..) |*v, i| {
+        v.* = i;
+    }
+
+    var total: u64 = 0;
+    for (values) |v| {
+        total += v;
+    }
+    return total;
+}
+
+test "bench: sum" {
+    try py.bench(sum, .{ .n = 1000 }, .{});
+}
+// --8<-- [end:bench]
+
 comptime {
     py.rootmodule(@This());
 }
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-def pyobject(): ...
-def pystring(): ...
-def zigbool(): ...
-def zigf16(): ...
-def zigf32(): ...
-def zigf64(): ...
-def zigi32(): ...
-def zigi64(): ...
-def zigstruct(): ...
-def zigtuple(): ...
-def zigu32(): ...
-def zigu64(): ...
-def zigvoid(): ...
+def pyobject() -> object: ...
+def pystring() -> str: ...
+def zigvoid() -> None: ...
+def zigbool() -> bool: ...
+def zigu32() -> int: ...
+def zigu64() -> int: ...
+def zigi32() -> int: ...
+def zigi64() -> int: ...
+def zigf16() -> float: ...
+def zigf32() -> float: ...
+def zigf64() -> float: ...
+def zigtuple() -> tuple[object, int]: ...
+def zigstruct() -> dict: ...
+def zigset() -> set: ...
@@ -77,6 +77,15 @@ pub fn zigstruct() StructResult {
     return .{ .foo = 1234, .bar = true };
 }
 
+pub fn zigset() !std.AutoHashMap(u64, void) {
+    var set = std.AutoHashMap(u64, void).init(py.allocator);
+    errdefer set.deinit();
+    for ([_]u64{ 1, 2, 2, 3 }) |v| {
+        try set.put(v, {});
+    }
+    return set;
+}
+
 comptime {
     py.rootmodule(@This());
 }
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+def __pydust_stats__() -> dict: ...
+def __pydust_allocations__() -> dict: ...
+def add(x: int, y: int, /) -> int: ...
+def fail() -> None: ...
+def reserve(n: int, /) -> None: ...
+def release() -> None: ...
+
+class Counter:
+    def __init__(self) -> None: ...
+    def __len__(self) -> int: ...
+    def increment(self) -> None: ...
+
+class Left:
+    class Inner:
+        @staticmethod
+        def ping() -> None: ...
+
+class Right:
+    class Inner:
+        @staticmethod
+        def ping() -> None: ...
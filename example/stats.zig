@@ -0,0 +1,73 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+// --8<-- [start:ex]
+const py = @import("pydust");
+
+pub fn add(args: struct { x: i64, y: i64 }) i64 {
+    return args.x + args.y;
+}
+
+pub fn fail() !void {
+    return py.ValueError.raise("always fails");
+}
+
+pub const Counter = py.class(struct {
+    const Self = @This();
+
+    count: u64,
+
+    pub fn __init__(self: *Self) void {
+        self.count = 0;
+    }
+
+    pub fn __len__(self: *const Self) usize {
+        return self.count;
+    }
+
+    pub fn increment(self: *Self) void {
+        self.count += 1;
+    }
+});
+
+comptime {
+    py.rootmodule(@This());
+}
+// --8<-- [end:ex]
+
+// Functions of nested classes are keyed by their full path, e.g. example.stats.Left.Inner.ping.
+pub const Left = py.class(struct {
+    pub const Inner = py.class(struct {
+        pub fn ping() void {}
+    });
+});
+
+pub const Right = py.class(struct {
+    pub const Inner = py.class(struct {
+        pub fn ping() void {}
+    });
+});
+
+// --8<-- [start:allocations]
+var reserved: ?[]u8 = null;
+
+/// Hold n bytes allocated through py.allocator until released.
+pub fn reserve(args: struct { n: usize }) !void {
+    release();
+    reserved = try py.allocator.alloc(u8, args.n);
+}
+
+pub fn release() void {
+    if (reserved) |buf| py.allocator.free(buf);
+    reserved = null;
+}
+// --8<-- [end:allocations]
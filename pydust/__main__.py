@@ -16,7 +16,7 @@ import argparse
 import sys
 from pathlib import Path
 
-from pydust import buildzig, config
+from pydust import bench, buildzig, config, watch
 
 parser = argparse.ArgumentParser()
 sub = parser.add_subparsers(dest="command", required=True)
@@ -37,6 +37,38 @@ build_sp.add_argument(
 )
 
 
+def repetitions(value: str) -> int:
+    repeat = int(value)
+    if repeat < 2:
+        # The comparison against a baseline needs the variance of the samples.
+        raise argparse.ArgumentTypeError("must be at least 2")
+    return repeat
+
+
+bench_sp = sub.add_parser(
+    "bench", help="Run Pydust benchmarks.", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+)
+bench_sp.add_argument("paths", nargs="*", default=["bench"], help="benchmark files or directories")
+bench_sp.add_argument("-k", "--pattern", help="only run benchmarks whose 'file::name' matches this glob")
+bench_sp.add_argument("-r", "--repeat", type=repetitions, default=20, help="number of timed repetitions, at least 2")
+bench_sp.add_argument("--min-time", type=float, default=0.01, help="minimum duration of a repetition in seconds")
+bench_sp.add_argument("--save", type=Path, help="save the results as a JSON baseline")
+bench_sp.add_argument("--compare", type=Path, help="compare the results against a JSON baseline")
+bench_sp.add_argument("--threshold", type=float, default=0.05, help="relative slowdown counted as a regression")
+bench_sp.add_argument("--alpha", type=float, default=0.01, help="significance level of a regression")
+
+watch_sp = sub.add_parser(
+    "watch",
+    help="Incrementally rebuild extension modules when their sources change.",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+watch_sp.add_argument("-O", "--zig-optimize", default="Debug", help="the optimize level passed to Zig")
+watch_sp.add_argument("--interval", type=float, default=0.2, help="seconds between checks for changed files")
+watch_sp.add_argument(
+    "--pytest", nargs=argparse.REMAINDER, help="re-run pytest with the remaining arguments after each rebuild"
+)
+
+
 def main():
     args = parser.parse_args()
 
@@ -46,6 +78,16 @@ def main():
     elif args.command == "build":
         build(args)
 
+    elif args.command == "bench":
+        sys.exit(run_bench(args))
+
+    elif args.command == "watch":
+        watch.watch(
+            args.zig_optimize,
+            pytest_args=args.pytest,
+            interval=args.interval,
+        )
+
 
 def _parse_exts(exts: list[str], limited_api: bool = True, prefix: str = "") -> list[config.ExtModule]:
     """parses extensions entries, accepts '<name>=<path>' or <path>"""
@@ -97,5 +139,19 @@ def debug(args):
     buildzig.zig_build(["install", f"-Ddebug-root={entrypoint}"])
 
 
+def run_bench(args) -> int:
+    """Run the benchmarks, failing if any significantly regressed against the compared baseline."""
+    return bench.main(
+        paths=[Path(p) for p in args.paths],
+        pattern=args.pattern,
+        repeat=args.repeat,
+        min_time=args.min_time,
+        save_path=args.save,
+        compare_path=args.compare,
+        threshold=args.threshold,
+        alpha=args.alpha,
+    )
+
+
 if __name__ == "__main__":
     main()
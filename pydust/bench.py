@@ -0,0 +1,273 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import fnmatch
+import importlib.util
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# A benchmark function takes a number of loops, runs the benchmarked call that many times and returns the elapsed ns.
+BenchFunc = Callable[[int], int]
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class Result:
+    name: str
+    loops: int
+    # The mean time per call in nanoseconds, of each repetition.
+    samples: list[float] = field(default_factory=list)
+    # The mean number of allocations and allocated bytes per call, only measured by native Zig benchmarks.
+    allocations: float | None = None
+    allocated_bytes: float | None = None
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.samples)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.samples) if len(self.samples) > 1 else 0.0
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: Result
+    current: Result
+    change: float
+    pvalue: float
+    regressed: bool
+
+
+def discover(paths: list[Path], pattern: str | None = None) -> dict[str, BenchFunc]:
+    """Collect the `bench_*` functions from `bench_*.py` files, in the same way pytest collects tests."""
+    benchmarks = {}
+    files = []
+    for path in paths:
+        files.extend(sorted(path.glob("**/bench_*.py")) if path.is_dir() else [path])
+
+    for file in files:
+        spec = importlib.util.spec_from_file_location(file.stem, file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        for attr, func in vars(module).items():
+            name = f"{file.stem}::{attr}"
+            if attr.startswith("bench_") and callable(func) and (pattern is None or fnmatch.fnmatch(name, pattern)):
+                benchmarks[name] = func
+    return benchmarks
+
+
+def run(name: str, func: BenchFunc, repeat: int = 20, min_time: float = 0.01) -> Result:
+    """Calibrate the number of loops so each repetition takes at least min_time seconds, then time each repetition."""
+    if repeat < 2:
+        # The comparison against a baseline needs the variance of the samples.
+        raise ValueError("Benchmarks must have at least two repetitions")
+
+    loops = 1
+    while func(loops) < min_time * 1e9:
+        loops *= 2
+
+    # Warm up caches and any lazily initialized state before sampling.
+    func(loops)
+
+    result = Result(name=name, loops=loops)
+    for _ in range(repeat):
+        result.samples.append(func(loops) / loops)
+    return result
+
+
+def save(results: list[Result], path: Path):
+    path.write_text(
+        json.dumps(
+            {
+                "version": BASELINE_VERSION,
+                "python": sys.version,
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "benchmarks": {r.name: _dump(r) for r in results},
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+
+
+def load(path: Path) -> dict[str, Result]:
+    data = json.loads(path.read_text())
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version {data.get('version')} in {path}")
+    return {
+        name: Result(
+            name=name,
+            loops=bench["loops"],
+            samples=bench["samples"],
+            allocations=bench.get("allocations"),
+            allocated_bytes=bench.get("allocated_bytes"),
+        )
+        for name, bench in data["benchmarks"].items()
+    }
+
+
+def _dump(result: Result) -> dict:
+    bench = {"loops": result.loops, "samples": result.samples}
+    if result.allocations is not None:
+        bench["allocations"] = result.allocations
+        bench["allocated_bytes"] = result.allocated_bytes
+    return bench
+
+
+def compare(
+    baseline: dict[str, Result], results: list[Result], threshold: float = 0.05, alpha: float = 0.01
+) -> list[Comparison]:
+    """Compare results against a baseline.
+
+    A benchmark regresses when its mean slows down by more than the threshold, and Welch's t-test rejects
+    the hypothesis that the means are equal at significance level alpha.
+    """
+    comparisons = []
+    for current in results:
+        if current.name not in baseline:
+            continue
+        base = baseline[current.name]
+        change = current.mean / base.mean - 1
+        pvalue = welch_pvalue(base.samples, current.samples)
+        comparisons.append(
+            Comparison(
+                name=current.name,
+                baseline=base,
+                current=current,
+                change=change,
+                pvalue=pvalue,
+                regressed=change > threshold and pvalue < alpha,
+            )
+        )
+    return comparisons
+
+
+def welch_pvalue(a: list[float], b: list[float]) -> float:
+    """The two-sided p-value of Welch's t-test for samples with unequal variances, or nan for fewer than two samples."""
+    if len(a) < 2 or len(b) < 2:
+        return math.nan
+    va = statistics.variance(a) / len(a)
+    vb = statistics.variance(b) / len(b)
+    if va + vb == 0:
+        return 1.0 if statistics.fmean(a) == statistics.fmean(b) else 0.0
+    t = (statistics.fmean(a) - statistics.fmean(b)) / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / (va**2 / (len(a) - 1) + vb**2 / (len(b) - 1))
+    # The survival function of Student's t-distribution, via the regularized incomplete beta function.
+    return _betainc(df / 2, 0.5, df / (df + t * t))
+
+
+def _betainc(a: float, b: float, x: float) -> float:
+    """The regularized incomplete beta function I_x(a, b), evaluated with Lentz's continued fraction."""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _betainc(b, a, 1 - x)
+
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)) / a
+    tiny = 1e-300
+    f, c, d = 1.0, 1.0, 0.0
+    for i in range(400):
+        m = i // 2
+        if i == 0:
+            numerator = 1.0
+        elif i % 2 == 0:
+            numerator = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
+        else:
+            numerator = -((a + m) * (a + b + m) * x) / ((a + 2 * m) * (a + 2 * m + 1))
+        d = 1.0 + numerator * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + numerator / c
+        c = c if abs(c) > tiny else tiny
+        f *= c * d
+        if abs(1.0 - c * d) < 1e-12:
+            break
+    return front * (f - 1.0)
+
+
+def format_time(ns: float) -> str:
+    if ns < 1e3:
+        return f"{ns:.1f} ns"
+    if ns < 1e6:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns / 1e6:.2f} ms"
+
+
+def format_result(result: Result, width: int) -> str:
+    line = f"{result.name:<{width}}  {format_time(result.mean):>10} +- {format_time(result.stdev):>10}"
+    if result.allocations is not None:
+        line += f"  {result.allocations:.1f} allocs ({result.allocated_bytes:.0f} B)"
+    return line
+
+
+def format_comparison(c: Comparison, width: int) -> str:
+    status = "REGRESSED" if c.regressed else ""
+    return (
+        f"{c.name:<{width}}  {format_time(c.baseline.mean):>10} -> {format_time(c.current.mean):>10}"
+        f"  {c.change:+7.1%}  p={c.pvalue:.3f}  {status}"
+    )
+
+
+def main(
+    paths: list[Path],
+    pattern: str | None = None,
+    repeat: int = 20,
+    min_time: float = 0.01,
+    save_path: Path | None = None,
+    compare_path: Path | None = None,
+    threshold: float = 0.05,
+    alpha: float = 0.01,
+) -> int:
+    """Run the benchmarks, optionally saving a baseline or comparing against one. Returns 1 on regressions."""
+    benchmarks = discover(paths, pattern)
+    if not benchmarks:
+        print("No benchmarks found", file=sys.stderr)
+        return 1
+
+    width = max(len(name) for name in benchmarks)
+    results = []
+    for name, func in benchmarks.items():
+        result = run(name, func, repeat=repeat, min_time=min_time)
+        results.append(result)
+        print(format_result(result, width))
+
+    if save_path is not None:
+        save(results, save_path)
+        print(f"Saved baseline to {save_path}")
+
+    if compare_path is None:
+        return 0
+
+    comparisons = compare(load(compare_path), results, threshold=threshold, alpha=alpha)
+    print(f"\nCompared against {compare_path}:")
+    for c in comparisons:
+        print(format_comparison(c, width))
+
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
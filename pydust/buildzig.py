@@ -13,7 +13,12 @@ limitations under the License.
 """
 
 import contextlib
+import hashlib
+import importlib.metadata
+import io
+import json
 import os
+import platform
 import shutil
 import subprocess
 import sys
@@ -34,22 +39,149 @@ PYLDLIB = PYLDLIB[3:] if PYLDLIB.startswith("lib") else PYLDLIB
 PYLDLIB = os.path.splitext(PYLDLIB)[0]
 
 
-def zig_build(argv: list[str], conf: config.ToolPydust | None = None):
+# Records the inputs of the last successful cached build.
+BUILD_HASH_PATH = Path("zig-out") / ".pydust-build-hash"
+
+# Set by pydust watch for the pytest sessions it runs, whose modules it has already rebuilt, so the pytest plugin
+# neither builds nor runs the Zig tests, whose test binaries are not rebuilt by the watcher.
+SKIP_BUILD_ENV = "PYDUST_SKIP_BUILD"
+
+# Directories never searched for Zig sources when hashing the build inputs.
+IGNORED_DIRS = {"zig-cache", "zig-out", "node_modules", "__pycache__"}
+
+# The suffixes of source files hashed as build inputs, including C, C++ and assembly sources compiled by Zig.
+SOURCE_SUFFIXES = (".zig", ".zig.zon", ".c", ".h", ".cc", ".cpp", ".cxx", ".hh", ".hpp", ".m", ".mm", ".s", ".S")
+
+
+def zig_build(
+    argv: list[str],
+    conf: config.ToolPydust | None = None,
+    cached: bool = False,
+    check: bool = True,
+) -> subprocess.CompletedProcess | None:
+    """Run a zig build, returning the completed process unless it was skipped.
+
+    When cached, the build is skipped without spawning Zig if its inputs are unchanged since the last
+    successful cached build, and all of the extension modules and test binaries it produces still exist.
+    """
     conf = conf or config.load()
 
     # Always generate the supporting pydist.build.zig
-    shutil.copy(Path(pydust.__file__).parent.joinpath("src/pydust.build.zig"), conf.pydust_build_zig)
+    write_if_changed(conf.pydust_build_zig, Path(pydust.__file__).parent.joinpath("src/pydust.build.zig").read_text())
 
     if not conf.self_managed:
         # Generate the build.zig if we're managing the ext_modules ourselves
-        with conf.build_zig.open(mode="w") as f:
-            generate_build_zig(f, conf)
+        f = io.StringIO()
+        generate_build_zig(f, conf)
+        write_if_changed(conf.build_zig, f.getvalue())
 
     zig_exe = [os.path.expanduser(conf.zig_exe)] if conf.zig_exe else [sys.executable, "-m", "ziglang"]
 
+    if f"-Dpython-exe={sys.executable}" in argv:
+        # We're building against this interpreter, so we hand Zig its configuration rather than have it start Python.
+        argv = [*argv, f"-Dpython-config={json.dumps(python_config(), separators=(',', ':'))}"]
+
     cmds = zig_exe + ["build", "--build-file", conf.build_zig] + argv
 
-    subprocess.run(cmds, check=True)
+    if not cached:
+        return subprocess.run(cmds, check=check)
+
+    digest = build_hash(cmds, conf, zig_exe)
+    if _read_build_hash() == digest and all(p.exists() for p in _build_outputs(conf)):
+        return None
+
+    # Invalidate first, so an interrupted build is never mistaken for a successful one.
+    BUILD_HASH_PATH.unlink(missing_ok=True)
+    proc = subprocess.run(cmds, check=check)
+    if proc.returncode == 0:
+        BUILD_HASH_PATH.parent.mkdir(parents=True, exist_ok=True)
+        BUILD_HASH_PATH.write_text(digest)
+    return proc
+
+
+def python_config() -> dict[str, str]:
+    """The configuration of the running interpreter, in the form of the PythonConfig in pydust.build.zig."""
+    return {
+        "executable": sys.executable,
+        "libpython": PYLDLIB,
+        "hexversion": PYVER_HEX,
+        "include_dir": sysconfig.get_path("include"),
+        "library_dir": str(sysconfig.get_config_var("LIBDIR")),
+        "pydust_source_file": str(Path(pydust.__file__).parent / "src" / "pydust.zig"),
+    }
+
+
+def write_if_changed(path: Path, content: str):
+    """Write the file only if its content differs, preserving its mtime otherwise."""
+    path = Path(path)
+    if path.exists() and path.read_text() == content:
+        return
+    path.write_text(content)
+
+
+def build_hash(cmds: list, conf: config.ToolPydust, zig_exe: list[str]) -> str:
+    """Hash the inputs of a build.
+
+    These are the command, the Zig toolchain, the interpreter, the config, and the contents of all Zig, C and C++
+    sources along with any additional build_inputs.
+    """
+    h = hashlib.sha256()
+    parts = [*map(str, cmds), zig_version(zig_exe), sys.executable, sys.version, PYVER_HEX, conf.model_dump_json()]
+    for part in parts:
+        h.update(part.encode())
+        h.update(b"\0")
+
+    sources = [*zig_sources(Path(".")), *zig_sources(Path(pydust.__file__).parent / "src")]
+    for pattern in conf.build_inputs:
+        sources += [p.resolve() for p in Path(".").glob(pattern) if p.is_file()]
+    for source in sorted(set(sources)):
+        h.update(str(source).encode())
+        h.update(b"\0")
+        h.update(source.read_bytes())
+    return h.hexdigest()
+
+
+def zig_version(zig_exe: list[str]) -> str:
+    """Identify the Zig toolchain without spawning it, by the ziglang version or the executable's size and mtime."""
+    if zig_exe[0] == sys.executable:
+        try:
+            return importlib.metadata.version("ziglang")
+        except importlib.metadata.PackageNotFoundError:
+            # The build itself reports the missing package.
+            return "ziglang"
+    path = shutil.which(zig_exe[0])
+    if path is None:
+        return zig_exe[0]
+    stat = Path(path).resolve().stat()
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def zig_sources(root: Path):
+    """Yield the Zig, C and C++ sources beneath the root, skipping hidden directories and build outputs."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Prune hidden directories, such as virtualenvs, and build outputs in place.
+        dirnames[:] = [d for d in dirnames if not d.startswith(".") and d not in IGNORED_DIRS]
+        for filename in filenames:
+            if filename.endswith(SOURCE_SUFFIXES):
+                yield Path(dirpath, filename).resolve()
+
+
+def _read_build_hash() -> str | None:
+    try:
+        return BUILD_HASH_PATH.read_text()
+    except FileNotFoundError:
+        return None
+
+
+def _build_outputs(conf: config.ToolPydust) -> list[Path]:
+    outputs = [ext_module.install_path for ext_module in conf.ext_modules]
+    for ext_module in conf.ext_modules:
+        # CPU variants are only built for x86-64.
+        variants = platform.machine().lower() in ("x86_64", "amd64")
+        outputs += ext_module.library_paths if variants else ext_module.library_paths[:1]
+    if conf.zig_tests:
+        outputs += [ext_module.test_bin for ext_module in conf.ext_modules]
+    return outputs
 
 
 def generate_build_zig(fileobj: TextIO, conf=None):
@@ -88,19 +220,60 @@ def generate_build_zig(fileobj: TextIO, conf=None):
             # TODO(ngates): fix the out filename for non-limited modules
             assert ext_module.limited_api, "Only limited_api is supported for now"
 
+            if ext_module.bundle:
+                continue
+
             b.write(
                 f"""
                 _ = pydust.addPythonModule(.{{
                     .name = "{ext_module.name}",
                     .root_source_file = .{{ .path = "{ext_module.root}" }},
-                    .limited_api = {str(ext_module.limited_api).lower()},
-                    .target = target,
-                    .optimize = optimize,
+                    {_build_options(ext_module)}
+                }});
+                """
+            )
+
+        for bundle, ext_modules in conf.bundles.items():
+            modules = "\n".join(
+                f'.{{ .name = "{m.name}", .root_source_file = .{{ .path = "{m.root}" }} }},' for m in ext_modules
+            )
+            b.write(
+                f"""
+                _ = pydust.addPythonBundle(.{{
+                    .name = "{bundle}",
+                    .modules = &.{{
+                        {textwrap.indent(modules, " " * 24).lstrip()}
+                    }},
+                    {_build_options(ext_modules[0])}
                 }});
                 """
             )
 
 
+def _build_options(ext_module: config.ExtModule) -> str:
+    """The build options of a module, shared by the modules of a bundle, as Zig struct fields."""
+    options = f"""
+        .limited_api = {str(ext_module.limited_api).lower()},
+        .stats = {str(ext_module.stats).lower()},
+        .probes = {str(ext_module.probes).lower()},
+        .track_allocations = {str(ext_module.track_allocations).lower()},
+        .track_allocation_sites = {str(ext_module.track_allocation_sites).lower()},
+        .cpu_variants = {zig_strings(ext_module.cpu_variants)},
+        .runtime_safety_enabled = {zig_strings(k for k, v in ext_module.runtime_safety.items() if v)},
+        .runtime_safety_disabled = {zig_strings(k for k, v in ext_module.runtime_safety.items() if not v)},
+        .target = target,
+        .optimize = {f".{ext_module.optimize}" if ext_module.optimize else "optimize"},
+    """
+    # Indented to line up with the fields of the call in generate_build_zig.
+    return textwrap.indent(textwrap.dedent(options).strip(), " " * 20).lstrip()
+
+
+def zig_strings(values) -> str:
+    """Format the strings as a Zig slice literal."""
+    values = [json.dumps(v) for v in values]
+    return "&.{ " + ", ".join(values) + " }" if values else "&.{}"
+
+
 class Writer:
     def __init__(self, fileobj: TextIO) -> None:
         self.f = fileobj
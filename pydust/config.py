@@ -15,6 +15,7 @@ limitations under the License.
 import functools
 import importlib.metadata
 from pathlib import Path
+from typing import Literal
 
 import tomllib
 from pydantic import BaseModel, Field, model_validator
@@ -27,21 +28,74 @@ class ExtModule(BaseModel):
     root: Path
     limited_api: bool = True
 
+    # Record per-function call statistics, exposed by the module's __pydust_stats__ function.
+    stats: bool = False
+
+    # Fire USDT probes on entry to and exit from each function, on Linux.
+    probes: bool = False
+
+    # Account for the memory allocated through py.allocator, exposed by the module's __pydust_allocations__ function.
+    track_allocations: bool = False
+
+    # Additionally aggregate live allocations by call site.
+    track_allocation_sites: bool = False
+
+    # Override the optimize mode of the build for this module.
+    optimize: Literal["Debug", "ReleaseSafe", "ReleaseFast", "ReleaseSmall"] | None = None
+
+    # Additionally build the module for these x86-64 micro-architecture levels. The module itself is built for the
+    # baseline CPU and loads the best variant supported by the CPU when imported.
+    cpu_variants: list[Literal["x86_64_v2", "x86_64_v3", "x86_64_v4"]] = Field(default_factory=list)
+
+    # Enable or disable runtime safety checks by function name relative to the module, e.g. Class.method, for
+    # functions using py.runtimeSafety.
+    runtime_safety: dict[str, bool] = Field(default_factory=dict)
+
+    # Link the module into the named bundle, a single shared library holding every module of the bundle. The module
+    # is then installed as a Python module that initializes it from the bundle.
+    bundle: str | None = None
+
     @property
     def libname(self) -> str:
         return self.name.rsplit(".", maxsplit=1)[-1]
 
     @property
     def install_path(self) -> Path:
-        # FIXME(ngates): for non-limited API
-        assert self.limited_api, "Only limited API modules are supported right now"
-        return Path(*self.name.split(".")).with_suffix(".abi3.so")
+        if self.bundle:
+            return Path(*self.name.split(".")).with_suffix(".py")
+        return _library_path(self.name, self.limited_api)
+
+    @property
+    def library_paths(self) -> list[Path]:
+        """The shared library holding the module, followed by its CPU variants."""
+        path = _library_path(self.bundle or self.name, self.limited_api)
+        stem = path.name.split(".", maxsplit=1)[0]
+        return [path, *(path.with_name(f"{stem}.{variant}.abi3.so") for variant in self.cpu_variants)]
 
     @property
     def test_bin(self) -> Path:
         return (Path("zig-out") / "bin" / self.libname).with_suffix(".test.bin")
 
 
+def _library_path(name: str, limited_api: bool) -> Path:
+    # FIXME(ngates): for non-limited API
+    assert limited_api, "Only limited API modules are supported right now"
+    return Path(*name.split(".")).with_suffix(".abi3.so")
+
+
+# The options that must agree between the modules of a bundle, since they are built as one library.
+BUNDLE_OPTIONS = (
+    "limited_api",
+    "stats",
+    "probes",
+    "track_allocations",
+    "track_allocation_sites",
+    "optimize",
+    "cpu_variants",
+    "runtime_safety",
+)
+
+
 class ToolPydust(BaseModel):
     """Model for tool.pydust section of a pyproject.toml."""
 
@@ -51,6 +105,10 @@ class ToolPydust(BaseModel):
     # Whether to include Zig tests as part of the pytest collection.
     zig_tests: bool = True
 
+    # Glob patterns of additional files that invalidate cached builds, such as files embedded with @embedFile.
+    # Zig, C and C++ sources are always included.
+    build_inputs: list[str] = Field(default_factory=list)
+
     # When true, python module definitions are configured by the user in their own build.zig file.
     # When false, ext_modules is used to auto-generated a build.zig file.
     self_managed: bool = False
@@ -62,11 +120,36 @@ class ToolPydust(BaseModel):
     def pydust_build_zig(self) -> Path:
         return self.build_zig.parent / "pydust.build.zig"
 
+    @property
+    def bundles(self) -> dict[str, list[ExtModule]]:
+        """The bundled ext_modules, grouped by their bundle."""
+        bundles = {}
+        for ext_module in self.ext_modules:
+            if ext_module.bundle:
+                bundles.setdefault(ext_module.bundle, []).append(ext_module)
+        return bundles
+
     @model_validator(mode="after")
     def validate_atts(self):
         if self.self_managed and self.ext_modules:
             raise ValueError("ext_modules cannot be defined when using Pydust in self-managed mode.")
 
+        for bundle, ext_modules in self.bundles.items():
+            first = ext_modules[0]
+            for ext_module in ext_modules[1:]:
+                for option in BUNDLE_OPTIONS:
+                    if getattr(ext_module, option) != getattr(first, option):
+                        raise ValueError(
+                            f"Modules of bundle {bundle} must share the {option} option, "
+                            f"but {ext_module.name} differs from {first.name}"
+                        )
+
+            # Each module exports a PyInit function named after its last component from the same library.
+            libnames = [bundle.rsplit(".", maxsplit=1)[-1], *(ext_module.libname for ext_module in ext_modules)]
+            if len(set(libnames)) != len(libnames):
+                raise ValueError(f"Modules of bundle {bundle} must have distinct names, including the bundle itself")
+        return self
+
 
 @functools.cache
 def load() -> ToolPydust:
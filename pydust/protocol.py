@@ -0,0 +1,77 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import enum
+import struct
+
+from pydantic import BaseModel
+
+
+class TestProtocol:
+    """Utilities for reading and writing messages to the Zig compiler and test runner servers."""
+
+    class RequestTag(enum.Enum):
+        # Tells the compiler to shut down cleanly.
+        # No body.
+        exit = 0
+        # Tells the compiler to detect changes in source files and update the
+        # affected output compilation artifacts.
+        # If one of the compilation artifacts is an executable that is
+        # running as a child process, the compiler will wait for it to exit
+        # before performing the update.
+        # No body.
+        update = 1
+        # Tells the compiler to execute the executable as a child process.
+        # No body.
+        run = 2
+        # Tells the compiler to detect changes in source files and update the
+        # affected output compilation artifacts.
+        # If one of the compilation artifacts is an executable that is
+        # running as a child process, the compiler will perform a hot code
+        # swap.
+        # No body.
+        hot_update = 3
+        # Ask the test runner for metadata about all the unit tests that can
+        # be run. Server will respond with a `test_metadata` message.
+        # No body.
+        query_test_metadata = 4
+        # Ask the test runner to run a particular test.
+        # The message body is a u32 test index.
+        run_test = 5
+
+    class ResponseTag(enum.Enum):
+        # Body is a UTF-8 string.
+        zig_version = 0
+        # Body is an ErrorBundle.
+        error_bundle = 1
+        # Body is a UTF-8 string.
+        progress = 2
+        # Body is a EmitBinPath.
+        emit_bin_path = 3
+        # Body is a TestMetadata
+        test_metadata = 4
+        # Body is a TestResults
+        test_results = 5
+
+    class Header(BaseModel):
+        tag: int
+        bytes_len: int = 0
+
+        def pack(self):
+            return struct.pack("<II", self.tag, self.bytes_len)
+
+        @classmethod
+        def unpack(cls, buffer):
+            (tag, bytes_len) = struct.unpack("<II", buffer.read(8))
+            return cls(tag=tag, bytes_len=bytes_len)
@@ -12,20 +12,27 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
-import enum
+import dataclasses
 import io
+import json
+import os
 import struct
 import subprocess
 import sys
 import tempfile
+from pathlib import Path
 
 import pytest
-from pydantic import BaseModel
 
-from pydust import buildzig, config
+from pydust import bench, buildzig, config
+from pydust.protocol import TestProtocol
 
 pydust_conf = config.load()
 
+# The results of Zig benchmarks gathered by this process, and their comparison against a baseline.
+_zig_bench_results: list[bench.Result] = []
+_zig_bench_comparisons: list[bench.Comparison] | None = None
+
 
 def pytest_addoption(parser, pluginmanager):
     """Register Pytest command line options."""
@@ -36,23 +43,135 @@ def pytest_addoption(parser, pluginmanager):
         choices=("Debug", "ReleaseSafe", "ReleaseFast", "ReleaseSmall"),
         help="The optimize level passed to Zig",
     )
+    group.addoption("--zig-bench", action="store_true", help="Run Zig benchmarks, which are otherwise deselected")
+    group.addoption("--zig-bench-save", type=Path, help="Save the results of Zig benchmarks as a JSON baseline")
+    group.addoption("--zig-bench-compare", type=Path, help="Compare the results of Zig benchmarks against a baseline")
+    group.addoption("--zig-bench-threshold", type=float, default=0.05, help="Relative slowdown counted as a regression")
+    group.addoption("--zig-bench-alpha", type=float, default=0.01, help="Significance level of a regression")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "zig_bench: a Zig benchmark, i.e. a Zig test named 'bench: ...'")
 
 
-def pytest_collection(session):
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionstart(session):
     """Setup the testing environment for Pydust.
 
     * Invoke a `zig build install` to generate the Python extension modules (used by Python tests)
     * Invoke a `zig build pydust-test-build` to generate the Zig test runners (used by Zig tests)
+
+    Under pytest-xdist, only the controller builds. Since we run before xdist spawns its workers at
+    session start, the workers find the build complete and each runs its share of the Zig tests
+    against its own test servers.
     """
+    if _is_xdist_worker(session.config) or _skip_build():
+        return
+
+    # Both steps run in a single zig build, which is skipped entirely when none of its inputs have changed.
+    steps = ["install", "pydust-test-build"] if config.load().zig_tests else ["install"]
     optimize = session.config.getoption("zig_optimize")
-    buildzig.zig_build(["install", f"-Doptimize={optimize}", f"-Dpython-exe={sys.executable}"])
-    if config.load().zig_tests:
-        buildzig.zig_build(["pydust-test-build", f"-Doptimize={optimize}", f"-Dpython-exe={sys.executable}"])
+    buildzig.zig_build([*steps, f"-Doptimize={optimize}", f"-Dpython-exe={sys.executable}"], cached=True)
+
+
+def pytest_collection_modifyitems(config, items):
+    """Deselect Zig benchmarks unless they are selected, since they are slow and meaningless in Debug builds."""
+    if _bench_selected(config):
+        return
+    benchmarks = [item for item in items if item.get_closest_marker("zig_bench")]
+    if benchmarks:
+        config.hook.pytest_deselected(items=benchmarks)
+        items[:] = [item for item in items if not item.get_closest_marker("zig_bench")]
+
+
+def _bench_selected(config):
+    """Whether Zig benchmarks were asked for, with --zig-bench, a baseline option or a marker expression."""
+    return (
+        config.getoption("zig_bench")
+        or config.getoption("zig_bench_save") is not None
+        or config.getoption("zig_bench_compare") is not None
+        or "zig_bench" in config.getoption("markexpr", "")
+    )
+
+
+def _is_xdist_worker(config):
+    return hasattr(config, "workerinput")
+
+
+def _skip_build():
+    return bool(os.environ.get(buildzig.SKIP_BUILD_ENV))
+
+
+def pytest_runtest_logreport(report):
+    """Gather the results of Zig benchmarks.
+
+    Results travel as user properties of the test report, which pytest-xdist forwards from its workers.
+    """
+    if report.when != "call":
+        return
+    for key, value in report.user_properties:
+        if key == "zig_bench":
+            _zig_bench_results.append(bench.Result(**value))
+
+
+def pytest_sessionfinish(session):
+    """Shut down the Zig test servers, then save or compare the results of Zig benchmarks."""
+    global _zig_bench_comparisons
+    ZigTestServer.close_all()
+
+    options = session.config
+    if _is_xdist_worker(options) or not _zig_bench_results:
+        return
+
+    results = sorted(_zig_bench_results, key=lambda r: r.name)
+    save_path = options.getoption("zig_bench_save")
+    if save_path is not None:
+        bench.save(results, save_path)
+
+    compare_path = options.getoption("zig_bench_compare")
+    if compare_path is not None:
+        comparisons = bench.compare(
+            bench.load(compare_path),
+            results,
+            threshold=options.getoption("zig_bench_threshold"),
+            alpha=options.getoption("zig_bench_alpha"),
+        )
+        _zig_bench_comparisons = comparisons
+        if any(c.regressed for c in comparisons) and session.exitstatus == pytest.ExitCode.OK:
+            session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Report the results of Zig benchmarks, and their comparison against a baseline."""
+    if not _zig_bench_results:
+        return
+
+    results = sorted(_zig_bench_results, key=lambda r: r.name)
+    width = max(len(r.name) for r in results)
+    terminalreporter.section("zig benchmarks")
+    for result in results:
+        terminalreporter.write_line(bench.format_result(result, width))
+
+    save_path = config.getoption("zig_bench_save")
+    if save_path is not None:
+        terminalreporter.write_line(f"Saved baseline to {save_path}")
+
+    comparisons = _zig_bench_comparisons
+    if comparisons is not None:
+        terminalreporter.write_line(f"\nCompared against {config.getoption('zig_bench_compare')}:")
+        for c in comparisons:
+            terminalreporter.write_line(bench.format_comparison(c, width), red=c.regressed)
+        regressions = [c for c in comparisons if c.regressed]
+        if regressions:
+            threshold = config.getoption("zig_bench_threshold")
+            terminalreporter.write_line(
+                f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}", red=True
+            )
 
 
 def pytest_collect_file(file_path, path, parent):
     """Grab any Zig roots for PyTest collection."""
-    if not config.load().zig_tests:
+    if not config.load().zig_tests or _skip_build():
         return None
 
     if file_path.suffix == ".zig":
@@ -65,35 +184,20 @@ class ZigFile(pytest.File):
     def collect(self):
         """Collect all the tests that exist within this Zig root.
 
-        First compile using 'zig test'
-        Then spin up the test server and query it for the test metadata.
+        The test binary has already been compiled by 'zig build pydust-test-build', so we spin up
+        its test server and query it for the test metadata.
         """
         ext_module = [e for e in pydust_conf.ext_modules if e.root.absolute() == self.path][0]
 
-        # Then query the test metadata
-        proc = subprocess.Popen([ext_module.test_bin, "--listen=-"], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-        try:
-            # Zig first sends us its version.
-            h = TestProtocol.Header.unpack(proc.stdout)
-            assert h.tag == TestProtocol.ResponseTag.zig_version.value
-            _zig_version = proc.stdout.read(h.bytes_len).decode("utf-8")
-
-            # Then we can request test metadata
-            proc.stdin.write(TestProtocol.Header(tag=TestProtocol.RequestTag.query_test_metadata.value).pack())
-            proc.stdin.flush()
-
-            h = TestProtocol.Header.unpack(proc.stdout)
-            assert h.tag == TestProtocol.ResponseTag.test_metadata.value
-            test_metas = self._read_test_metadata(proc.stdout.read(h.bytes_len))
-        finally:
-            proc.stdin.close()
-            proc.stdout.close()
-            proc.kill()
-            proc.wait()
+        # Query the test metadata from the same server that later runs the tests.
+        test_metas = self._read_test_metadata(ZigTestServer.get(ext_module.test_bin).query_test_metadata())
 
         for test in test_metas:
             # TODO(ngates): we could override the path here if test_metadata provided source provenance.
-            yield ZigItem.from_parent(self, name=test["name"], ext_module=ext_module, test_meta=test)
+            item = ZigItem.from_parent(self, name=test["name"], ext_module=ext_module, test_meta=test)
+            if test["name"].startswith(BENCH_PREFIX):
+                item.add_marker(pytest.mark.zig_bench)
+            yield item
 
     @staticmethod
     def _read_test_metadata(buffer):
@@ -127,6 +231,16 @@ class ZigFile(pytest.File):
         return tests
 
 
+# Zig tests named with this prefix are benchmarks, which report their results with py.bench.
+BENCH_PREFIX = "bench:"
+
+# The prefix of a stderr line written by py.bench, followed by the results as JSON.
+BENCH_RESULT_PREFIX = "pydust-bench: "
+
+# Set for the Zig test runners, so py.bench only runs from the plugin rather than on every `zig build test`.
+BENCH_ENV = "PYDUST_BENCH"
+
+
 class ZigItem(pytest.Item):
     def __init__(self, *, ext_module, test_meta, **kwargs):
         super().__init__(**kwargs)
@@ -136,43 +250,21 @@ class ZigItem(pytest.Item):
         self._stderr = None
 
     def runtest(self):
-        stderr = tempfile.NamedTemporaryFile()
-        proc = subprocess.Popen(
-            [self.ext_module.test_bin, "--listen=-"],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=stderr,
-        )
+        server = ZigTestServer.get(self.ext_module.test_bin)
         try:
-            # Zig first sends us its version.
-            h = TestProtocol.Header.unpack(proc.stdout)
-            assert h.tag == TestProtocol.ResponseTag.zig_version.value
-            _zig_version = proc.stdout.read(h.bytes_len).decode("utf-8")
-
-            # Then we can request the test to run
-            proc.stdin.write(TestProtocol.Header(tag=TestProtocol.RequestTag.run_test.value, bytes_len=4).pack())
-            proc.stdin.write(struct.pack("<I", self.test_meta["idx"]))
-            proc.stdin.flush()
-
-            h = TestProtocol.Header.unpack(proc.stdout)
-            assert h.tag == TestProtocol.ResponseTag.test_results.value
-
-            _test_idx, flags = struct.unpack("<II", proc.stdout.read(8))
-            fail = bool(flags & 0x01)
-            skip = bool(flags & 0x02)
-            leak = bool(flags & 0x04)
-            # TODO(ngates): log_error_count: u29 isn't currently passed back but should be
-
-            with open(stderr.name) as f:
-                self.add_report_section("call", "stderr", f.read())
+            flags, stderr = server.run_test(self.test_meta["idx"])
         except Exception as e:
-            raise Exception("Zig test crashed. Exited " + str(proc.wait())) from e
-        finally:
-            proc.stdin.close()
-            proc.stdout.close()
-            proc.kill()
-            proc.wait()
-            stderr.close()
+            # The crashed server is restarted for the next test.
+            self.add_report_section("call", "stderr", server.read_stderr())
+            raise Exception("Zig test crashed. Exited " + str(server.close())) from e
+
+        stderr = self._collect_bench_results(stderr)
+        self.add_report_section("call", "stderr", stderr)
+
+        fail = bool(flags & 0x01)
+        skip = bool(flags & 0x02)
+        leak = bool(flags & 0x04)
+        log_error_count = flags >> 3
 
         if skip:
             self.add_marker(pytest.mark.skip)
@@ -180,9 +272,28 @@ class ZigItem(pytest.Item):
         if leak:
             self.add_report_section("call", "memory leaks", f"Zig detected a memory leak in '{self.nodeid}'")
 
-        if fail or leak:
+        if log_error_count:
+            # Like `zig build test`, we fail tests that logged errors.
+            self.add_report_section(
+                "call", "logged errors", f"Zig logged {log_error_count} error(s) in '{self.nodeid}'"
+            )
+
+        if fail or leak or log_error_count:
             raise Exception("Failure in Zig test")
 
+    def _collect_bench_results(self, stderr):
+        """Record the results written by py.bench, returning the remaining stderr."""
+        lines = []
+        for line in stderr.splitlines(keepends=True):
+            if not line.startswith(BENCH_RESULT_PREFIX):
+                lines.append(line)
+                continue
+            data = json.loads(line[len(BENCH_RESULT_PREFIX) :])
+            result = bench.Result(name=f"{self.path.name}::{self.name}", **data)
+            self.user_properties.append(("zig_bench", dataclasses.asdict(result)))
+            self.add_report_section("call", "benchmark", bench.format_result(result, len(result.name)))
+        return "".join(lines)
+
     def repr_failure(self, excinfo):
         """Called when self.runtest() raises an exception."""
         return str(excinfo)
@@ -191,60 +302,85 @@ class ZigItem(pytest.Item):
         return self.path, 0, self.test_meta["name"]
 
 
-class TestProtocol:
-    """Utilities for reading and writing messages to the Zig test runner server."""
-
-    class RequestTag(enum.Enum):
-        # Tells the compiler to shut down cleanly.
-        # No body.
-        exit = 0
-        # Tells the compiler to detect changes in source files and update the
-        # affected output compilation artifacts.
-        # If one of the compilation artifacts is an executable that is
-        # running as a child process, the compiler will wait for it to exit
-        # before performing the update.
-        # No body.
-        update = 1
-        # Tells the compiler to execute the executable as a child process.
-        # No body.
-        run = 2
-        # Tells the compiler to detect changes in source files and update the
-        # affected output compilation artifacts.
-        # If one of the compilation artifacts is an executable that is
-        # running as a child process, the compiler will perform a hot code
-        # swap.
-        # No body.
-        hot_update = 3
-        # Ask the test runner for metadata about all the unit tests that can
-        # be run. Server will respond with a `test_metadata` message.
-        # No body.
-        query_test_metadata = 4
-        # Ask the test runner to run a particular test.
-        # The message body is a u32 test index.
-        run_test = 5
-
-    class ResponseTag(enum.Enum):
-        # Body is a UTF-8 string.
-        zig_version = 0
-        # Body is an ErrorBundle.
-        error_bundle = 1
-        # Body is a UTF-8 string.
-        progress = 2
-        # Body is a EmitBinPath.
-        emit_bin_path = 3
-        # Body is a TestMetadata
-        test_metadata = 4
-        # Body is a TestResults
-        test_results = 5
-
-    class Header(BaseModel):
-        tag: int
-        bytes_len: int = 0
-
-        def pack(self):
-            return struct.pack("<II", self.tag, self.bytes_len)
-
-        @classmethod
-        def unpack(cls, buffer):
-            (tag, bytes_len) = struct.unpack("<II", buffer.read(8))
-            return cls(tag=tag, bytes_len=bytes_len)
+class ZigTestServer:
+    """A long-lived Zig test runner, serving any number of test runs until it crashes or the session ends.
+
+    Spawning a test binary costs a process launch and a version handshake, so we keep one server per binary.
+    """
+
+    _servers: dict[str, "ZigTestServer"] = {}
+
+    def __init__(self, test_bin):
+        self.test_bin = test_bin
+        self._stderr = tempfile.TemporaryFile()
+        self._stderr_offset = 0
+        self._proc = subprocess.Popen(
+            [test_bin, "--listen=-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+            env={**os.environ, BENCH_ENV: "1"},
+        )
+
+        # Zig first sends us its version.
+        h = TestProtocol.Header.unpack(self._proc.stdout)
+        assert h.tag == TestProtocol.ResponseTag.zig_version.value
+        self.zig_version = self._proc.stdout.read(h.bytes_len).decode("utf-8")
+
+    @classmethod
+    def get(cls, test_bin):
+        """Returns the running server for the test binary, starting a new one if needed."""
+        test_bin = str(test_bin)
+        server = cls._servers.get(test_bin)
+        if server is None or server._proc.poll() is not None:
+            if server is not None:
+                server.close()
+            server = cls._servers[test_bin] = cls(test_bin)
+        return server
+
+    @classmethod
+    def close_all(cls):
+        for server in list(cls._servers.values()):
+            server.close()
+
+    def query_test_metadata(self):
+        self._send(TestProtocol.RequestTag.query_test_metadata)
+        h = TestProtocol.Header.unpack(self._proc.stdout)
+        assert h.tag == TestProtocol.ResponseTag.test_metadata.value
+        return self._proc.stdout.read(h.bytes_len)
+
+    def run_test(self, idx):
+        """Run a single test, returning its result flags and the stderr it wrote."""
+        self._send(TestProtocol.RequestTag.run_test, struct.pack("<I", idx))
+        h = TestProtocol.Header.unpack(self._proc.stdout)
+        assert h.tag == TestProtocol.ResponseTag.test_results.value
+        _test_idx, flags = struct.unpack("<II", self._proc.stdout.read(8))
+        return flags, self.read_stderr()
+
+    def read_stderr(self):
+        """Read the stderr written since the last read."""
+        self._stderr.seek(self._stderr_offset)
+        data = self._stderr.read()
+        self._stderr_offset += len(data)
+        return data.decode("utf-8", errors="replace")
+
+    def close(self):
+        """Shut down the server, returning its exit code."""
+        if self._servers.get(self.test_bin) is self:
+            del self._servers[self.test_bin]
+        try:
+            if self._proc.poll() is None:
+                self._send(TestProtocol.RequestTag.exit)
+                self._proc.wait(timeout=5)
+            self._proc.stdin.close()
+        except (OSError, subprocess.TimeoutExpired):
+            # A crashed server may leave a broken pipe behind.
+            self._proc.kill()
+        self._proc.stdout.close()
+        self._stderr.close()
+        return self._proc.wait()
+
+    def _send(self, tag, body=b""):
+        self._proc.stdin.write(TestProtocol.Header(tag=tag.value, bytes_len=len(body)).pack())
+        self._proc.stdin.write(body)
+        self._proc.stdin.flush()
@@ -0,0 +1,165 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Native micro-benchmarks, run from Zig tests and reported by the Pydust pytest plugin.
+const builtin = @import("builtin");
+const std = @import("std");
+const Allocator = std.mem.Allocator;
+
+pub const BenchOptions = struct {
+    /// The number of timed repetitions, at least two.
+    repeat: u32 = 20,
+    /// The minimum duration of a repetition, used to calibrate the number of loops.
+    min_time_ns: u64 = 10 * std.time.ns_per_ms,
+};
+
+/// The prefix of the stderr line carrying the results of a benchmark to the pytest plugin.
+const result_prefix = "pydust-bench: ";
+
+/// Set by the pytest plugin for its test runners. Without it, benchmarks are skipped, e.g. by `zig build test`.
+const bench_env = "PYDUST_BENCH";
+
+/// Benchmark a function from a Zig test, e.g. `try py.bench(sum, .{ .n = 1000 }, .{});`.
+///
+/// The function is called with an allocator wrapping `std.testing.allocator` and the given args. Like the Python
+/// benchmark runner, we calibrate the number of loops so each repetition takes at least `min_time_ns`, then time
+/// each repetition. The time and the number of allocations per call are reported to the pytest plugin, which only runs
+/// benchmarks when they are selected. The test is skipped when run any other way.
+pub fn bench(comptime func: anytype, args: anytype, comptime options: BenchOptions) !void {
+    if (!builtin.is_test) {
+        @compileError("py.bench can only be called from Zig tests");
+    }
+    if (options.repeat < 2) {
+        // The comparison against a baseline needs the variance of the samples.
+        @compileError("Benchmarks must have at least two repetitions");
+    }
+
+    if (!std.process.hasEnvVarConstant(bench_env)) {
+        return error.SkipZigTest;
+    }
+
+    var counting = CountingAllocator{ .child = std.testing.allocator };
+    const allocator = counting.allocator();
+
+    var loops: u64 = 1;
+    while (try timeLoops(func, allocator, args, loops) < options.min_time_ns) {
+        loops *= 2;
+    }
+
+    // Warm up caches and any lazily initialized state before sampling.
+    _ = try timeLoops(func, allocator, args, loops);
+
+    counting.reset();
+    var samples: [options.repeat]f64 = undefined;
+    for (&samples) |*sample| {
+        sample.* = @as(f64, @floatFromInt(try timeLoops(func, allocator, args, loops))) / @as(f64, @floatFromInt(loops));
+    }
+
+    const calls: f64 = @floatFromInt(loops * options.repeat);
+    try report(.{
+        .loops = loops,
+        .samples = samples,
+        .allocations = @as(f64, @floatFromInt(counting.allocations)) / calls,
+        .allocated_bytes = @as(f64, @floatFromInt(counting.allocated_bytes)) / calls,
+    });
+}
+
+fn timeLoops(comptime func: anytype, allocator: Allocator, args: anytype, loops: u64) !u64 {
+    var timer = try std.time.Timer.start();
+    var i: u64 = 0;
+    while (i < loops) : (i += 1) {
+        const result = func(allocator, args);
+        if (@typeInfo(@TypeOf(result)) == .ErrorUnion) {
+            std.mem.doNotOptimizeAway(try result);
+        } else {
+            std.mem.doNotOptimizeAway(result);
+        }
+    }
+    return timer.read();
+}
+
+/// Write the results as a single JSON line to stderr, which the pytest plugin captures for each test.
+fn report(results: anytype) !void {
+    std.debug.getStderrMutex().lock();
+    defer std.debug.getStderrMutex().unlock();
+
+    const stderr = std.io.getStdErr().writer();
+    try stderr.writeAll(result_prefix);
+    try std.json.stringify(results, .{}, stderr);
+    try stderr.writeByte('\n');
+}
+
+/// Counts the allocations made by the benchmarked function. Leaks are still detected by the child allocator.
+const CountingAllocator = struct {
+    const Self = @This();
+
+    child: Allocator,
+    allocations: u64 = 0,
+    allocated_bytes: u64 = 0,
+
+    fn allocator(self: *Self) Allocator {
+        return .{
+            .ptr = self,
+            .vtable = &.{
+                .alloc = alloc,
+                .resize = resize,
+                .free = free,
+            },
+        };
+    }
+
+    fn reset(self: *Self) void {
+        self.allocations = 0;
+        self.allocated_bytes = 0;
+    }
+
+    fn alloc(ctx: *anyopaque, len: usize, ptr_align: u8, ret_addr: usize) ?[*]u8 {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        const ptr = self.child.rawAlloc(len, ptr_align, ret_addr) orelse return null;
+        self.allocations += 1;
+        self.allocated_bytes += len;
+        return ptr;
+    }
+
+    fn resize(ctx: *anyopaque, buf: []u8, buf_align: u8, new_len: usize, ret_addr: usize) bool {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        if (!self.child.rawResize(buf, buf_align, new_len, ret_addr)) {
+            return false;
+        }
+        if (new_len > buf.len) {
+            self.allocated_bytes += new_len - buf.len;
+        }
+        return true;
+    }
+
+    fn free(ctx: *anyopaque, buf: []u8, buf_align: u8, ret_addr: usize) void {
+        const self: *Self = @ptrCast(@alignCast(ctx));
+        self.child.rawFree(buf, buf_align, ret_addr);
+    }
+};
+
+test "CountingAllocator" {
+    if (!std.process.hasEnvVarConstant(bench_env)) {
+        return error.SkipZigTest;
+    }
+
+    var counting = CountingAllocator{ .child = std.testing.allocator };
+    const allocator = counting.allocator();
+
+    const buf = try allocator.alloc(u8, 16);
+    defer allocator.free(buf);
+    const other = try allocator.alloc(u8, 8);
+    allocator.free(other);
+
+    try std.testing.expectEqual(@as(u64, 2), counting.allocations);
+    try std.testing.expectEqual(@as(u64, 24), counting.allocated_bytes);
+}
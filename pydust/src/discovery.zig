@@ -24,6 +24,12 @@ const Definition = struct {
 
 const DefinitionType = enum { module, class, attribute, property };
 
+/// Captures the cache of a memoized function.
+const Memoized = struct {
+    function: *anyopaque,
+    cache: type,
+};
+
 /// Captures the name of and relationships between Pydust objects.
 const Identifier = struct {
     name: [:0]const u8,
@@ -32,29 +38,75 @@ const Identifier = struct {
     parent: type,
 };
 
-pub const State = blk: {
-    comptime var privateMethods: [1000]*anyopaque = undefined;
-    comptime var privateMethodsSize: usize = 0;
+/// The discovery state of a single type or function, keyed by the type or function itself. Since the comptime calls
+/// of a generic function are memoized, every lookup of the same key resolves to the same storage without scanning.
+fn Entry(comptime key: anytype) type {
+    comptime var definition: ?Definition = null;
+    comptime var identifier: ?Identifier = null;
+    comptime var private: bool = false;
+    comptime var memoizedCache: ?type = null;
+
+    _ = key;
+    return struct {
+        fn getDefinition() ?Definition {
+            return definition;
+        }
 
-    comptime var definitions: [1000]Definition = undefined;
-    comptime var definitionsSize: usize = 0;
+        fn setDefinition(comptime value: Definition) void {
+            definition = value;
+        }
 
-    comptime var identifiers: [1000]Identifier = undefined;
-    comptime var identifiersSize: usize = 0;
+        fn getIdentifier() ?Identifier {
+            return identifier;
+        }
+
+        fn setIdentifier(comptime value: Identifier) void {
+            identifier = value;
+        }
+
+        fn isPrivate() bool {
+            return private;
+        }
+
+        fn setPrivate() void {
+            private = true;
+        }
+
+        fn getMemoized() ?type {
+            return memoizedCache;
+        }
+
+        fn setMemoized(comptime cache: type) void {
+            memoizedCache = cache;
+        }
+    };
+}
+
+fn fnKey(comptime fnPtr: anytype) *anyopaque {
+    return @constCast(@ptrCast(fnPtr));
+}
+
+pub const State = blk: {
+    comptime var definitionsSize: usize = 0;
 
     break :blk struct {
         pub fn register(
             comptime definition: type,
             comptime deftype: DefinitionType,
         ) void {
-            definitions[definitionsSize] = .{ .definition = definition, .type = deftype };
-            definitionsSize += 1;
+            // The first registration wins, matching the order objects are discovered in.
+            if (Entry(definition).getDefinition() == null) {
+                Entry(definition).setDefinition(.{ .definition = definition, .type = deftype });
+                definitionsSize += 1;
+            }
         }
 
         pub fn privateMethod(comptime fnPtr: anytype) void {
-            const castPtr: *anyopaque = @constCast(@ptrCast(fnPtr));
-            privateMethods[privateMethodsSize] = castPtr;
-            privateMethodsSize += 1;
+            Entry(fnKey(fnPtr)).setPrivate();
+        }
+
+        pub fn memoized(comptime fnPtr: anytype, comptime cache: type) void {
+            Entry(fnKey(fnPtr)).setMemoized(cache);
         }
 
         pub fn identify(
@@ -62,23 +114,22 @@ pub const State = blk: {
             comptime name: [:0]const u8,
             comptime parent: type,
         ) void {
-            identifiers[identifiersSize] = .{
+            // Definitions exported under several names, such as aliases, keep the name they were first found under.
+            if (Entry(definition).getIdentifier() != null) {
+                return;
+            }
+            Entry(definition).setIdentifier(.{
                 .name = name,
                 .qualifiedName = if (parent == definition) &.{name} else getIdentifier(parent).qualifiedName ++ .{name},
                 .definition = definition,
                 .parent = parent,
-            };
-            identifiersSize += 1;
+            });
         }
 
         pub fn isEmpty() bool {
             return definitionsSize == 0;
         }
 
-        pub fn getDefinitions() []Definition {
-            return definitions[0..definitionsSize];
-        }
-
         pub fn countDeclsWithType(comptime definition: type, deftype: DefinitionType) usize {
             var cnt = 0;
             for (@typeInfo(definition).Struct.decls) |decl| {
@@ -107,14 +158,13 @@ pub const State = blk: {
             return false;
         }
 
-        pub fn isPrivate(fnPtr: anytype) bool {
-            const castPtr: *anyopaque = @constCast(@ptrCast(fnPtr));
-            for (privateMethods[0..privateMethodsSize]) |methPtr| {
-                if (castPtr == methPtr) {
-                    return true;
-                }
-            }
-            return false;
+        pub fn isPrivate(comptime fnPtr: anytype) bool {
+            return Entry(fnKey(fnPtr)).isPrivate();
+        }
+
+        /// Returns the cache of a function created with py.memoize, if any.
+        pub fn findMemoized(comptime fnPtr: anytype) ?type {
+            return Entry(fnKey(fnPtr)).getMemoized();
         }
 
         pub fn getDefinition(comptime definition: type) Definition {
@@ -128,12 +178,7 @@ pub const State = blk: {
             if (@typeInfo(definition) != .Struct) {
                 return null;
             }
-            for (definitions[0..definitionsSize]) |def| {
-                if (def.definition == definition) {
-                    return def;
-                }
-            }
-            return null;
+            return Entry(definition).getDefinition();
         }
 
         pub fn getIdentifier(comptime definition: type) Identifier {
@@ -144,37 +189,23 @@ pub const State = blk: {
             if (@typeInfo(definition) != .Struct) {
                 return null;
             }
-            for (identifiers[0..identifiersSize]) |idef| {
-                if (idef.definition == definition) {
-                    return idef;
-                }
-            }
-            return null;
+            return Entry(definition).getIdentifier();
         }
 
         pub fn getContaining(comptime definition: type, comptime deftype: DefinitionType) type {
             return findContaining(definition, deftype) orelse @compileError("Cannot find containing object");
         }
 
-        /// Find the nearest containing definition with the given deftype.
+        /// Find the nearest containing definition with the given deftype, following the parents of the identifiers.
         pub fn findContaining(comptime definition: type, comptime deftype: DefinitionType) ?type {
-            const defs = definitions[0..definitionsSize];
-            var idx = defs.len;
-            var foundOriginal = false;
-            while (idx > 0) : (idx -= 1) {
-                const def = defs[idx - 1];
-
-                if (def.definition == definition) {
-                    // Only once we found the original definition, should we check for deftype.
-                    foundOriginal = true;
-                    continue;
-                }
-
-                if (foundOriginal and def.type == deftype) {
-                    return def.definition;
-                }
+            const id = findIdentifier(definition) orelse return null;
+            if (id.parent == definition) {
+                return null;
+            }
+            if (getDefinition(id.parent).type == deftype) {
+                return id.parent;
             }
-            return null;
+            return findContaining(id.parent, deftype);
         }
     };
 };
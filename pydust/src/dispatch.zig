@@ -0,0 +1,168 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Runtime dispatch between CPU-specific builds of a module, configured with the `cpu_variants` option.
+///
+/// The module built for the baseline CPU is installed as usual. Each variant is the same module built for an x86-64
+/// micro-architecture level, e.g. `example/hello.x86_64_v3.abi3.so`. When the baseline module is imported, its init
+/// function checks the CPU with CPUID and hands over to the init function of the best supported variant.
+const builtin = @import("builtin");
+const std = @import("std");
+const py = @import("pydust.zig");
+const ffi = py.ffi;
+const pyconf = @import("pyconf");
+
+/// The variants of this module, only ever set for the baseline build.
+pub const variants: []const []const u8 = if (@hasDecl(pyconf, "cpu_variants")) pyconf.cpu_variants else &.{};
+
+pub const enabled = builtin.cpu.arch == .x86_64 and variants.len > 0;
+
+pub const InitFn = *const fn () callconv(.C) ?*ffi.PyObject;
+
+const DlInfo = extern struct {
+    dli_fname: ?[*:0]const u8,
+    dli_fbase: ?*anyopaque,
+    dli_sname: ?[*:0]const u8,
+    dli_saddr: ?*anyopaque,
+};
+
+extern "c" fn dladdr(addr: *const anyopaque, info: *DlInfo) c_int;
+extern "c" fn dlopen(path: [*:0]const u8, mode: c_int) ?*anyopaque;
+extern "c" fn dlsym(handle: ?*anyopaque, symbol: [*:0]const u8) ?*anyopaque;
+extern "c" fn dlerror() ?[*:0]const u8;
+
+const RTLD_NOW = 2;
+const RTLD_LOCAL = if (builtin.os.tag.isDarwin()) 4 else 0;
+
+/// Returns the init function of the best variant supported by the CPU, or null if the baseline module should be
+/// initialized instead. The baseline init function is used to locate the installed module.
+pub fn load(comptime short_name: []const u8, baseline: InitFn) py.PyError!?InitFn {
+    const variant = best(cpuLevel()) orelse return null;
+
+    var info: DlInfo = undefined;
+    if (dladdr(@ptrCast(baseline), &info) == 0 or info.dli_fname == null) {
+        return py.ImportError.raise("failed to locate the module binary");
+    }
+
+    // The variant sits next to the binary and only differs in its name, e.g. hello.abi3.so => hello.x86_64_v3.abi3.so
+    // The binary is not named after the module when it is a bundle of several modules.
+    const path = std.mem.span(info.dli_fname.?);
+    const stemEnd = std.mem.indexOfScalarPos(u8, path, path.len - std.fs.path.basename(path).len, '.') orelse path.len;
+    const variantPath = try std.fmt.allocPrintZ(py.allocator, "{s}.{s}{s}", .{ path[0..stemEnd], variant, path[stemEnd..] });
+    defer py.allocator.free(variantPath);
+
+    // The handle is never closed, since the module lives as long as the interpreter.
+    const handle = dlopen(variantPath, RTLD_NOW | RTLD_LOCAL) orelse {
+        return py.ImportError.raiseFmt("failed to load CPU variant {s}: {s}", .{ variantPath, dlerror() orelse "unknown error" });
+    };
+    const init = dlsym(handle, "PyInit_" ++ short_name) orelse {
+        return py.ImportError.raiseFmt("CPU variant {s} does not export PyInit_" ++ short_name, .{variantPath});
+    };
+    return @ptrCast(init);
+}
+
+/// Returns the variant with the highest level supported by the CPU, if any.
+fn best(level: u8) ?[]const u8 {
+    var result: ?[]const u8 = null;
+    var resultLevel: u8 = 1;
+    inline for (variants) |variant| {
+        const candidate = comptime variantLevel(variant);
+        if (candidate <= level and candidate > resultLevel) {
+            result = variant;
+            resultLevel = candidate;
+        }
+    }
+    return result;
+}
+
+fn variantLevel(comptime variant: []const u8) u8 {
+    inline for (.{ .{ "x86_64_v2", 2 }, .{ "x86_64_v3", 3 }, .{ "x86_64_v4", 4 } }) |entry| {
+        if (std.mem.eql(u8, variant, entry[0])) {
+            return entry[1];
+        }
+    }
+    @compileError("Unsupported CPU variant " ++ variant ++ ", expected one of x86_64_v2, x86_64_v3 or x86_64_v4");
+}
+
+/// Returns the x86-64 micro-architecture level supported by the CPU and the OS, as defined by the x86-64 psABI.
+fn cpuLevel() u8 {
+    const max = cpuid(0, 0).eax;
+    const maxExtended = cpuid(0x8000_0000, 0).eax;
+    if (max < 1 or maxExtended < 0x8000_0001) {
+        return 1;
+    }
+
+    const leaf1 = cpuid(1, 0);
+    const extended = cpuid(0x8000_0001, 0);
+
+    // x86-64-v2: CMPXCHG16B, LAHF-SAHF, POPCNT, SSE3, SSE4.1, SSE4.2 and SSSE3.
+    const v2 = bits(leaf1.ecx, &.{ 0, 9, 13, 19, 20, 23 }) and bits(extended.ecx, &.{0});
+    if (!v2) return 1;
+
+    // x86-64-v3 additionally requires the OS to save the AVX registers, which it signals with OSXSAVE.
+    if (max < 7 or !bits(leaf1.ecx, &.{ 26, 27 })) return 2;
+    const leaf7 = cpuid(7, 0);
+    const xcr0 = xgetbv();
+
+    // AVX, AVX2, BMI1, BMI2, F16C, FMA, LZCNT, MOVBE and XSAVE.
+    const v3 = bits(leaf1.ecx, &.{ 12, 22, 28, 29 }) and bits(leaf7.ebx, &.{ 3, 5, 8 }) and bits(extended.ecx, &.{5}) and xcr0 & 0x6 == 0x6;
+    if (!v3) return 2;
+
+    // AVX512F, AVX512BW, AVX512CD, AVX512DQ and AVX512VL, with the OS saving the opmask and ZMM registers.
+    const v4 = bits(leaf7.ebx, &.{ 16, 17, 28, 30, 31 }) and xcr0 & 0xe6 == 0xe6;
+    return if (v4) 4 else 3;
+}
+
+fn bits(value: u32, comptime positions: []const u5) bool {
+    inline for (positions) |position| {
+        if (value & (@as(u32, 1) << position) == 0) return false;
+    }
+    return true;
+}
+
+const CpuidLeaf = struct { eax: u32, ebx: u32, ecx: u32, edx: u32 };
+
+fn cpuid(leaf: u32, subleaf: u32) CpuidLeaf {
+    var eax: u32 = undefined;
+    var ebx: u32 = undefined;
+    var ecx: u32 = undefined;
+    var edx: u32 = undefined;
+    asm volatile ("cpuid"
+        : [_] "={eax}" (eax),
+          [_] "={ebx}" (ebx),
+          [_] "={ecx}" (ecx),
+          [_] "={edx}" (edx),
+        : [_] "{eax}" (leaf),
+          [_] "{ecx}" (subleaf),
+    );
+    return .{ .eax = eax, .ebx = ebx, .ecx = ecx, .edx = edx };
+}
+
+/// Returns the low half of XCR0, the register state saved by the OS.
+fn xgetbv() u32 {
+    return asm volatile ("xgetbv"
+        : [_] "={eax}" (-> u32),
+        : [_] "{ecx}" (@as(u32, 0)),
+        : "edx"
+    );
+}
+
+test "cpuLevel" {
+    if (builtin.cpu.arch != .x86_64) return error.SkipZigTest;
+    // Tests are built for the host CPU, so the compiler's view of its features must agree with ours.
+    const level = cpuLevel();
+    const features = builtin.cpu.features;
+    if (std.Target.x86.featureSetHas(features, .avx2)) {
+        try std.testing.expect(level >= 3);
+    }
+    try std.testing.expect(level >= 1 and level <= 4);
+}
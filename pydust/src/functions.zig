@@ -16,6 +16,8 @@ const py = @import("pydust.zig");
 const tramp = @import("trampoline.zig");
 const State = @import("discovery.zig").State;
 const PyError = @import("errors.zig").PyError;
+const stats = @import("stats.zig");
+const probes = @import("probes.zig");
 const Type = std.builtin.Type;
 
 const MethodType = enum { STATIC, CLASS, INSTANCE };
@@ -36,7 +38,7 @@ pub const Signature = struct {
 
     pub fn isModuleMethod(comptime self: @This()) bool {
         if (self.selfParam) |Self| {
-            return State.getDefinition(@typeInfo(Self).Pointer.child).type == .module;
+            return Self == py.PyModule or State.getDefinition(@typeInfo(Self).Pointer.child).type == .module;
         }
         return false;
     }
@@ -80,7 +82,6 @@ pub const BinaryOperators = std.ComptimeStringMap(c_int, .{
     .{ "__ifloordiv__", ffi.Py_nb_inplace_floor_divide },
     .{ "__matmul__", ffi.Py_nb_matrix_multiply },
     .{ "__imatmul__", ffi.Py_nb_inplace_matrix_multiply },
-    .{ "__getitem__", ffi.Py_mp_subscript },
     .{ "__getattr__", ffi.Py_tp_getattro },
 });
 
@@ -105,7 +106,10 @@ pub const compareFuncs = .{
 const reservedNames = .{
     "__bool__",
     "__buffer__",
+    "__contains__",
     "__del__",
+    "__delitem__",
+    "__getitem__",
     "__hash__",
     "__init__",
     "__iter__",
@@ -115,6 +119,7 @@ const reservedNames = .{
     "__release_buffer__",
     "__repr__",
     "__richcompare__",
+    "__setitem__",
     "__str__",
 } ++ compareFuncs ++ keys(BinaryOperators) ++ keys(UnaryOperators);
 
@@ -194,7 +199,7 @@ pub fn varKwargsIdx(comptime ArgsParam: type) ?usize {
     return null;
 }
 
-fn isReserved(comptime name: []const u8) bool {
+pub fn isReserved(comptime name: []const u8) bool {
     @setEvalBranchQuota(10000);
     for (reservedNames) |reserved| {
         if (std.mem.eql(u8, name, reserved)) {
@@ -238,6 +243,10 @@ pub fn wrap(comptime definition: type, comptime func: anytype, comptime sig: Sig
     return struct {
         const doc = textSignature(sig);
 
+        comptime {
+            probes.symbol(definition, sig.name, if (sig.supportsKwargs()) fastcallKwargs else fastcall);
+        }
+
         /// Return a PyMethodDef for this wrapped function.
         pub fn aspy() ffi.PyMethodDef {
             return .{
@@ -267,21 +276,27 @@ pub fn wrap(comptime definition: type, comptime func: anytype, comptime sig: Sig
             pyargs: [*]ffi.PyObject,
             nargs: ffi.Py_ssize_t,
         ) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.startConverting(definition, sig.name);
+            defer timer.finish();
+
             const resultObject = internal(
                 .{ .py = pyself },
                 @as([*]py.PyObject, @ptrCast(pyargs))[0..@intCast(nargs)],
+                &timer,
             ) catch return null;
             return resultObject.py;
         }
 
-        inline fn internal(pyself: py.PyObject, pyargs: []py.PyObject) PyError!py.PyObject {
+        inline fn internal(pyself: py.PyObject, pyargs: []py.PyObject, timer: *stats.Timer) PyError!py.PyObject {
             const self = if (sig.selfParam) |Self| try castSelf(Self, pyself) else null;
 
             if (sig.argsParam) |Args| {
                 const args = try unwrapArgs(Args, pyargs, py.Kwargs.init(py.allocator));
+                timer.converted();
                 const result = if (sig.selfParam) |_| func(self, args) else func(args);
                 return py.createOwned(tramp.coerceError(result));
             } else {
+                timer.converted();
                 const result = if (sig.selfParam) |_| func(self) else func();
                 return py.createOwned(tramp.coerceError(result));
             }
@@ -293,6 +308,9 @@ pub fn wrap(comptime definition: type, comptime func: anytype, comptime sig: Sig
             nargs: ffi.Py_ssize_t,
             kwnames: ?*ffi.PyObject,
         ) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.startConverting(definition, sig.name);
+            defer timer.finish();
+
             const allArgs: [*]py.PyObject = @ptrCast(pyargs);
             const args = allArgs[0..@intCast(nargs)];
 
@@ -311,7 +329,7 @@ pub fn wrap(comptime definition: type, comptime func: anytype, comptime sig: Sig
                 }
             }
 
-            const resultObject = internalKwargs(.{ .py = pyself }, args, kwargsMap) catch return null;
+            const resultObject = internalKwargs(.{ .py = pyself }, args, kwargsMap, &timer) catch return null;
             return resultObject.py;
         }
 
@@ -319,15 +337,19 @@ pub fn wrap(comptime definition: type, comptime func: anytype, comptime sig: Sig
             pyself: py.PyObject,
             pyargs: py.Args,
             pykwargs: py.Kwargs,
+            timer: *stats.Timer,
         ) PyError!py.PyObject {
             const args = try unwrapArgs(sig.argsParam.?, pyargs, pykwargs);
             const self = if (sig.selfParam) |Self| try castSelf(Self, pyself) else null;
+            timer.converted();
             const result = if (sig.selfParam) |_| func(self, args) else func(args);
             return py.createOwned(tramp.coerceError(result));
         }
 
         inline fn castSelf(comptime Self: type, pyself: py.PyObject) !Self {
-            if (comptime sig.isModuleMethod()) {
+            if (comptime Self == py.PyModule) {
+                return .{ .obj = pyself };
+            } else if (comptime sig.isModuleMethod()) {
                 const mod = py.PyModule{ .obj = pyself };
                 return try mod.getState(@typeInfo(Self).Pointer.child);
             } else {
@@ -399,7 +421,8 @@ pub fn Methods(comptime definition: type) type {
                 if (typeInfo != .Fn or isReserved(decl.name) or State.isPrivate(&value)) {
                     continue;
                 }
-                mc += 1;
+                // Memoized functions also expose cache_info and cache_clear functions.
+                mc += if (State.findMemoized(&value) != null) 3 else 1;
             }
             break :b mc;
         };
@@ -421,6 +444,15 @@ pub fn Methods(comptime definition: type) type {
                 const sig = parseSignature(decl.name, typeInfo.Fn, &.{ py.PyObject, *definition, *const definition });
                 defs[idx] = wrap(definition, value, sig, 0).aspy();
                 idx += 1;
+
+                if (State.findMemoized(&value)) |Cache| {
+                    inline for (.{ "cache_info", "cache_clear" }) |suffix| {
+                        const cacheFunc = @field(Cache, suffix);
+                        const cacheSig = parseSignature(decl.name ++ "_" ++ suffix, @typeInfo(@TypeOf(cacheFunc)).Fn, &.{py.PyModule});
+                        defs[idx] = wrap(definition, cacheFunc, cacheSig, 0).aspy();
+                        idx += 1;
+                    }
+                }
             }
 
             break :blk defs;
@@ -428,6 +460,24 @@ pub fn Methods(comptime definition: type) type {
     };
 }
 
+/// Append extra method definitions, such as the instrumentation functions of the root module, to a list of method definitions.
+pub fn ExtendedMethods(comptime methoddefs: anytype, comptime extra: []const ffi.PyMethodDef) type {
+    const empty = ffi.PyMethodDef{ .ml_name = null, .ml_meth = null, .ml_flags = 0, .ml_doc = null };
+
+    return struct {
+        pub const pydefs: [methoddefs.len + extra.len:empty]ffi.PyMethodDef = blk: {
+            var defs: [methoddefs.len + extra.len:empty]ffi.PyMethodDef = undefined;
+            for (methoddefs, 0..) |def, i| {
+                defs[i] = def;
+            }
+            for (extra, 0..) |def, i| {
+                defs[methoddefs.len + i] = def;
+            }
+            break :blk defs;
+        };
+    };
+}
+
 /// Generate minimal function docstring to populate __text_signature__ function field.
 /// Format is `funcName($self, arg0Name...)\n--\n\n`.
 /// Self arg can be named however but must start with `$`
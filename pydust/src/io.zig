@@ -0,0 +1,320 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Zig std.io readers and writers over Python binary file objects.
+const std = @import("std");
+const py = @import("pydust.zig");
+const ffi = py.ffi;
+const PyError = @import("errors.zig").PyError;
+
+pub const FileOptions = struct {
+    /// The size of the Zig buffer used to batch calls into the Python file object.
+    buffer_size: usize = 64 * 1024,
+    /// Read or write the file's descriptor directly, without the GIL, when it has one.
+    /// The Python file object must not be used until the reader or writer is deinitialized.
+    /// Buffered streams that cannot seek, e.g. over a pipe, are read with readinto instead, since the descriptor is
+    /// past the bytes the Python object has buffered.
+    direct: bool = false,
+};
+
+/// A std.io.Reader over any Python binary stream, e.g. io.BytesIO or an open file.
+///
+/// Chunks are read with `readinto` into a single Zig buffer exposed as a reused memoryview,
+/// so reading does not allocate a new bytes object per chunk.
+pub const FileReader = struct {
+    const Self = @This();
+
+    pub const Error = PyError;
+    pub const Reader = std.io.Reader(*Self, Error, read);
+
+    buffer: []u8,
+    start: usize = 0,
+    end: usize = 0,
+
+    // The bound readinto method and its (memoryview,) arguments, created once and reused for every chunk.
+    readinto: ?py.PyObject = null,
+    args: ?py.PyTuple = null,
+
+    direct: ?std.fs.File = null,
+    // The seekable file object read directly, whose position is moved to the end of the bytes read on deinit.
+    seekable: ?py.PyObject = null,
+
+    pub fn init(file: py.PyObject, options: FileOptions) !Self {
+        const buffer = try py.allocator.alloc(u8, options.buffer_size);
+        errdefer py.allocator.free(buffer);
+
+        if (options.direct) {
+            if (try fileno(file)) |fd| {
+                const direct = std.fs.File{ .handle = fd };
+                if (try file.call0(bool, "seekable")) {
+                    // Buffered Python readers may have read ahead of the logical position, so we seek the
+                    // descriptor back to where the Python object thinks it is.
+                    const pos = try file.call0(u64, "tell");
+                    direct.seekTo(pos) catch |err| return py.OSError.raise(@errorName(err));
+                    file.incref();
+                    return .{ .buffer = buffer, .direct = direct, .seekable = file };
+                }
+                // Raw streams, e.g. a socket's makefile with buffering=0, never read ahead of the descriptor.
+                if (try isRaw(file)) {
+                    return .{ .buffer = buffer, .direct = direct };
+                }
+            }
+        }
+
+        const readinto = try file.get("readinto");
+        errdefer readinto.decref();
+
+        const args = try py.PyTuple.new(1);
+        errdefer args.decref();
+        try args.setOwnedItem(0, try py.PyMemoryView.fromSlice(buffer));
+
+        return .{ .buffer = buffer, .readinto = readinto, .args = args };
+    }
+
+    /// Release the Python objects and free the buffer. If the file object still exports the memoryview over the
+    /// buffer, e.g. through an array created in readinto, the buffer is leaked rather than freed under Python.
+    ///
+    /// A seekable file read directly is moved to just after the bytes returned by the reader, so the Python object
+    /// can carry on reading from there. Bytes buffered from an unseekable raw stream are discarded.
+    pub fn deinit(self: *Self) void {
+        if (self.seekable) |file| {
+            self.restorePosition(file) catch ffi.PyErr_WriteUnraisable(file.py);
+            file.decref();
+        }
+        if (self.readinto) |readinto| readinto.decref();
+        if (self.args) |args| {
+            defer args.decref();
+            // The file object may have kept the memoryview, so we release it before freeing the memory it views.
+            const view = args.getItem(py.PyObject, 0) catch unreachable;
+            const released = view.call0(py.PyObject, "release") catch {
+                ffi.PyErr_WriteUnraisable(view.py);
+                return;
+            };
+            released.decref();
+        }
+        py.allocator.free(self.buffer);
+    }
+
+    pub fn reader(self: *Self) Reader {
+        return .{ .context = self };
+    }
+
+    fn restorePosition(self: *Self, file: py.PyObject) !void {
+        const pos = self.direct.?.getPos() catch |err| return py.OSError.raise(@errorName(err));
+        // The Python object may still buffer bytes from before we read the descriptor, and seeking within them would
+        // keep them along with its stale descriptor position, so we first seek to the end to discard them.
+        const end = try file.call(py.PyObject, "seek", .{ 0, 2 }, .{});
+        end.decref();
+        const result = try file.call(py.PyObject, "seek", .{pos - (self.end - self.start)}, .{});
+        result.decref();
+    }
+
+    pub fn read(self: *Self, dest: []u8) Error!usize {
+        if (self.start == self.end) {
+            self.start = 0;
+            self.end = try self.fill();
+        }
+        const n = @min(dest.len, self.end - self.start);
+        @memcpy(dest[0..n], self.buffer[self.start .. self.start + n]);
+        self.start += n;
+        return n;
+    }
+
+    fn fill(self: *Self) Error!usize {
+        if (self.direct) |direct| {
+            const nogil = py.nogil();
+            defer nogil.acquire();
+            return direct.read(self.buffer) catch |err| return py.OSError.raise(@errorName(err));
+        }
+
+        const result = ffi.PyObject_Call(self.readinto.?.py, self.args.?.obj.py, null) orelse return PyError.PyRaised;
+        const resultObj = py.PyObject{ .py = result };
+        defer resultObj.decref();
+
+        if (py.is_none(resultObj)) {
+            return py.BlockingIOError.raise("readinto returned None for a non-blocking stream");
+        }
+        return py.as(usize, resultObj);
+    }
+};
+
+/// A buffered std.io.Writer over any Python binary stream. Call flush before deinit, since deinit discards any
+/// bytes still buffered, e.g. after a write raised an exception.
+pub const FileWriter = struct {
+    const Self = @This();
+
+    pub const Error = PyError;
+    pub const Writer = std.io.Writer(*Self, Error, write);
+
+    buffer: []u8,
+    len: usize = 0,
+
+    write_: ?py.PyObject = null,
+    direct: ?std.fs.File = null,
+
+    pub fn init(file: py.PyObject, options: FileOptions) !Self {
+        const buffer = try py.allocator.alloc(u8, options.buffer_size);
+        errdefer py.allocator.free(buffer);
+
+        if (options.direct) {
+            if (try fileno(file)) |fd| {
+                // Push any data buffered by the Python object to the descriptor before we write to it.
+                const flushed = try file.call0(py.PyObject, "flush");
+                flushed.decref();
+                return .{ .buffer = buffer, .direct = .{ .handle = fd } };
+            }
+        }
+
+        return .{ .buffer = buffer, .write_ = try file.get("write") };
+    }
+
+    pub fn deinit(self: *Self) void {
+        if (self.write_) |w| w.decref();
+        py.allocator.free(self.buffer);
+    }
+
+    pub fn writer(self: *Self) Writer {
+        return .{ .context = self };
+    }
+
+    pub fn write(self: *Self, bytes: []const u8) Error!usize {
+        if (self.len + bytes.len > self.buffer.len) {
+            try self.flush();
+            // Large writes bypass the buffer entirely.
+            if (bytes.len > self.buffer.len) {
+                try self.writeAll(bytes);
+                return bytes.len;
+            }
+        }
+        @memcpy(self.buffer[self.len .. self.len + bytes.len], bytes);
+        self.len += bytes.len;
+        return bytes.len;
+    }
+
+    /// Write any buffered bytes to the Python file object.
+    pub fn flush(self: *Self) Error!void {
+        try self.writeAll(self.buffer[0..self.len]);
+        self.len = 0;
+    }
+
+    fn writeAll(self: *Self, bytes: []const u8) Error!void {
+        if (bytes.len == 0) return;
+
+        if (self.direct) |direct| {
+            const nogil = py.nogil();
+            defer nogil.acquire();
+            return direct.writeAll(bytes) catch |err| return py.OSError.raise(@errorName(err));
+        }
+
+        var written: usize = 0;
+        while (written < bytes.len) {
+            // Raw streams may perform partial writes, so we write until the whole slice is consumed.
+            const view = try py.PyMemoryView.fromSlice(bytes[written..]);
+            defer view.decref();
+            const n = try py.call(?usize, self.write_.?, .{view}, .{});
+            written += n orelse return py.BlockingIOError.raise("write returned None for a non-blocking stream");
+        }
+    }
+};
+
+/// Whether the Python file object is an unbuffered raw stream, i.e. an instance of io.RawIOBase.
+fn isRaw(file: py.PyObject) !bool {
+    const io = try py.import("io");
+    defer io.decref();
+    const RawIOBase = try io.get("RawIOBase");
+    defer RawIOBase.decref();
+    return py.isinstance(file, RawIOBase);
+}
+
+/// Returns the file descriptor of the Python file object, or null if it does not have one.
+fn fileno(file: py.PyObject) !?std.os.fd_t {
+    if (!try file.has("fileno")) return null;
+    return file.call0(std.os.fd_t, "fileno") catch {
+        // e.g. io.UnsupportedOperation for in-memory streams
+        ffi.PyErr_Clear();
+        return null;
+    };
+}
+
+const testing = std.testing;
+
+test "FileReader" {
+    py.initialize();
+    defer py.finalize();
+
+    const io = try py.import("io");
+    defer io.decref();
+
+    const data = try py.PyBytes.create("hello\nworld\n");
+    defer data.decref();
+    const stream = try io.call(py.PyObject, "BytesIO", .{data}, .{});
+    defer stream.decref();
+
+    var fr = try FileReader.init(stream, .{ .buffer_size = 4 });
+    defer fr.deinit();
+
+    var line: [16]u8 = undefined;
+    try testing.expectEqualStrings("hello", (try fr.reader().readUntilDelimiterOrEof(&line, '\n')).?);
+    try testing.expectEqualStrings("world", (try fr.reader().readUntilDelimiterOrEof(&line, '\n')).?);
+    try testing.expectEqual(@as(?[]u8, null), try fr.reader().readUntilDelimiterOrEof(&line, '\n'));
+}
+
+test "FileReader exported buffer" {
+    py.initialize();
+    defer py.finalize();
+
+    const module = try py.PyModule.fromCode(
+        \\import ctypes, io
+        \\
+        \\class Hoarder(io.RawIOBase):
+        \\    def readinto(self, b):
+        \\        self.kept = (ctypes.c_char * len(b)).from_buffer(b)
+        \\        b[:2] = b"hi"
+        \\        return 2
+    , "hoarder.py", "hoarder");
+    defer module.decref();
+
+    const stream = try module.obj.call(py.PyObject, "Hoarder", .{}, .{});
+    defer stream.decref();
+
+    var fr = try FileReader.init(stream, .{ .buffer_size = 4 });
+    var buf: [2]u8 = undefined;
+    try testing.expectEqual(@as(usize, 2), try fr.reader().read(&buf));
+
+    // The ctypes array still exports the buffer, so deinit must leave it allocated.
+    fr.deinit();
+    const kept = try stream.get("kept");
+    defer kept.decref();
+    const value = try kept.get("raw");
+    defer value.decref();
+    try testing.expectEqualStrings("hi", (try (try py.PyBytes.checked(value)).asSlice())[0..2]);
+}
+
+test "FileWriter" {
+    py.initialize();
+    defer py.finalize();
+
+    const io = try py.import("io");
+    defer io.decref();
+
+    const stream = try io.call(py.PyObject, "BytesIO", .{}, .{});
+    defer stream.decref();
+
+    var fw = try FileWriter.init(stream, .{ .buffer_size = 4 });
+    defer fw.deinit();
+    try fw.writer().print("{d} and {s}", .{ 42, "a longer string" });
+    try fw.flush();
+
+    const value = try stream.call0(py.PyBytes, "getvalue");
+    defer value.decref();
+    try testing.expectEqualStrings("42 and a longer string", try value.asSlice());
+}
@@ -0,0 +1,216 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+const std = @import("std");
+const py = @import("pydust.zig");
+const PyError = @import("errors.zig").PyError;
+
+/// The item types a MappedBuffer can be exported as.
+const ItemTypes = .{ u8, i8, u16, i16, u32, i32, u64, i64, f16, f32, f64 };
+
+/// A memory-mapped file exported through the buffer protocol.
+///
+/// The mapping cannot be closed while buffer views are exported, so Python memoryviews remain valid for as long as
+/// they are held. Zig slices are not counted as exports, and are only valid until the mapping is closed. To expose
+/// the class, add it to a Pydust module, e.g. `pub const MappedBuffer = py.MappedBuffer;`.
+pub const MappedBuffer = py.class(struct {
+    pub const __doc__ = "A read-only or read-write memory-mapped file";
+    const Self = @This();
+
+    pub const Advice = enum { normal, random, sequential, willneed, dontneed };
+
+    memory: ?[]align(std.mem.page_size) u8,
+    writable: bool,
+    format: [:0]const u8,
+    itemsize: usize,
+    shape: [1]isize,
+    exports: usize,
+
+    pub fn __init__(self: *Self, args: struct { source: py.PyObject, writable: bool = false, format: []const u8 = "B" }) !void {
+        const itemsize = itemSize(args.format) orelse {
+            return py.ValueError.raiseFmt("unsupported buffer format '{s}'", .{args.format});
+        };
+
+        var file: std.fs.File = undefined;
+        var owned = false;
+        if (py.PyLong.checkedCast(args.source)) |fd| {
+            // We map the caller's file descriptor, leaving it open for them to close.
+            file = .{ .handle = @intCast(try fd.as(i64)) };
+        } else {
+            // Accepts str, bytes and os.PathLike paths.
+            const os = try py.import("os");
+            defer os.decref();
+            const path = try os.call(py.PyString, "fsdecode", .{args.source}, .{});
+            defer path.decref();
+            file = std.fs.cwd().openFile(try path.asSlice(), .{
+                .mode = if (args.writable) .read_write else .read_only,
+            }) catch |err| return raiseOSError(err);
+            owned = true;
+        }
+        defer if (owned) file.close();
+
+        const size = file.getEndPos() catch |err| return raiseOSError(err);
+        if (size == 0) {
+            return py.ValueError.raise("cannot mmap an empty file");
+        }
+
+        var prot: u32 = std.os.PROT.READ;
+        if (args.writable) prot |= std.os.PROT.WRITE;
+        const memory = std.os.mmap(null, @intCast(size), prot, std.os.MAP.SHARED, file.handle, 0) catch |err| {
+            return raiseOSError(err);
+        };
+
+        self.* = .{
+            .memory = memory,
+            .writable = args.writable,
+            .format = formatFor(args.format),
+            .itemsize = itemsize,
+            .shape = .{@intCast(memory.len / itemsize)},
+            .exports = 0,
+        };
+    }
+
+    pub fn __del__(self: *Self) void {
+        // Buffer views hold a reference to us, so no views can be exported by the time we are finalized.
+        if (self.memory) |memory| std.os.munmap(memory);
+        self.memory = null;
+    }
+
+    pub fn __buffer__(self: *Self, view: *py.PyBuffer, flags: c_int) !void {
+        const memory = try self.mapped();
+        if (flags & py.PyBuffer.Flags.WRITABLE != 0 and !self.writable) {
+            return py.BufferError.raise("request for writable buffer of a read-only mapping is rejected");
+        }
+
+        inline for (ItemTypes) |T| {
+            if (@sizeOf(T) == self.itemsize and std.mem.eql(u8, py.PyBuffer.getFormat(T), self.format)) {
+                const values: []T = @alignCast(std.mem.bytesAsSlice(T, memory[0 .. self.length() * self.itemsize]));
+                view.initFromSlice(T, values, &self.shape, self);
+            }
+        }
+        view.readonly = !self.writable;
+        self.exports += 1;
+    }
+
+    pub fn __release_buffer__(self: *Self, view: *py.PyBuffer) void {
+        _ = view;
+        self.exports -= 1;
+    }
+
+    pub fn __len__(self: *const Self) usize {
+        return self.length();
+    }
+
+    /// Unmap the file. Fails if any buffer views are still exported.
+    pub fn close(self: *Self) !void {
+        if (self.exports > 0) {
+            return py.BufferError.raise("cannot close mapping while buffer views are exported");
+        }
+        if (self.memory) |memory| std.os.munmap(memory);
+        self.memory = null;
+    }
+
+    /// Advise the kernel how the mapping will be accessed, e.g. "sequential" or "willneed".
+    pub fn madvise(self: *Self, args: struct { advice: []const u8 }) !void {
+        const advice = std.meta.stringToEnum(Advice, args.advice) orelse {
+            return py.ValueError.raiseFmt("unknown advice '{s}'", .{args.advice});
+        };
+        try self.advise(advice);
+    }
+
+    pub usingnamespace py.zig(struct {
+        /// Returns the mapped memory as a slice of T, valid until the mapping is closed.
+        pub fn slice(self: *const Self, comptime T: type) ![]const T {
+            const memory = try self.mapped();
+            return @alignCast(std.mem.bytesAsSlice(T, memory[0 .. memory.len - memory.len % @sizeOf(T)]));
+        }
+
+        /// Returns the mapped memory as a mutable slice of T, valid until the mapping is closed.
+        /// The mapping must be writable.
+        pub fn mutableSlice(self: *const Self, comptime T: type) ![]T {
+            if (!self.writable) {
+                return py.BufferError.raise("mapping is read-only");
+            }
+            const memory = try self.mapped();
+            return @alignCast(std.mem.bytesAsSlice(T, memory[0 .. memory.len - memory.len % @sizeOf(T)]));
+        }
+
+        pub fn advise(self: *const Self, advice: Advice) !void {
+            const memory = try self.mapped();
+            const flag: u32 = switch (advice) {
+                .normal => std.os.MADV.NORMAL,
+                .random => std.os.MADV.RANDOM,
+                .sequential => std.os.MADV.SEQUENTIAL,
+                .willneed => std.os.MADV.WILLNEED,
+                .dontneed => std.os.MADV.DONTNEED,
+            };
+            std.os.madvise(memory.ptr, memory.len, flag) catch |err| return raiseOSError(err);
+        }
+
+        pub fn mapped(self: *const Self) ![]align(std.mem.page_size) u8 {
+            return self.memory orelse return py.ValueError.raise("mapping is closed");
+        }
+
+        pub fn length(self: *const Self) usize {
+            return @intCast(self.shape[0]);
+        }
+    });
+});
+
+fn itemSize(format: []const u8) ?usize {
+    inline for (ItemTypes) |T| {
+        if (std.mem.eql(u8, py.PyBuffer.getFormat(T), format)) return @sizeOf(T);
+    }
+    return null;
+}
+
+fn formatFor(format: []const u8) [:0]const u8 {
+    inline for (ItemTypes) |T| {
+        if (std.mem.eql(u8, py.PyBuffer.getFormat(T), format)) return py.PyBuffer.getFormat(T);
+    }
+    unreachable;
+}
+
+fn raiseOSError(err: anyerror) PyError {
+    return switch (err) {
+        error.FileNotFound => py.FileNotFoundError.raise(@errorName(err)),
+        error.AccessDenied => py.PermissionError.raise(@errorName(err)),
+        else => py.OSError.raise(@errorName(err)),
+    };
+}
+
+const testing = std.testing;
+
+test "MappedBuffer" {
+    py.initialize();
+    defer py.finalize();
+
+    var tmp = testing.tmpDir(.{});
+    defer tmp.cleanup();
+    const values = [_]u32{ 1, 2, 3, 4 };
+    try tmp.dir.writeFile("data.bin", std.mem.sliceAsBytes(&values));
+    const file = try tmp.dir.openFile("data.bin", .{});
+    defer file.close();
+
+    const fd = try py.PyLong.create(file.handle);
+    defer fd.decref();
+
+    var mapped: MappedBuffer = undefined;
+    try mapped.__init__(.{ .source = fd.obj, .format = "I" });
+    defer mapped.__del__();
+
+    try testing.expectEqual(@as(usize, 4), mapped.__len__());
+    try testing.expectEqualSlices(u32, &values, try mapped.slice(u32));
+    try testing.expectError(PyError.PyRaised, mapped.mutableSlice(u32));
+    py.ffi.PyErr_Clear();
+    try mapped.advise(.sequential);
+}
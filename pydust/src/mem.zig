@@ -14,6 +14,21 @@ const std = @import("std");
 const Allocator = std.mem.Allocator;
 const ffi = @import("ffi.zig");
 const py = @import("./pydust.zig");
+const pyconf = @import("pyconf");
+
+/// Account for the memory allocated through py.allocator, enabled with the `track_allocations` build option.
+pub const tracking = @hasDecl(pyconf, "track_allocations") and pyconf.track_allocations or trackingSites;
+
+/// Additionally aggregate live allocations by the return address of their caller, enabled with the
+/// `track_allocation_sites` build option.
+pub const trackingSites = @hasDecl(pyconf, "track_allocation_sites") and pyconf.track_allocation_sites;
+
+/// The tracemalloc domain of allocations made through py.allocator, "PYDU" in ASCII.
+pub const tracemallocDomain: c_uint = 0x50594455;
+
+// Not part of the limited API, but exported by every CPython since 3.7.
+extern fn PyTraceMalloc_Track(domain: c_uint, ptr: usize, size: usize) c_int;
+extern fn PyTraceMalloc_Untrack(domain: c_uint, ptr: usize) c_int;
 
 pub const PyMemAllocator = struct {
     const Self = @This();
@@ -32,7 +47,6 @@ pub const PyMemAllocator = struct {
     fn alloc(ctx: *anyopaque, len: usize, ptr_align: u8, ret_addr: usize) ?[*]u8 {
         // As per this issue, we will hack an aligned allocator.
         // https://bugs.python.org/msg232221
-        _ = ret_addr;
         _ = ctx;
 
         // FIXME(ngates): we should have a separate allocator for re-entrant cases like this
@@ -45,17 +59,23 @@ pub const PyMemAllocator = struct {
         const alignment: u8 = @intCast(@as(u8, 1) << @intCast(ptr_align));
 
         // By default, ptr_align == 1 which gives us our 1 byte header to store the alignment shift
-        const raw_ptr: usize = @intFromPtr(ffi.PyMem_Malloc(len + alignment) orelse return null);
+        const raw_ptr: usize = @intFromPtr(ffi.PyMem_Malloc(len + site_header + alignment) orelse return null);
 
-        const shift: u8 = @intCast(alignment - (raw_ptr % alignment));
+        const shift: u8 = @intCast(alignment - ((raw_ptr + site_header) % alignment));
         std.debug.assert(0 < shift and shift <= alignment);
 
-        const aligned_ptr: usize = raw_ptr + shift;
+        const aligned_ptr: usize = raw_ptr + site_header + shift;
 
         // Store the shift in the first byte before the aligned ptr
         // We know from above that we are guaranteed to own that byte.
         @as(*u8, @ptrFromInt(aligned_ptr - 1)).* = shift;
 
+        if (tracking) {
+            // PyMem_Malloc aligns to at least 8 bytes, so the site header is aligned.
+            if (trackingSites) @as(*usize, @ptrFromInt(raw_ptr)).* = ret_addr;
+            Accounting.allocated(aligned_ptr, len, ret_addr);
+        }
+
         return @ptrFromInt(aligned_ptr);
     }
 
@@ -96,7 +116,106 @@ pub const PyMemAllocator = struct {
         const aligned_ptr: usize = @intFromPtr(buf.ptr);
         const shift = @as(*const u8, @ptrFromInt(aligned_ptr - 1)).*;
 
-        const raw_ptr: *anyopaque = @ptrFromInt(aligned_ptr - shift);
-        ffi.PyMem_Free(raw_ptr);
+        const raw_ptr: usize = aligned_ptr - shift - site_header;
+
+        if (tracking) {
+            const site = if (trackingSites) @as(*const usize, @ptrFromInt(raw_ptr)).* else 0;
+            Accounting.freed(aligned_ptr, buf.len, site);
+        }
+
+        ffi.PyMem_Free(@ptrFromInt(raw_ptr));
     }
+
+    // When aggregating by site, we store the return address of the allocation in a header before the alignment shift.
+    const site_header = if (trackingSites) @sizeOf(usize) else 0;
 }{};
+
+/// Live and peak byte counters for py.allocator. Since each extension module compiles its own copy of Pydust,
+/// the counters cover a single module. Both the allocator and the Python API hold the GIL while accessing them.
+const Accounting = struct {
+    const Site = struct { count: u64 = 0, live_bytes: usize = 0 };
+
+    var live_bytes: usize = 0;
+    var peak_bytes: usize = 0;
+    var allocations: u64 = 0;
+    var frees: u64 = 0;
+
+    // Allocated with the page allocator so that the index itself is not accounted for.
+    var sites: std.AutoHashMapUnmanaged(usize, Site) = .{};
+
+    fn allocated(ptr: usize, len: usize, site: usize) void {
+        live_bytes += len;
+        peak_bytes = @max(peak_bytes, live_bytes);
+        allocations += 1;
+
+        if (trackingSites) {
+            // If we fail to grow the index, we only lose the attribution of this allocation.
+            if (sites.getOrPut(std.heap.page_allocator, site)) |entry| {
+                if (!entry.found_existing) entry.value_ptr.* = .{};
+                entry.value_ptr.count += 1;
+                entry.value_ptr.live_bytes += len;
+            } else |_| {}
+        }
+
+        // Fails with -2 when tracemalloc is not tracing, which we ignore.
+        _ = PyTraceMalloc_Track(tracemallocDomain, ptr, len);
+    }
+
+    fn freed(ptr: usize, len: usize, site: usize) void {
+        live_bytes -= len;
+        frees += 1;
+
+        if (trackingSites) {
+            if (sites.getPtr(site)) |entry| {
+                entry.count -= 1;
+                entry.live_bytes -= len;
+                if (entry.count == 0) _ = sites.remove(site);
+            }
+        }
+
+        _ = PyTraceMalloc_Untrack(tracemallocDomain, ptr);
+    }
+
+    /// Returns a dict of the allocation counters, and the live allocations of each call site when tracked.
+    fn collect() !py.PyDict {
+        // Snapshot the sites first, since building the result allocates through py.allocator.
+        var snapshot = std.ArrayList(struct { usize, Site }).init(std.heap.page_allocator);
+        defer snapshot.deinit();
+        var iter = sites.iterator();
+        while (iter.next()) |entry| {
+            try snapshot.append(.{ entry.key_ptr.*, entry.value_ptr.* });
+        }
+
+        const result = try py.PyDict.create(.{
+            .live_bytes = live_bytes,
+            .peak_bytes = peak_bytes,
+            .allocations = allocations,
+            .frees = frees,
+            .tracemalloc_domain = tracemallocDomain,
+        });
+        errdefer result.decref();
+
+        const bySite = try py.PyDict.new();
+        try result.setOwnedItem("sites", bySite);
+        for (snapshot.items) |item| {
+            const site = try py.PyDict.create(.{ .count = item[1].count, .live_bytes = item[1].live_bytes });
+            try bySite.setOwnedItem(item[0], site);
+        }
+        return result;
+    }
+
+    fn pydust_allocations(pymodule: *ffi.PyObject, unused: ?*ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+        _ = pymodule;
+        _ = unused;
+        const result = collect() catch return null;
+        return result.obj.py;
+    }
+};
+
+/// The methods added to the root module, `__pydust_allocations__` when allocations are tracked.
+pub const methoddefs: []const ffi.PyMethodDef = if (tracking) &.{.{
+    .ml_name = "__pydust_allocations__",
+    .ml_meth = @ptrCast(&Accounting.pydust_allocations),
+    .ml_flags = ffi.METH_NOARGS,
+    .ml_doc = "__pydust_allocations__($module, /)\n--\n\nReturn the memory accounting of the Pydust allocator.",
+}} else &.{};
@@ -0,0 +1,283 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Native memoization of pure Pydust functions.
+const std = @import("std");
+const py = @import("pydust.zig");
+const ffi = @import("ffi.zig");
+const tramp = @import("trampoline.zig");
+const State = @import("discovery.zig").State;
+const Internals = @import("modules.zig").Internals;
+const PyError = @import("errors.zig").PyError;
+
+pub const MemoizeOptions = struct {
+    /// The maximum number of results held by the cache.
+    capacity: u32 = 128,
+};
+
+/// Memoize a deterministic function, e.g. `pub const fib = py.memoize(fibonacci, .{ .capacity = 256 });`.
+///
+/// The Zig args struct is hashed and compared natively, so args may only contain ints, floats, bools, enums
+/// and strings. Results are held as Python objects in a bounded cache evicted with the CLOCK algorithm. The cache
+/// is part of the state of the module declaring the function, so the returned function takes the module as self.
+/// Pydust also exposes `<name>_cache_info()` and `<name>_cache_clear()` functions alongside the function.
+pub fn memoize(comptime func: anytype, comptime options: MemoizeOptions) @TypeOf(Memoized(func, options).call) {
+    const M = Memoized(func, options);
+    State.memoized(&M.call, M);
+    return M.call;
+}
+
+fn Memoized(comptime func: anytype, comptime options: MemoizeOptions) type {
+    const info = @typeInfo(@TypeOf(func)).Fn;
+    if (info.params.len != 1) {
+        @compileError("Memoized functions must take a single args struct");
+    }
+    if (options.capacity == 0) {
+        @compileError("Memoized functions must have a capacity of at least 1");
+    }
+    const Args = info.params[0].type.?;
+    const fields = @typeInfo(Args).Struct.fields;
+
+    const Entry = struct {
+        hash: u64,
+        args: Args,
+        result: py.PyObject,
+        referenced: bool,
+    };
+
+    return struct {
+        const Self = @This();
+
+        // Entries are stored in a fixed array, with an index from args hash to slot. Both are allocated on the first
+        // miss with enough capacity that neither hits nor inserts allocate afterwards.
+        entries: []?Entry = &.{},
+        index: std.AutoHashMapUnmanaged(u64, u32) = .{},
+        hand: u32 = 0,
+        hits: u64 = 0,
+        misses: u64 = 0,
+
+        /// The cache belongs to the module state, so the function is called with its module.
+        fn call(module: py.PyModule, args: Args) !py.PyObject {
+            const self = try (try Internals.of(module)).cache(Self);
+            return self.get(args);
+        }
+
+        /// Returns the statistics of the cache, like functools.lru_cache.
+        pub fn cache_info(module: py.PyModule) !struct { hits: u64, misses: u64, maxsize: u32, currsize: u32 } {
+            const self = try (try Internals.of(module)).cache(Self);
+            return .{ .hits = self.hits, .misses = self.misses, .maxsize = options.capacity, .currsize = self.index.count() };
+        }
+
+        /// Clear the cache and its statistics.
+        pub fn cache_clear(module: py.PyModule) !void {
+            const self = try (try Internals.of(module)).cache(Self);
+            self.clear();
+        }
+
+        fn get(self: *Self, args: Args) !py.PyObject {
+            const hash = hashArgs(args);
+            if (self.index.get(hash)) |slot| {
+                const entry = &self.entries[slot].?;
+                if (eqlArgs(entry.args, args)) {
+                    self.hits += 1;
+                    entry.referenced = true;
+                    entry.result.incref();
+                    return entry.result;
+                }
+            }
+            self.misses += 1;
+
+            // The function may re-enter the cache, so we compute the result before touching any entries.
+            const result = try py.createOwned(tramp.coerceError(func(args)));
+            errdefer result.decref();
+
+            if (self.entries.len == 0) {
+                self.entries = try py.allocator.alloc(?Entry, options.capacity);
+                @memset(self.entries, null);
+                try self.index.ensureTotalCapacity(py.allocator, options.capacity);
+            }
+            // A recursive call may have already cached these args.
+            if (self.index.contains(hash)) return result;
+
+            const slot = self.evict();
+            self.entries[slot] = .{ .hash = hash, .args = try ownArgs(args), .result = result, .referenced = false };
+            result.incref();
+            self.index.putAssumeCapacity(hash, slot);
+            return result;
+        }
+
+        fn clear(self: *Self) void {
+            for (self.entries) |*entry| {
+                if (entry.*) |e| {
+                    entry.* = null;
+                    release(e);
+                }
+            }
+            self.index.clearRetainingCapacity();
+            self.hand = 0;
+            self.hits = 0;
+            self.misses = 0;
+        }
+
+        /// Release the entries and their storage, called by the module when it is cleared or freed.
+        pub fn deinit(self: *Self) void {
+            self.clear();
+            py.allocator.free(self.entries);
+            self.index.deinit(py.allocator);
+            self.* = .{};
+        }
+
+        /// Advance the clock hand to a free slot, or the first entry not referenced since the hand last passed it.
+        fn evict(self: *Self) u32 {
+            while (true) {
+                const slot = self.hand;
+                self.hand = (self.hand + 1) % options.capacity;
+                if (self.entries[slot]) |*entry| {
+                    if (entry.referenced) {
+                        entry.referenced = false;
+                        continue;
+                    }
+                    _ = self.index.remove(entry.hash);
+                    release(entry.*);
+                    self.entries[slot] = null;
+                }
+                return slot;
+            }
+        }
+
+        fn release(entry: Entry) void {
+            entry.result.decref();
+            inline for (fields) |field| {
+                if (comptime isString(field.type)) py.allocator.free(@field(entry.args, field.name));
+            }
+        }
+
+        /// Strings are borrowed from their Python objects, so we copy them for the lifetime of the entry.
+        fn ownArgs(args: Args) !Args {
+            var owned = args;
+            inline for (fields) |field| {
+                if (comptime isString(field.type)) {
+                    @field(owned, field.name) = try py.allocator.dupe(u8, @field(args, field.name));
+                }
+            }
+            return owned;
+        }
+
+        fn hashArgs(args: Args) u64 {
+            var hasher = std.hash.Wyhash.init(0);
+            inline for (fields) |field| {
+                const value = @field(args, field.name);
+                switch (@typeInfo(field.type)) {
+                    .Int, .Bool, .Enum => std.hash.autoHash(&hasher, value),
+                    .Float => |f| std.hash.autoHash(&hasher, @as(std.meta.Int(.unsigned, f.bits), @bitCast(value))),
+                    else => if (comptime isString(field.type)) {
+                        hasher.update(value);
+                    } else {
+                        @compileError("Memoized function args must be ints, floats, bools, enums or strings, found " ++ @typeName(field.type));
+                    },
+                }
+            }
+            return hasher.final();
+        }
+
+        fn eqlArgs(a: Args, b: Args) bool {
+            inline for (fields) |field| {
+                const equal = if (comptime isString(field.type))
+                    std.mem.eql(u8, @field(a, field.name), @field(b, field.name))
+                else
+                    @field(a, field.name) == @field(b, field.name);
+                if (!equal) return false;
+            }
+            return true;
+        }
+    };
+}
+
+fn isString(comptime T: type) bool {
+    return T == []const u8 or T == [:0]const u8;
+}
+
+const testing = std.testing;
+
+var calls: u32 = 0;
+
+fn square(args: struct { x: i64, label: []const u8 }) i64 {
+    calls += 1;
+    return args.x * args.x;
+}
+
+/// A module with only the Pydust internals as its state, standing in for a module declaring memoized functions.
+fn createModule() !py.PyModule {
+    const Fns = struct {
+        var def = std.mem.zeroInit(ffi.PyModuleDef, .{
+            .m_name = "memoized",
+            .m_size = Internals.moduleSize(struct {}),
+            .m_free = &free,
+        });
+
+        fn free(module: ?*anyopaque) callconv(.C) void {
+            const internals = Internals.of(.{ .obj = .{ .py = @alignCast(@ptrCast(module)) } }) catch unreachable;
+            internals.clear();
+        }
+    };
+
+    const module: py.PyModule = .{ .obj = .{ .py = ffi.PyModule_Create2(&Fns.def, ffi.PYTHON_ABI_VERSION) orelse return PyError.PyRaised } };
+    (try Internals.of(module)).* = .{};
+    return module;
+}
+
+test "memoize" {
+    py.initialize();
+    defer py.finalize();
+
+    const module = try createModule();
+    defer module.decref();
+
+    const M = Memoized(square, .{ .capacity = 2 });
+
+    calls = 0;
+    for ([_]i64{ 1, 2, 1, 3, 1, 2 }) |x| {
+        const result = try M.call(module, .{ .x = x, .label = "square" });
+        defer result.decref();
+        try testing.expectEqual(x * x, try py.as(i64, result));
+    }
+
+    // 1 stays cached since it's referenced each time the clock passes, whereas 2 is evicted by 3.
+    try testing.expectEqual(@as(u32, 4), calls);
+    const info = try M.cache_info(module);
+    try testing.expectEqual(@as(u64, 2), info.hits);
+    try testing.expectEqual(@as(u64, 4), info.misses);
+    try testing.expectEqual(@as(u32, 2), info.currsize);
+}
+
+test "memoize across interpreters" {
+    const M = Memoized(square, .{ .capacity = 2 });
+
+    // The cache is released with its module, so results never outlive the interpreter that created them.
+    for (0..2) |_| {
+        py.initialize();
+        defer py.finalize();
+
+        const module = try createModule();
+        defer module.decref();
+
+        calls = 0;
+        for (0..2) |_| {
+            // Large ints are not cached by the interpreter, so the result is owned by the cache.
+            const result = try M.call(module, .{ .x = 1 << 20, .label = "square" });
+            defer result.decref();
+            try testing.expectEqual(@as(i64, 1 << 40), try py.as(i64, result));
+        }
+        try testing.expectEqual(@as(u32, 1), calls);
+        try testing.expectEqual(@as(u64, 1), (try M.cache_info(module)).misses);
+    }
+}
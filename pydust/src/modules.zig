@@ -19,7 +19,9 @@ const Attributes = @import("attributes.zig").Attributes;
 const pytypes = @import("pytypes.zig");
 const funcs = @import("functions.zig");
 const tramp = @import("trampoline.zig");
-const PyMemAllocator = @import("mem.zig").PyMemAllocator;
+const stats = @import("stats.zig");
+const mem = @import("mem.zig");
+const PyMemAllocator = mem.PyMemAllocator;
 const CPyObject = @import("types/obj.zig").CPyObject;
 
 pub const ModuleDef = struct {
@@ -34,6 +36,13 @@ pub fn Module(comptime name: [:0]const u8, comptime definition: type) type {
         const slots = Slots(definition);
         const methods = funcs.Methods(definition);
 
+        // The root module additionally exposes the instrumentation functions enabled by the build options.
+        const instrumentation: []const ffi.PyMethodDef = if (State.getIdentifier(definition).parent == definition)
+            stats.methoddefs ++ mem.methoddefs
+        else
+            &.{};
+        const pydefs = &funcs.ExtendedMethods(methods.pydefs, instrumentation ++ Lazy(definition).methoddefs).pydefs;
+
         const doc: ?[:0]const u8 = blk: {
             if (@hasDecl(definition, "__doc__")) {
                 break :blk definition.__doc__;
@@ -42,10 +51,22 @@ pub fn Module(comptime name: [:0]const u8, comptime definition: type) type {
         };
 
         const Fns = struct {
+            pub fn clear(module: *ffi.PyObject) callconv(.C) c_int {
+                // The state is not allocated if the module failed to initialize.
+                if (Internals.find(.{ .obj = .{ .py = module } })) |internals| {
+                    internals.clear();
+                }
+                return 0;
+            }
+
             pub fn free(module: ?*anyopaque) callconv(.C) void {
-                const mod: py.PyModule = .{ .obj = .{ .py = @alignCast(@ptrCast(module)) } };
-                const state = mod.getState(definition) catch return;
-                state.__del__();
+                const pymodule: *ffi.PyObject = @alignCast(@ptrCast(module));
+                _ = clear(pymodule);
+                if (@hasDecl(definition, "__del__")) {
+                    const mod: py.PyModule = .{ .obj = .{ .py = pymodule } };
+                    const state = mod.getState(definition) catch return;
+                    state.__del__();
+                }
             }
         };
 
@@ -56,12 +77,12 @@ pub fn Module(comptime name: [:0]const u8, comptime definition: type) type {
                 .m_base = std.mem.zeroes(ffi.PyModuleDef_Base),
                 .m_name = name.ptr,
                 .m_doc = if (doc) |d| d.ptr else null,
-                .m_size = @sizeOf(definition),
-                .m_methods = @constCast(&methods.pydefs),
+                .m_size = Internals.moduleSize(definition),
+                .m_methods = @constCast(pydefs),
                 .m_slots = @constCast(slots.slots.ptr),
                 .m_traverse = null,
-                .m_clear = null,
-                .m_free = if (@hasDecl(definition, "__del__")) &Fns.free else null,
+                .m_clear = &Fns.clear,
+                .m_free = &Fns.free,
             };
 
             // Set reference count to 1 so that it is not freed.
@@ -73,6 +94,71 @@ pub fn Module(comptime name: [:0]const u8, comptime definition: type) type {
     };
 }
 
+/// The native state Pydust keeps for each module object, such as the caches of memoized functions.
+///
+/// It is stored at the end of the module state, after the state of the module definition, so it can be found from
+/// the module object alone. Like the module state, it belongs to a single interpreter and is released in the m_clear
+/// and m_free slots of the module.
+pub const Internals = struct {
+    caches: std.AutoHashMapUnmanaged(usize, Cache) = .{},
+
+    const Cache = struct {
+        ptr: *anyopaque,
+        destroy: *const fn (*anyopaque) void,
+    };
+
+    /// The size of the state of a module object with the given definition.
+    pub fn moduleSize(comptime definition: type) isize {
+        return @intCast(std.mem.alignForward(usize, @sizeOf(definition), @alignOf(Internals)) + @sizeOf(Internals));
+    }
+
+    pub fn of(module: py.PyModule) !*Internals {
+        return find(module) orelse return py.SystemError.raise("module has no Pydust state");
+    }
+
+    /// Returns null, without raising, if the module state is not allocated.
+    fn find(module: py.PyModule) ?*Internals {
+        const def: *ffi.PyModuleDef = ffi.PyModule_GetDef(module.obj.py) orelse return null;
+        const state: [*]u8 = @ptrCast(ffi.PyModule_GetState(module.obj.py) orelse return null);
+        return @alignCast(@ptrCast(state + @as(usize, @intCast(def.m_size)) - @sizeOf(Internals)));
+    }
+
+    /// Returns the cache of type T for this module, creating it on first use.
+    pub fn cache(self: *Internals, comptime T: type) !*T {
+        const Destroy = struct {
+            fn destroy(ptr: *anyopaque) void {
+                const c: *T = @alignCast(@ptrCast(ptr));
+                c.deinit();
+                py.allocator.destroy(c);
+            }
+        };
+
+        // Each type of cache has its own destroy function, so we key the caches by its address.
+        const entry = try self.caches.getOrPut(py.allocator, @intFromPtr(&Destroy.destroy));
+        if (entry.found_existing) {
+            return @alignCast(@ptrCast(entry.value_ptr.ptr));
+        }
+        errdefer self.caches.removeByPtr(entry.key_ptr);
+
+        const c = try py.allocator.create(T);
+        c.* = .{};
+        entry.value_ptr.* = .{ .ptr = c, .destroy = &Destroy.destroy };
+        return c;
+    }
+
+    /// Destroy the caches, releasing the Python objects they hold.
+    pub fn clear(self: *Internals) void {
+        // Releasing objects may run arbitrary code, so we detach the caches first.
+        var caches = self.caches;
+        self.caches = .{};
+        var iter = caches.valueIterator();
+        while (iter.next()) |c| {
+            c.destroy(c.ptr);
+        }
+        caches.deinit(py.allocator);
+    }
+};
+
 fn Slots(comptime definition: type) type {
     return struct {
         const Self = @This();
@@ -114,6 +200,8 @@ fn Slots(comptime definition: type) type {
         }
 
         inline fn mod_exec_internal(module: py.PyModule) !void {
+            (try Internals.of(module)).* = .{};
+
             // First, initialize the module state using an __init__ function
             if (@typeInfo(definition).Struct.fields.len > 0) {
                 if (!@hasDecl(definition, "__init__")) {
@@ -127,6 +215,11 @@ fn Slots(comptime definition: type) type {
                 }
             }
 
+            // Lazy modules create their attributes and submodules on first access instead, see Lazy.
+            if (Lazy(definition).enabled) {
+                return;
+            }
+
             // Add attributes (including class definitions) to the module
             inline for (attrs.attributes) |attr| {
                 const obj = try attr.ctor(module);
@@ -135,30 +228,123 @@ fn Slots(comptime definition: type) type {
 
             // Add submodules to the module
             inline for (submodules.submodules) |submodule| {
-                // We use PEP489 multi-phase initialization. For this, we create a ModuleSpec
-                // which is a dumb object containing only a name.
-                // See https://github.com/python/cpython/blob/042f31da552c19054acd3ef7bb6cfd857bce172b/Python/import.c#L2527-L2539
+                const submod = try createSubmodule(submodule);
+                try module.addObjectRef(State.getIdentifier(submodule).name, submod);
+            }
+        }
+    };
+}
 
-                const name = State.getIdentifier(submodule).name;
-                const submodDef = Module(name, submodule);
-                const pySubmodDef: *ffi.PyModuleDef = @ptrCast((try submodDef.init()).py);
+fn createSubmodule(comptime submodule: type) !py.PyObject {
+    // We use PEP489 multi-phase initialization. For this, we create a ModuleSpec
+    // which is a dumb object containing only a name.
+    // See https://github.com/python/cpython/blob/042f31da552c19054acd3ef7bb6cfd857bce172b/Python/import.c#L2527-L2539
+
+    const name = State.getIdentifier(submodule).name;
+    const submodDef = Module(name, submodule);
+    const pySubmodDef: *ffi.PyModuleDef = @ptrCast((try submodDef.init()).py);
+
+    // Create a dumb ModuleSpec with a name attribute using types.SimpleNamespace
+    const types = try py.import("types");
+    defer types.decref();
+    const pyname = try py.PyString.create(name);
+    defer pyname.decref();
+    const spec = try types.call(py.PyObject, "SimpleNamespace", .{}, .{ .name = pyname });
+    defer spec.decref();
 
-                // Create a dumb ModuleSpec with a name attribute using types.SimpleNamespace
-                const types = try py.import("types");
-                defer types.decref();
-                const pyname = try py.PyString.create(name);
-                defer pyname.decref();
-                const spec = try types.call(py.PyObject, "SimpleNamespace", .{}, .{ .name = pyname });
-                defer spec.decref();
+    const submod: py.PyObject = .{ .py = ffi.PyModule_FromDefAndSpec(pySubmodDef, spec.py) orelse return PyError.PyRaised };
+    errdefer submod.decref();
 
-                const submod: py.PyObject = .{ .py = ffi.PyModule_FromDefAndSpec(pySubmodDef, spec.py) orelse return PyError.PyRaised };
+    if (ffi.PyModule_ExecDef(submod.py, pySubmodDef) < 0) {
+        return PyError.PyRaised;
+    }
+    return submod;
+}
+
+/// Modules declaring `pub const __lazy__ = true` create their classes and submodules on first access, rather than
+/// when the module is imported. A module-level __getattr__ (PEP 562) creates the object and caches it in the module
+/// dict, so it is only ever called once per name.
+fn Lazy(comptime definition: type) type {
+    return struct {
+        const enabled = @hasDecl(definition, "__lazy__") and definition.__lazy__;
+
+        const attrs = Attributes(definition);
+        const submodules = Submodules(definition);
 
-                if (ffi.PyModule_ExecDef(submod.py, pySubmodDef) < 0) {
-                    return PyError.PyRaised;
+        const methoddefs: []const ffi.PyMethodDef = if (enabled) &.{
+            .{
+                .ml_name = "__getattr__",
+                .ml_meth = @ptrCast(&getattr),
+                .ml_flags = ffi.METH_O,
+                .ml_doc = "__getattr__($module, name, /)\n--\n\nCreate a class or submodule on first access.",
+            },
+            .{
+                .ml_name = "__dir__",
+                .ml_meth = @ptrCast(&dir),
+                .ml_flags = ffi.METH_NOARGS,
+                .ml_doc = "__dir__($module, /)\n--\n\nList the attributes of the module, including those not yet created.",
+            },
+        } else &.{};
+
+        comptime {
+            if (enabled and @hasDecl(definition, "__getattr__")) {
+                @compileError("Lazy modules cannot define __getattr__: " ++ @typeName(definition));
+            }
+        }
+
+        fn getattr(pymodule: *ffi.PyObject, pyname: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            const module: py.PyModule = .{ .obj = .{ .py = pymodule } };
+            const obj = tramp.coerceError(create(module, .{ .obj = .{ .py = pyname } })) catch return null;
+            return obj.py;
+        }
+
+        fn create(module: py.PyModule, pyname: py.PyObject) !py.PyObject {
+            const name = try (try py.PyString.checked(pyname)).asSlice();
+
+            inline for (attrs.attributes) |attr| {
+                if (std.mem.eql(u8, name, attr.name)) {
+                    return cache(module, attr.name, try attr.ctor(module));
+                }
+            }
+            inline for (submodules.submodules) |submodule| {
+                const submoduleName = State.getIdentifier(submodule).name;
+                if (std.mem.eql(u8, name, submoduleName)) {
+                    return cache(module, submoduleName, try createSubmodule(submodule));
                 }
+            }
+            return py.AttributeError.raiseFmt("module has no attribute '{s}'", .{name});
+        }
+
+        /// Adds the object to the module dict, returning it as a new reference.
+        fn cache(module: py.PyModule, name: [:0]const u8, obj: py.PyObject) !py.PyObject {
+            errdefer obj.decref();
+            try module.addObjectRef(name, obj);
+            return obj;
+        }
+
+        fn dir(pymodule: *ffi.PyObject, unused: ?*ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            _ = unused;
+            const names = tramp.coerceError(listNames(.{ .obj = .{ .py = pymodule } })) catch return null;
+            return names.obj.py;
+        }
 
-                try module.addObjectRef(name, submod);
+        fn listNames(module: py.PyModule) !py.PyList {
+            const dict = ffi.PyModule_GetDict(module.obj.py) orelse return PyError.PyRaised;
+            const names = py.PyList.unchecked(.{ .py = ffi.PyDict_Keys(dict) orelse return PyError.PyRaised });
+            errdefer names.decref();
+
+            inline for (attrs.attributes) |attr| {
+                if (ffi.PyDict_GetItemString(dict, attr.name) == null) {
+                    try names.append(attr.name);
+                }
+            }
+            inline for (submodules.submodules) |submodule| {
+                const name = State.getIdentifier(submodule).name;
+                if (ffi.PyDict_GetItemString(dict, name) == null) {
+                    try names.append(name);
+                }
             }
+            return names;
         }
     };
 }
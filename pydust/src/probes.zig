@@ -0,0 +1,100 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Readable symbols and USDT probes for the trampolines of Pydust functions and slots.
+///
+/// When built with the `probes` option on Linux, each trampoline is exported under the qualified name of its Python
+/// function, e.g. `example.hello.hello`, so that profilers such as perf attribute samples to it rather than to an
+/// anonymous comptime instantiation.
+///
+/// Each trampoline also fires `pydust:entry` and `pydust:exit` USDT probes, passing the qualified name as the first
+/// argument. A probe is a single nop until a tracer such as bpftrace or perf attaches to it.
+const builtin = @import("builtin");
+const pyconf = @import("pyconf");
+const State = @import("discovery.zig").State;
+
+const supported = builtin.os.tag == .linux and (builtin.cpu.arch == .x86_64 or builtin.cpu.arch == .aarch64);
+pub const enabled = supported and @hasDecl(pyconf, "probes") and pyconf.probes;
+
+/// Export a trampoline under the qualified name of its Python function or slot.
+pub fn symbol(comptime definition: type, comptime name: []const u8, comptime func: anytype) void {
+    if (enabled) {
+        @export(func, .{ .name = qualifiedName(definition, name), .linkage = .Strong });
+    }
+}
+
+/// Returns the full path of a function or slot, e.g. `example.modules.submod.Class.method`. The path includes every
+/// parent so that symbols and statistics are unique within the module.
+pub fn qualifiedName(comptime definition: type, comptime name: []const u8) [:0]const u8 {
+    comptime var result: [:0]const u8 = "";
+    inline for (State.getIdentifier(definition).qualifiedName) |part| {
+        result = result ++ part ++ ".";
+    }
+    return result ++ name;
+}
+
+/// Fires the entry probe when a trampoline is called, and the exit probe when it returns.
+pub const Probe = if (enabled) struct {
+    qualname: [*:0]const u8,
+
+    pub inline fn enter(comptime definition: type, comptime name: []const u8) Probe {
+        const qualname = comptime qualifiedName(definition, name);
+        fire("entry", qualname);
+        return .{ .qualname = qualname };
+    }
+
+    pub inline fn exit(self: *const Probe) void {
+        fire("exit", self.qualname);
+    }
+} else struct {
+    pub inline fn enter(comptime definition: type, comptime name: []const u8) Probe {
+        _ = definition;
+        _ = name;
+        return .{};
+    }
+
+    pub inline fn exit(self: *const Probe) void {
+        _ = self;
+    }
+};
+
+/// Emit a USDT probe site, following the SystemTap SDT note format of sys/sdt.h.
+inline fn fire(comptime name: []const u8, qualname: [*:0]const u8) void {
+    asm volatile (
+        \\990: nop
+        \\.pushsection .note.stapsdt,"","note"
+        \\.balign 4
+        \\.4byte 992f-991f, 994f-993f, 3
+        \\991: .asciz "stapsdt"
+        \\992: .balign 4
+        \\993: .8byte 990b
+        \\.8byte _.stapsdt.base
+        \\.8byte 0
+        \\.asciz "pydust"
+        \\.asciz "
+    ++ name ++
+        \\"
+        \\.asciz "8@%[qualname]"
+        \\994: .balign 4
+        \\.popsection
+        \\.ifndef _.stapsdt.base
+        \\.pushsection .stapsdt.base,"aG","progbits",.stapsdt.base,comdat
+        \\.weak _.stapsdt.base
+        \\.hidden _.stapsdt.base
+        \\_.stapsdt.base: .space 1
+        \\.size _.stapsdt.base, 1
+        \\.popsection
+        \\.endif
+        :
+        : [qualname] "r" (qualname),
+    );
+}
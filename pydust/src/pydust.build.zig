@@ -24,6 +24,20 @@ pub const PythonModuleOptions = struct {
     name: [:0]const u8,
     root_source_file: std.Build.LazyPath,
     limited_api: bool = true,
+    // Record per-function call statistics, exposed by the module's __pydust_stats__ function.
+    stats: bool = false,
+    // Fire USDT probes on entry to and exit from each Pydust function, on Linux.
+    probes: bool = false,
+    // Account for the memory allocated through py.allocator, exposed by the module's __pydust_allocations__ function.
+    track_allocations: bool = false,
+    // Additionally aggregate live allocations by call site.
+    track_allocation_sites: bool = false,
+    // x86-64 micro-architecture levels to build additional variants of the module for, e.g. x86_64_v3. The module
+    // itself is built for the baseline CPU, and loads the best variant supported by the CPU when imported.
+    cpu_variants: []const []const u8 = &.{},
+    // Names of functions whose runtime safety checks are enabled or disabled, see py.runtimeSafety.
+    runtime_safety_enabled: []const []const u8 = &.{},
+    runtime_safety_disabled: []const []const u8 = &.{},
     target: std.zig.CrossTarget,
     optimize: std.builtin.Mode,
     main_pkg_path: ?std.Build.LazyPath = null,
@@ -41,6 +55,52 @@ pub const PythonModule = struct {
     test_step: *std.build.CompileStep,
 };
 
+/// A Python module linked into a bundle.
+pub const BundledModule = struct {
+    name: [:0]const u8,
+    root_source_file: std.Build.LazyPath,
+};
+
+pub const PythonBundleOptions = struct {
+    // The name of the bundle, which is itself an empty Python module imported by the bundled modules.
+    name: [:0]const u8,
+    modules: []const BundledModule,
+    limited_api: bool = true,
+    stats: bool = false,
+    probes: bool = false,
+    track_allocations: bool = false,
+    track_allocation_sites: bool = false,
+    cpu_variants: []const []const u8 = &.{},
+    runtime_safety_enabled: []const []const u8 = &.{},
+    runtime_safety_disabled: []const []const u8 = &.{},
+    target: std.zig.CrossTarget,
+    optimize: std.builtin.Mode,
+
+    /// The options of a single module built with the options of the bundle.
+    fn moduleOptions(self: *const PythonBundleOptions, name: [:0]const u8, root_source_file: std.Build.LazyPath) PythonModuleOptions {
+        return .{
+            .name = name,
+            .root_source_file = root_source_file,
+            .limited_api = self.limited_api,
+            .stats = self.stats,
+            .probes = self.probes,
+            .track_allocations = self.track_allocations,
+            .track_allocation_sites = self.track_allocation_sites,
+            .cpu_variants = self.cpu_variants,
+            .runtime_safety_enabled = self.runtime_safety_enabled,
+            .runtime_safety_disabled = self.runtime_safety_disabled,
+            .target = self.target,
+            .optimize = self.optimize,
+        };
+    }
+};
+
+pub const PythonBundle = struct {
+    library_step: *std.build.CompileStep,
+    // The test runners of the bundled modules, in order.
+    test_steps: []const *std.build.CompileStep,
+};
+
 /// Configure a Pydust step in the build. From this, you can define Python modules.
 pub fn addPydust(b: *std.Build, options: PydustOptions) *PydustStep {
     return PydustStep.add(b, options);
@@ -54,6 +114,7 @@ pub const PydustStep = struct {
     test_build_step: *Step,
     generate_stubs: *Step,
     check_stubs: bool,
+    cpu_variants: bool,
 
     python_exe: []const u8,
     libpython: []const u8,
@@ -67,29 +128,30 @@ pub const PydustStep = struct {
         const test_build_step = b.step("pydust-test-build", "Build Pydust test runners");
         const generate_stubs = b.step("generate-stubs", "Generate pyi stubs for the compiled binary");
         const check_stubs = b.option(bool, "check-stubs", "Check that existing stubs are up to date instead of generating new ones") orelse false;
+        const cpu_variants = b.option(bool, "cpu-variants", "Build the CPU variants of modules, otherwise only their baseline") orelse true;
 
-        const python_exe = blk: {
-            if (b.option([]const u8, "python-exe", "Python executable to use")) |exe| {
-                break :blk exe;
-            }
-            if (getStdOutput(b.allocator, &.{ "poetry", "env", "info", "--executable" })) |exe| {
-                // Strip off the trailing newline
-                break :blk exe[0 .. exe.len - 1];
-            } else |_| {
-                break :blk "python3";
+        const python_exe_option = b.option([]const u8, "python-exe", "Python executable to use");
+        const python_config_option = b.option(
+            []const u8,
+            "python-config",
+            "JSON-encoded Python configuration, as returned by pydust.buildzig.python_config, skipping interpreter discovery",
+        );
+
+        const config = blk: {
+            if (python_config_option) |json| {
+                break :blk parsePythonConfig(b.allocator, json) catch @panic("Invalid python-config option");
             }
+            const python_exe = python_exe_option orelse exe: {
+                if (getStdOutput(b.allocator, &.{ "poetry", "env", "info", "--executable" })) |exe| {
+                    // Strip off the trailing newline
+                    break :exe exe[0 .. exe.len - 1];
+                } else |_| {
+                    break :exe "python3";
+                }
+            };
+            break :blk getPythonConfig(b, python_exe) catch @panic("Failed to setup Python");
         };
 
-        const libpython = getLibpython(
-            b.allocator,
-            python_exe,
-        ) catch @panic("Cannot find libpython");
-        const hexversion = getPythonOutput(
-            b.allocator,
-            python_exe,
-            "import sys; print(f'{sys.hexversion:#010x}', end='')",
-        ) catch @panic("Cannot get python hexversion");
-
         var self = b.allocator.create(PydustStep) catch @panic("OOM");
 
         self.* = .{
@@ -99,23 +161,14 @@ pub const PydustStep = struct {
             .test_build_step = test_build_step,
             .generate_stubs = generate_stubs,
             .check_stubs = check_stubs,
-            .python_exe = python_exe,
-            .libpython = libpython,
-            .hexversion = hexversion,
-            .pydust_source_file = "",
-            .python_include_dir = "",
-            .python_library_dir = "",
+            .cpu_variants = cpu_variants,
+            .python_exe = config.executable,
+            .libpython = config.libpython,
+            .hexversion = config.hexversion,
+            .pydust_source_file = config.pydust_source_file,
+            .python_include_dir = config.include_dir,
+            .python_library_dir = config.library_dir,
         };
-        // Eagerly run path discovery to work around ZLS support.
-        self.python_include_dir = self.pythonOutput(
-            "import sysconfig; print(sysconfig.get_path('include'), end='')",
-        ) catch @panic("Failed to setup Python");
-        self.python_library_dir = self.pythonOutput(
-            "import sysconfig; print(sysconfig.get_config_var('LIBDIR'), end='')",
-        ) catch @panic("Failed to setup Python");
-        self.pydust_source_file = self.pythonOutput(
-            "import pydust; import os; print(os.path.join(os.path.dirname(pydust.__file__), 'src/pydust.zig'), end='')",
-        ) catch @panic("Failed to setup Python");
 
         // Option for emitting test binary based on the given root source. This can be helpful for debugging.
         const debugRoot = b.option(
@@ -128,7 +181,12 @@ pub const PydustStep = struct {
                 const pyconf = b.addOptions();
                 pyconf.addOption([:0]const u8, "module_name", "debug");
                 pyconf.addOption(bool, "limited_api", false);
-                pyconf.addOption([]const u8, "hexversion", hexversion);
+                pyconf.addOption(bool, "stats", false);
+                pyconf.addOption(bool, "probes", false);
+                pyconf.addOption(bool, "track_allocations", false);
+                pyconf.addOption(bool, "track_allocation_sites", false);
+                pyconf.addOption(bool, "stubs", false);
+                pyconf.addOption([]const u8, "hexversion", self.hexversion);
 
                 const testdebug = b.addTest(.{ .root_source_file = .{ .path = root }, .target = .{}, .optimize = .Debug });
                 testdebug.addOptions("pyconf", pyconf);
@@ -138,7 +196,7 @@ pub const PydustStep = struct {
                 });
                 testdebug.addIncludePath(.{ .path = self.python_include_dir });
                 testdebug.linkLibC();
-                testdebug.linkSystemLibrary(libpython);
+                testdebug.linkSystemLibrary(self.libpython);
                 testdebug.addLibraryPath(.{ .path = self.python_library_dir });
                 // Needed to support miniconda statically linking libpython on macos
                 testdebug.addRPath(.{ .path = self.python_library_dir });
@@ -154,54 +212,135 @@ pub const PydustStep = struct {
     /// Adds a Pydust Python module. The resulting library and test binaries can be further configured with
     /// additional dependencies or modules.
     pub fn addPythonModule(self: *PydustStep, options: PythonModuleOptions) PythonModule {
+        const short_name = options.short_name();
+        const libs = self.addLibraries(options, &.{});
+        self.addStubs(options, short_name, libs.install);
+        return .{
+            .library_step = libs.lib,
+            .test_step = self.addTests(options, short_name),
+        };
+    }
+
+    /// Adds a bundle of Pydust Python modules, linked into a single shared library so they share one copy of the
+    /// Pydust runtime and are loaded with a single dlopen.
+    ///
+    /// Each module is installed as a small Python forwarding module, which imports the bundle and then initializes the
+    /// module from it. Stubs and test runners are still built per module.
+    pub fn addPythonBundle(self: *PydustStep, options: PythonBundleOptions) PythonBundle {
         const b = self.owner;
+        const files = b.addWriteFiles();
+
+        // The root of the bundle registers each of the modules, which are imported by their name.
+        var root = std.ArrayList(u8).init(self.allocator);
+        root.appendSlice("const py = @import(\"pydust\");\n\ncomptime {\n    py.bundle(.{\n") catch @panic("OOM");
+        for (options.modules) |module| {
+            root.writer().print("        .{{ \"{s}\", @import(\"{s}\") }},\n", .{ module.name, module.name }) catch @panic("OOM");
+        }
+        root.appendSlice("    });\n}\n") catch @panic("OOM");
+        const root_source_file = files.add("bundle.zig", root.items);
+
+        const bundle_options = options.moduleOptions(options.name, root_source_file);
+        const libs = self.addLibraries(bundle_options, options.modules);
+
+        var test_steps = std.ArrayList(*std.build.CompileStep).init(self.allocator);
+        for (options.modules) |module| {
+            const module_options = options.moduleOptions(module.name, module.root_source_file);
+            const short_name = module_options.short_name();
+
+            const forwarder = std.fmt.allocPrint(self.allocator, bundle_forwarder, .{ module.name, options.name, options.name }) catch @panic("OOM");
+            const install_forwarder = b.addInstallFileWithDir(
+                files.add(std.fmt.allocPrint(self.allocator, "{s}.py", .{module.name}) catch @panic("OOM"), forwarder),
+                .{ .custom = ".." },
+                forwarderDestRelPath(self.allocator, module.name) catch @panic("OOM"),
+            );
+            b.getInstallStep().dependOn(&install_forwarder.step);
+
+            self.addStubs(module_options, short_name, libs.install);
+            test_steps.append(self.addTests(module_options, short_name)) catch @panic("OOM");
+        }
+
+        return .{
+            .library_step = libs.lib,
+            .test_steps = test_steps.items,
+        };
+    }
 
+    /// Adds and installs the shared library of a module, along with its CPU variants.
+    fn addLibraries(
+        self: *PydustStep,
+        options: PythonModuleOptions,
+        bundled: []const BundledModule,
+    ) struct { lib: *std.build.CompileStep, install: *Step } {
         const short_name = options.short_name();
 
-        const pyconf = b.addOptions();
-        pyconf.addOption([:0]const u8, "module_name", options.name);
-        pyconf.addOption(bool, "limited_api", options.limited_api);
-        pyconf.addOption([]const u8, "hexversion", self.hexversion);
+        // CPU variants dispatch with CPUID, so they are only built for x86-64.
+        const cpu_variants: []const []const u8 = if (self.cpu_variants and options.target.getCpuArch() == .x86_64) options.cpu_variants else &.{};
+
+        // With variants, the module itself must run on any CPU, rather than the native CPU by default.
+        var target = options.target;
+        if (cpu_variants.len > 0 and target.cpu_model == .determined_by_cpu_arch) {
+            target.cpu_model = .baseline;
+        }
 
         // Configure and install the Python module shared library
-        const lib = b.addSharedLibrary(.{
-            .name = short_name,
-            .root_source_file = options.root_source_file,
-            .target = options.target,
-            .optimize = options.optimize,
-            .main_pkg_path = options.main_pkg_path,
-        });
-        lib.addOptions("pyconf", pyconf);
-        lib.addAnonymousModule("pydust", .{
-            .source_file = .{ .path = self.pydust_source_file },
-            .dependencies = &.{.{ .name = "pyconf", .module = pyconf.createModule() }},
-        });
-        lib.addIncludePath(.{ .path = self.python_include_dir });
-        lib.linkLibC();
-        lib.linker_allow_shlib_undefined = true;
+        const lib = self.addLibrary(options, short_name, target, self.addPyconf(options, false, cpu_variants), bundled);
+        const install = self.installLibrary(lib, options, null);
+
+        for (cpu_variants) |variant| {
+            var variant_target = options.target;
+            variant_target.cpu_model = .{ .explicit = std.Target.Cpu.Arch.x86_64.parseCpuModel(variant) catch {
+                std.debug.panic("Unknown CPU variant {s} of module {s}", .{ variant, options.name });
+            } };
+            const variant_lib = self.addLibrary(
+                options,
+                std.fmt.allocPrint(self.allocator, "{s}-{s}", .{ short_name, variant }) catch @panic("OOM"),
+                variant_target,
+                self.addPyconf(options, false, &.{}),
+                bundled,
+            );
+            _ = self.installLibrary(variant_lib, options, variant);
+        }
 
-        // Install the shared library within the source tree
-        const install = b.addInstallFileWithDir(
-            lib.getEmittedBin(),
-            // TODO(ngates): find this somehow?
-            .{ .custom = ".." }, // Relative to project root: zig-out/../
-            libraryDestRelPath(self.allocator, options) catch @panic("OOM"),
-        );
-        b.getInstallStep().dependOn(&install.step);
+        return .{ .lib = lib, .install = install };
+    }
 
-        // Invoke stub generator on the emitted binary
-        const workingDir = std.fs.cwd().realpathAlloc(self.allocator, ".") catch @panic("OOM");
-        var genArgs: []const []const u8 = undefined;
-        if (self.check_stubs) {
-            genArgs = &.{ self.python_exe, "-m", "pydust.generate_stubs", options.name, workingDir, "--check" };
+    /// Generate the module's stub at comptime, see addStubGenerator.
+    fn addStubs(self: *PydustStep, options: PythonModuleOptions, short_name: []const u8, install: *Step) void {
+        const b = self.owner;
+        if (options.main_pkg_path == null) {
+            const stubgen = self.addStubGenerator(options, short_name);
+            const run_stubgen = b.addRunArtifact(stubgen);
+            const stubPath = stubDestRelPath(self.allocator, options.name) catch @panic("OOM");
+            if (self.check_stubs) {
+                run_stubgen.addArg("--check");
+                run_stubgen.addFileArg(.{ .path = stubPath });
+                self.generate_stubs.dependOn(&run_stubgen.step);
+            } else {
+                // The captured stub is cached like any other build artifact, and only installed when it changes.
+                const install_stub = b.addInstallFileWithDir(run_stubgen.captureStdOut(), .{ .custom = ".." }, stubPath);
+                self.generate_stubs.dependOn(&install_stub.step);
+            }
         } else {
-            genArgs = &.{ self.python_exe, "-m", "pydust.generate_stubs", options.name, workingDir };
+            // Modules can only import files outside of their own directory with a main_pkg_path, which the stub
+            // generator cannot express, so we fall back to introspecting the built module from Python.
+            const workingDir = std.fs.cwd().realpathAlloc(self.allocator, ".") catch @panic("OOM");
+            var genArgs: []const []const u8 = undefined;
+            if (self.check_stubs) {
+                genArgs = &.{ self.python_exe, "-m", "pydust.generate_stubs", options.name, workingDir, "--check" };
+            } else {
+                genArgs = &.{ self.python_exe, "-m", "pydust.generate_stubs", options.name, workingDir };
+            }
+            const stubs = b.addSystemCommand(genArgs);
+            stubs.step.dependOn(install);
+            self.generate_stubs.dependOn(&stubs.step);
         }
-        const stubs = b.addSystemCommand(genArgs);
-        stubs.step.dependOn(&install.step);
-        self.generate_stubs.dependOn(&stubs.step);
+    }
+
+    /// Configure a test runner for the module
+    fn addTests(self: *PydustStep, options: PythonModuleOptions, short_name: []const u8) *std.build.CompileStep {
+        const b = self.owner;
+        const pyconf = self.addPyconf(options, false, &.{});
 
-        // Configure a test runner for the module
         const libtest = b.addTest(.{
             .root_source_file = options.root_source_file,
             .main_pkg_path = options.main_pkg_path,
@@ -233,20 +372,142 @@ pub const PydustStep = struct {
             test_step.dependOn(&run_libtest.step);
         }
 
-        return .{
-            .library_step = lib,
-            .test_step = libtest,
-        };
+        return libtest;
+    }
+
+    fn addLibrary(
+        self: *PydustStep,
+        options: PythonModuleOptions,
+        name: []const u8,
+        target: std.zig.CrossTarget,
+        pyconf: *std.Build.Step.Options,
+        bundled: []const BundledModule,
+    ) *std.build.CompileStep {
+        const b = self.owner;
+        const lib = b.addSharedLibrary(.{
+            .name = name,
+            .root_source_file = options.root_source_file,
+            .target = target,
+            .optimize = options.optimize,
+            .main_pkg_path = options.main_pkg_path,
+        });
+
+        // Bundled modules skip registering themselves as the root module, see py.bundle.
+        pyconf.addOption(bool, "bundled", bundled.len > 0);
+        lib.addOptions("pyconf", pyconf);
+        const pydust = b.createModule(.{
+            .source_file = .{ .path = self.pydust_source_file },
+            .dependencies = &.{.{ .name = "pyconf", .module = pyconf.createModule() }},
+        });
+        lib.addModule("pydust", pydust);
+        for (bundled) |module| {
+            lib.addModule(module.name, b.createModule(.{
+                .source_file = module.root_source_file,
+                .dependencies = &.{.{ .name = "pydust", .module = pydust }},
+            }));
+        }
+        lib.addIncludePath(.{ .path = self.python_include_dir });
+        lib.linkLibC();
+        lib.linker_allow_shlib_undefined = true;
+        return lib;
     }
 
-    fn libraryDestRelPath(allocator: std.mem.Allocator, options: PythonModuleOptions) ![]const u8 {
+    /// Install the shared library within the source tree.
+    fn installLibrary(self: *PydustStep, lib: *std.build.CompileStep, options: PythonModuleOptions, variant: ?[]const u8) *Step {
+        const b = self.owner;
+        const install = b.addInstallFileWithDir(
+            lib.getEmittedBin(),
+            // TODO(ngates): find this somehow?
+            .{ .custom = ".." }, // Relative to project root: zig-out/../
+            libraryDestRelPath(self.allocator, options, variant) catch @panic("OOM"),
+        );
+        b.getInstallStep().dependOn(&install.step);
+        return &install.step;
+    }
+
+    fn addPyconf(
+        self: *PydustStep,
+        options: PythonModuleOptions,
+        stubs: bool,
+        cpu_variants: []const []const u8,
+    ) *std.Build.Step.Options {
+        const pyconf = self.owner.addOptions();
+        pyconf.addOption([:0]const u8, "module_name", options.name);
+        pyconf.addOption(bool, "limited_api", options.limited_api);
+        pyconf.addOption(bool, "stats", options.stats);
+        pyconf.addOption(bool, "probes", options.probes);
+        pyconf.addOption(bool, "track_allocations", options.track_allocations);
+        pyconf.addOption(bool, "track_allocation_sites", options.track_allocation_sites);
+        pyconf.addOption(bool, "stubs", stubs);
+        pyconf.addOption([]const []const u8, "cpu_variants", cpu_variants);
+        pyconf.addOption([]const []const u8, "runtime_safety_enabled", options.runtime_safety_enabled);
+        pyconf.addOption([]const []const u8, "runtime_safety_disabled", options.runtime_safety_disabled);
+        pyconf.addOption([]const u8, "hexversion", self.hexversion);
+        return pyconf;
+    }
+
+    /// Adds an executable printing the .pyi stub of the module. It imports the module built with the stubs option,
+    /// whose root module then exports the stub generated at comptime from its definitions, so neither the extension
+    /// module nor Python is involved in generating stubs.
+    fn addStubGenerator(self: *PydustStep, options: PythonModuleOptions, short_name: []const u8) *std.build.CompileStep {
+        const b = self.owner;
+
+        const pydust = b.createModule(.{
+            .source_file = .{ .path = self.pydust_source_file },
+            .dependencies = &.{.{ .name = "pyconf", .module = self.addPyconf(options, true, &.{}).createModule() }},
+        });
+        const module = b.createModule(.{
+            .source_file = options.root_source_file,
+            .dependencies = &.{.{ .name = "pydust", .module = pydust }},
+        });
+
+        // The generator always runs on the host, even when cross-compiling the module.
+        const stubgen = b.addExecutable(.{
+            .name = std.fmt.allocPrint(self.allocator, "{s}-stubgen", .{short_name}) catch @panic("OOM"),
+            .root_source_file = .{ .path = std.fs.path.join(
+                self.allocator,
+                &.{ std.fs.path.dirname(self.pydust_source_file).?, "stubgen.zig" },
+            ) catch @panic("OOM") },
+            .optimize = .Debug,
+        });
+        stubgen.addModule("module", module);
+        stubgen.addIncludePath(.{ .path = self.python_include_dir });
+        stubgen.linkLibC();
+        stubgen.linkSystemLibrary(self.libpython);
+        stubgen.addLibraryPath(.{ .path = self.python_library_dir });
+        // Needed to support miniconda statically linking libpython on macos
+        stubgen.addRPath(.{ .path = self.python_library_dir });
+        return stubgen;
+    }
+
+    fn forwarderDestRelPath(allocator: std.mem.Allocator, name: []const u8) ![]const u8 {
+        const destPath = try std.mem.concat(allocator, u8, &.{ name, ".py" });
+        std.mem.replaceScalar(u8, destPath[0..name.len], '.', '/');
+        return destPath;
+    }
+
+    fn stubDestRelPath(allocator: std.mem.Allocator, name: []const u8) ![]const u8 {
+        const suffix = ".pyi";
+        const destPath = try allocator.alloc(u8, name.len + suffix.len);
+
+        // Take the module name, replace dots for slashes.
+        @memcpy(destPath[0..name.len], name);
+        std.mem.replaceScalar(u8, destPath[0..name.len], '.', '/');
+
+        @memcpy(destPath[name.len..], suffix);
+
+        return destPath;
+    }
+
+    fn libraryDestRelPath(allocator: std.mem.Allocator, options: PythonModuleOptions, variant: ?[]const u8) ![]const u8 {
         const name = options.name;
 
         if (!options.limited_api) {
             @panic("Pydust currently only supports limited API");
         }
 
-        const suffix = ".abi3.so";
+        // Variants are installed next to the module, e.g. example/hello.x86_64_v3.abi3.so
+        const suffix = if (variant) |v| try std.mem.concat(allocator, u8, &.{ ".", v, ".abi3.so" }) else ".abi3.so";
         const destPath = try allocator.alloc(u8, name.len + suffix.len);
 
         // Take the module name, replace dots for slashes.
@@ -268,31 +529,86 @@ pub const PydustStep = struct {
 
         return destPath;
     }
-
-    fn pythonOutput(self: *PydustStep, code: []const u8) ![]const u8 {
-        return getPythonOutput(self.allocator, self.python_exe, code);
-    }
 };
 
-fn getLibpython(allocator: std.mem.Allocator, python_exe: []const u8) ![]const u8 {
-    const ldlibrary = try getPythonOutput(
-        allocator,
-        python_exe,
-        "import sysconfig; print(sysconfig.get_config_var('LDLIBRARY'), end='')",
-    );
-
-    var libname = ldlibrary;
-
-    // Strip libpython3.11.a.so => python3.11.a.so
-    if (std.mem.eql(u8, ldlibrary[0..3], "lib")) {
-        libname = libname[3..];
-    }
+// Imports a module from its bundle, formatted with the module name and the bundle name. The extension loader finds the
+// module's PyInit function in the bundle, which the dynamic loader has already loaded when importing the bundle.
+const bundle_forwarder =
+    \\# Generated by Pydust, initializing {s} from the extension module bundle {s}.
+    \\import importlib
+    \\import importlib.machinery
+    \\import importlib.util
+    \\import sys
+    \\
+    \\_path = importlib.import_module("{s}").__file__
+    \\_loader = importlib.machinery.ExtensionFileLoader(__name__, _path)
+    \\_spec = importlib.util.spec_from_file_location(__name__, _path, loader=_loader)
+    \\_module = importlib.util.module_from_spec(_spec)
+    \\sys.modules[__name__] = _module
+    \\_loader.exec_module(_module)
+    \\
+;
+
+/// The configuration of a Python interpreter needed to build against it.
+const PythonConfig = struct {
+    executable: []const u8,
+    libpython: []const u8,
+    hexversion: []const u8,
+    include_dir: []const u8,
+    library_dir: []const u8,
+    pydust_source_file: []const u8,
+};
 
-    // Strip python3.11.a.so => python3.11.a
-    const lastIdx = std.mem.lastIndexOfScalar(u8, libname, '.') orelse libname.len;
-    libname = libname[0..lastIdx];
+// Prints the PythonConfig of the running interpreter, matching pydust.buildzig.python_config.
+const python_config_script =
+    \\import json, os, sys, sysconfig, pydust
+    \\libpython = sysconfig.get_config_var("LDLIBRARY")
+    \\libpython = os.path.splitext(libpython[3:] if libpython.startswith("lib") else libpython)[0]
+    \\print(json.dumps({
+    \\    "executable": sys.executable,
+    \\    "libpython": libpython,
+    \\    "hexversion": f"{sys.hexversion:#010x}",
+    \\    "include_dir": sysconfig.get_path("include"),
+    \\    "library_dir": str(sysconfig.get_config_var("LIBDIR")),
+    \\    "pydust_source_file": os.path.join(os.path.dirname(pydust.__file__), "src", "pydust.zig"),
+    \\}), end="")
+;
+
+/// Discover the configuration of the interpreter with a single Python invocation. The result is cached in the build
+/// cache, keyed by the interpreter path and modification time, so most builds never start Python at all.
+fn getPythonConfig(b: *std.Build, python_exe: []const u8) !PythonConfig {
+    // Interpreters looked up on the PATH, such as the python3 fallback, cannot be keyed and are never cached.
+    const stat = std.fs.cwd().statFile(python_exe) catch {
+        return parsePythonConfig(b.allocator, try getPythonOutput(b.allocator, python_exe, python_config_script));
+    };
+
+    var hasher = std.hash.Wyhash.init(0);
+    hasher.update(python_exe);
+    hasher.update(std.mem.asBytes(&stat.mtime));
+    const cache_path = try std.fmt.allocPrint(b.allocator, "pydust" ++ std.fs.path.sep_str ++ "python-{x:0>16}.json", .{hasher.final()});
+
+    if (b.cache_root.handle.readFileAlloc(b.allocator, cache_path, 1 << 16)) |json| {
+        if (parsePythonConfig(b.allocator, json)) |config| {
+            // Reinstalling Pydust into the same environment can move its sources.
+            if (std.fs.cwd().access(config.pydust_source_file, .{})) |_| {
+                return config;
+            } else |_| {}
+        } else |_| {}
+    } else |_| {}
+
+    const json = try getPythonOutput(b.allocator, python_exe, python_config_script);
+    const config = try parsePythonConfig(b.allocator, json);
+
+    // Failing to write the cache only costs us the discovery on the next build.
+    b.cache_root.handle.makePath("pydust") catch return config;
+    b.cache_root.handle.writeFile(cache_path, json) catch {};
+    return config;
+}
 
-    return libname;
+fn parsePythonConfig(allocator: std.mem.Allocator, json: []const u8) !PythonConfig {
+    // The parsed values are owned by the build allocator, which lives as long as the build.
+    const parsed = try std.json.parseFromSlice(PythonConfig, allocator, json, .{ .allocate = .alloc_always });
+    return parsed.value;
 }
 
 fn getPythonOutput(allocator: std.mem.Allocator, python_exe: []const u8, code: []const u8) ![]const u8 {
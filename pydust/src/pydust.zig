@@ -18,6 +18,8 @@ const types = @import("types.zig");
 const pytypes = @import("pytypes.zig");
 const funcs = @import("functions.zig");
 const tramp = @import("trampoline.zig");
+const stubs = @import("stubs.zig");
+const dispatch = @import("dispatch.zig");
 
 // Export some useful things for users
 pub usingnamespace @import("builtins.zig");
@@ -26,6 +28,16 @@ pub usingnamespace types;
 pub const ffi = @import("ffi.zig");
 pub const PyError = @import("errors.zig").PyError;
 pub const allocator: std.mem.Allocator = mem.PyMemAllocator.allocator();
+pub const MappedBuffer = @import("mapped.zig").MappedBuffer;
+pub const Vec = @import("vec.zig").Vec;
+pub const FileOptions = @import("io.zig").FileOptions;
+pub const FileReader = @import("io.zig").FileReader;
+pub const FileWriter = @import("io.zig").FileWriter;
+pub const vectorize = @import("vectorize.zig").vectorize;
+pub const memoize = @import("memoize.zig").memoize;
+pub const MemoizeOptions = @import("memoize.zig").MemoizeOptions;
+pub const bench = @import("bench.zig").bench;
+pub const BenchOptions = @import("bench.zig").BenchOptions;
 
 const Self = @This();
 
@@ -41,31 +53,111 @@ pub fn finalize() void {
 
 /// Register the root Pydust module
 pub fn rootmodule(comptime definition: type) void {
+    const pyconf = @import("pyconf");
+
+    // Bundled modules are registered by the bundle instead, see bundle.
+    if (@hasDecl(pyconf, "bundled") and pyconf.bundled) {
+        return;
+    }
+
     if (!State.isEmpty()) {
         @compileError("Root module can only be registered in a root-level comptime block");
     }
 
-    const pyconf = @import("pyconf");
     const name = pyconf.module_name;
 
     State.register(definition, .module);
     State.identify(definition, name, definition);
     eagerEval(definition);
 
+    // Stub generator builds export the .pyi stub of the module instead of its init function.
+    if (@hasDecl(pyconf, "stubs") and pyconf.stubs) {
+        const Stub = struct {
+            const text = stubs.stub(definition);
+
+            pub fn get() callconv(.C) [*:0]const u8 {
+                return text.ptr;
+            }
+        };
+        @export(Stub.get, .{ .name = "pydust_stub", .linkage = .Strong });
+        return;
+    }
+
+    exportInit(name, definition);
+}
+
+/// Register the root modules linked into a single shared library, as a tuple of their names and definitions.
+///
+/// Each module exports its own PyInit function, so it can be imported from the bundle with an ExtensionFileLoader. The
+/// bundle itself is an empty module, named by the module_name option.
+pub fn bundle(comptime modules: anytype) void {
+    const pyconf = @import("pyconf");
+
+    const Bundle = struct {
+        pub const __doc__ = "Pydust bundle of " ++ std.fmt.comptimePrint("{d}", .{modules.len}) ++ " extension modules";
+    };
+    State.register(Bundle, .module);
+    State.identify(Bundle, pyconf.module_name, Bundle);
+
+    inline for (modules) |entry| {
+        State.register(entry[1], .module);
+        State.identify(entry[1], entry[0], entry[1]);
+        eagerEval(entry[1]);
+    }
+
+    exportInit(pyconf.module_name, Bundle);
+    inline for (modules) |entry| {
+        exportInit(entry[0], entry[1]);
+    }
+}
+
+/// For root modules, we export a PyInit__name function per CPython API.
+fn exportInit(comptime name: [:0]const u8, comptime definition: type) void {
     const moddef = Module(name, definition);
+    const short_name = if (std.mem.lastIndexOfScalar(u8, name, '.')) |idx| name[idx + 1 ..] else name;
 
-    // For root modules, we export a PyInit__name function per CPython API.
     const Closure = struct {
         pub fn init() callconv(.C) ?*ffi.PyObject {
+            // Hand over to the best CPU variant of the module, if it was built with any.
+            if (dispatch.enabled) {
+                if (dispatch.load(short_name, &init) catch return null) |variantInit| {
+                    return variantInit();
+                }
+            }
             const obj = @call(.always_inline, moddef.init, .{}) catch return null;
             return obj.py;
         }
     };
 
-    const short_name = if (std.mem.lastIndexOfScalar(u8, name, '.')) |idx| name[idx + 1 ..] else name;
     @export(Closure.init, .{ .name = "PyInit_" ++ short_name, .linkage = .Strong });
 }
 
+/// Returns whether runtime safety checks are enabled for the calling function, as configured by the runtime_safety
+/// option of the module and otherwise by the optimize mode. Functions are configured by their name relative to the
+/// module, e.g. `Class.method`, and opt in by starting with:
+///
+///     @setRuntimeSafety(py.runtimeSafety(@This(), @src()));
+pub fn runtimeSafety(comptime definition: type, comptime src: std.builtin.SourceLocation) bool {
+    const pyconf = @import("pyconf");
+    const qualifiedName = comptime blk: {
+        var result: []const u8 = "";
+        for (State.getIdentifier(definition).qualifiedName[1..]) |part| {
+            result = result ++ part ++ ".";
+        }
+        break :blk result ++ src.fn_name;
+    };
+    inline for (.{ .{ "runtime_safety_enabled", true }, .{ "runtime_safety_disabled", false } }) |entry| {
+        if (@hasDecl(pyconf, entry[0])) {
+            for (@field(pyconf, entry[0])) |name| {
+                if (std.mem.eql(u8, name, qualifiedName)) {
+                    return entry[1];
+                }
+            }
+        }
+    }
+    return std.debug.runtime_safety;
+}
+
 /// Register a Pydust module as a submodule to an existing module.
 pub fn module(comptime definition: type) @TypeOf(definition) {
     State.register(definition, .module);
@@ -114,16 +206,29 @@ pub const CallArgs = struct { args: Args, kwargs: Kwargs };
 /// Force the evaluation of Pydust registration methods.
 /// Using this enables us to breadth-first traverse the object graph, ensuring
 /// objects are registered before they're referenced elsewhere.
-fn eagerEval(comptime definition: type) void {
-    for (@typeInfo(definition).Struct.fields) |f| {
-        _ = f.type;
-    }
-    for (@typeInfo(definition).Struct.decls) |d| {
-        const value = @field(definition, d.name);
-        @setEvalBranchQuota(10000);
-        if (State.findDefinition(value)) |_| {
-            // If it's a Pydust definition, then we identify it.
-            State.identify(value, d.name ++ "", definition);
+///
+/// Every module and class reachable from the root is identified, so containing objects can be found by following
+/// the parents of identifiers.
+fn eagerEval(comptime root: type) void {
+    @setEvalBranchQuota(100_000);
+    comptime var queue: []const type = &.{root};
+    comptime var next = 0;
+    inline while (next < queue.len) : (next += 1) {
+        const definition = queue[next];
+        for (@typeInfo(definition).Struct.fields) |f| {
+            _ = f.type;
+        }
+        for (@typeInfo(definition).Struct.decls) |d| {
+            const value = @field(definition, d.name);
+            if (State.findDefinition(value)) |def| {
+                // If it's a Pydust definition, then we identify it.
+                if (State.findIdentifier(value) == null) {
+                    State.identify(value, d.name ++ "", definition);
+                    if (def.type == .module or def.type == .class) {
+                        queue = queue ++ .{value};
+                    }
+                }
+            }
         }
     }
 }
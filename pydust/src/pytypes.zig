@@ -22,15 +22,64 @@ const funcs = @import("functions.zig");
 const PyError = @import("errors.zig").PyError;
 const PyMemAllocator = @import("mem.zig").PyMemAllocator;
 const tramp = @import("trampoline.zig");
+const stats = @import("stats.zig");
+const probes = @import("probes.zig");
 
 /// For a given Pydust class definition, return the encapsulating PyType struct.
 pub fn PyTypeStruct(comptime definition: type) type {
     // I think we might need to dynamically generate this struct to include PyMemberDef fields?
     // This is how we can add nested classes and other attributes.
-    return struct {
+    const Object = struct {
+        obj: ffi.PyObject,
+        state: definition,
+    };
+
+    // Methods inherited from a picklable base would find its export count within the state of the subclass.
+    for (Bases(definition).bases) |base| {
+        if (isPicklable(base)) {
+            @compileError("Picklable classes cannot be subclassed: " ++ @typeName(base));
+        }
+    }
+
+    const weakrefs = hasWeakrefs(definition);
+    const picklable = isPicklable(definition);
+    if (!weakrefs and !picklable) {
+        return Object;
+    }
+
+    // The weak reference list follows the state, so the state sits at the same offset whether or not a class or its
+    // bases reserve a weak reference slot. Inherited methods cast instances to the layout of their base class.
+    // Each class tells CPython the offset of its own list with __weaklistoffset__.
+    const ExtendedObject = struct {
         obj: ffi.PyObject,
         state: definition,
+        weakreflist: if (weakrefs) ?*ffi.PyObject else void,
+        // The number of out-of-band pickle buffers viewing the slices of the state, see Pickle.
+        pickle_exports: if (picklable) usize else void,
     };
+    if (@offsetOf(ExtendedObject, "state") != @offsetOf(Object, "state")) {
+        @compileError("Unsupported alignment of a class with weak references or pickling: " ++ @typeName(definition));
+    }
+    return ExtendedObject;
+}
+
+/// Whether instances of the class reserve a slot for weak references.
+/// Classes opt-in by declaring `pub const __weakref__ = true;`, and the slot is inherited by subclasses.
+pub fn hasWeakrefs(comptime definition: type) bool {
+    if (@hasDecl(definition, "__weakref__")) {
+        if (@TypeOf(definition.__weakref__) != bool) {
+            @compileError("__weakref__ must be declared as a bool: " ++ @typeName(definition));
+        }
+        if (definition.__weakref__) {
+            return true;
+        }
+    }
+    for (Bases(definition).bases) |base| {
+        if (hasWeakrefs(base)) {
+            return true;
+        }
+    }
+    return false;
 }
 
 /// Discover a Pydust class definition.
@@ -109,6 +158,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
 
         const attrs = Attributes(definition);
         const methods = funcs.Methods(definition);
+        const pickle = Pickle(definition, methods.pydefs);
         const members = Members(definition);
         const properties = Properties(definition);
         const doc = Doc(definition, name);
@@ -141,6 +191,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__init__")) {
+                probes.symbol(definition, "__init__", tp_init);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_init,
                     .pfunc = @ptrCast(@constCast(&tp_init)),
@@ -165,6 +216,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__del__")) {
+                probes.symbol(definition, "__del__", tp_finalize);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_finalize,
                     .pfunc = @ptrCast(@constCast(&tp_finalize)),
@@ -172,6 +224,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__buffer__")) {
+                probes.symbol(definition, "__buffer__", bf_getbuffer);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_bf_getbuffer,
                     .pfunc = @ptrCast(@constCast(&bf_getbuffer)),
@@ -179,6 +232,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__release_buffer__")) {
+                probes.symbol(definition, "__release_buffer__", bf_releasebuffer);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_bf_releasebuffer,
                     .pfunc = @ptrCast(@constCast(&bf_releasebuffer)),
@@ -186,13 +240,39 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__len__")) {
+                probes.symbol(definition, "__len__", sq_length);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_sq_length,
                     .pfunc = @ptrCast(@constCast(&sq_length)),
                 }};
             }
 
+            if (@hasDecl(definition, "__getitem__")) {
+                const op = GetItem(definition);
+                slots_ = slots_ ++ .{ffi.PyType_Slot{
+                    .slot = op.slot,
+                    .pfunc = @constCast(op.pfunc),
+                }};
+            }
+
+            if (@hasDecl(definition, "__setitem__") or @hasDecl(definition, "__delitem__")) {
+                const op = SetItem(definition);
+                slots_ = slots_ ++ .{ffi.PyType_Slot{
+                    .slot = op.slot,
+                    .pfunc = @constCast(op.pfunc),
+                }};
+            }
+
+            if (@hasDecl(definition, "__contains__")) {
+                probes.symbol(definition, "__contains__", sq_contains);
+                slots_ = slots_ ++ .{ffi.PyType_Slot{
+                    .slot = ffi.Py_sq_contains,
+                    .pfunc = @ptrCast(@constCast(&sq_contains)),
+                }};
+            }
+
             if (@hasDecl(definition, "__iter__")) {
+                probes.symbol(definition, "__iter__", tp_iter);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_iter,
                     .pfunc = @ptrCast(@constCast(&tp_iter)),
@@ -200,6 +280,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__next__")) {
+                probes.symbol(definition, "__next__", tp_iternext);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_iternext,
                     .pfunc = @ptrCast(@constCast(&tp_iternext)),
@@ -207,6 +288,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__str__")) {
+                probes.symbol(definition, "__str__", tp_str);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_str,
                     .pfunc = @ptrCast(@constCast(&tp_str)),
@@ -214,6 +296,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__repr__")) {
+                probes.symbol(definition, "__repr__", tp_repr);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_repr,
                     .pfunc = @ptrCast(@constCast(&tp_repr)),
@@ -221,6 +304,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__hash__")) {
+                probes.symbol(definition, "__hash__", tp_hash);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_hash,
                     .pfunc = @ptrCast(@constCast(&tp_hash)),
@@ -228,6 +312,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__call__")) {
+                probes.symbol(definition, "__call__", tp_call);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_tp_call,
                     .pfunc = @ptrCast(@constCast(&tp_call)),
@@ -235,6 +320,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             }
 
             if (@hasDecl(definition, "__bool__")) {
+                probes.symbol(definition, "__bool__", nb_bool);
                 slots_ = slots_ ++ .{ffi.PyType_Slot{
                     .slot = ffi.Py_nb_bool,
                     .pfunc = @ptrCast(@constCast(&nb_bool)),
@@ -270,7 +356,7 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
 
             slots_ = slots_ ++ .{ffi.PyType_Slot{
                 .slot = ffi.Py_tp_methods,
-                .pfunc = @ptrCast(@constCast(&methods.pydefs)),
+                .pfunc = @ptrCast(@constCast(&pickle.pydefs)),
             }};
 
             slots_ = slots_ ++ .{ffi.PyType_Slot{
@@ -301,6 +387,9 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             if (sig.selfParam == null and @typeInfo(definition).fields.len > 0) {
                 @compileError("__init__ must take both a self argument");
             }
+            var timer = stats.Timer.startConverting(definition, "__init__");
+            defer timer.finish();
+
             const self = tramp.Trampoline(sig.selfParam.?).unwrap(py.PyObject{ .py = pyself }) catch return -1;
 
             if (sig.argsParam) |Args| {
@@ -309,9 +398,11 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
 
                 const init_args = tramp.Trampoline(Args).unwrapCallArgs(args, kwargs) catch return -1;
                 defer init_args.deinit();
+                timer.converted();
 
                 tramp.coerceError(definition.__init__(self, init_args.argsStruct)) catch return -1;
             } else if (sig.selfParam) |_| {
+                timer.converted();
                 tramp.coerceError(definition.__init__(self)) catch return -1;
             } else {
                 // The function is just a marker to say that the type can be instantiated from Python
@@ -354,18 +445,56 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
         }
 
         fn sq_length(pyself: *ffi.PyObject) callconv(.C) isize {
+            var timer = stats.Timer.start(definition, "__len__");
+            defer timer.finish();
+
             const self: *const PyTypeStruct(definition) = @ptrCast(pyself);
             const result = definition.__len__(&self.state) catch return -1;
             return @as(isize, @intCast(result));
         }
 
+        fn sq_contains(pyself: *ffi.PyObject, pyvalue: *ffi.PyObject) callconv(.C) c_int {
+            const typeInfo = @typeInfo(@TypeOf(definition.__contains__)).Fn;
+            if (typeInfo.params.len != 2) @compileError("__contains__ must take exactly two parameters");
+
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself);
+            var timer = stats.Timer.startConverting(definition, "__contains__");
+            defer timer.finish();
+
+            const value = tramp.Trampoline(typeInfo.params[1].type.?).unwrap(.{ .py = pyvalue }) catch {
+                // Like a dict or list, an object whose values have a Zig type contains no value of a foreign type.
+                if (isConversionError()) {
+                    ffi.PyErr_Clear();
+                    return 0;
+                }
+                return -1;
+            };
+            timer.converted();
+            const result = tramp.coerceError(definition.__contains__(&self.state, value)) catch return -1;
+            return @intFromBool(result);
+        }
+
+        /// Whether the raised error is a failed conversion of a Python value into a Zig type, e.g. of a str to an int
+        /// or of an int that does not fit.
+        fn isConversionError() bool {
+            return ffi.PyErr_ExceptionMatches(ffi.PyExc_TypeError) != 0 or
+                ffi.PyErr_ExceptionMatches(ffi.PyExc_ValueError) != 0 or
+                ffi.PyErr_ExceptionMatches(ffi.PyExc_OverflowError) != 0;
+        }
+
         fn tp_iter(pyself: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.start(definition, "__iter__");
+            defer timer.finish();
+
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const iterator = tramp.coerceError(definition.__iter__(&self.state)) catch return null;
             return (py.createOwned(iterator) catch return null).py;
         }
 
         fn tp_iternext(pyself: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.start(definition, "__next__");
+            defer timer.finish();
+
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const optionalNext = tramp.coerceError(definition.__next__(&self.state)) catch return null;
             if (optionalNext) |next| {
@@ -375,18 +504,27 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
         }
 
         fn tp_str(pyself: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.start(definition, "__str__");
+            defer timer.finish();
+
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const result = tramp.coerceError(definition.__str__(&self.state)) catch return null;
             return (py.createOwned(result) catch return null).py;
         }
 
         fn tp_repr(pyself: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.start(definition, "__repr__");
+            defer timer.finish();
+
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const result = tramp.coerceError(definition.__repr__(&self.state)) catch return null;
             return (py.createOwned(result) catch return null).py;
         }
 
         fn tp_hash(pyself: *ffi.PyObject) callconv(.C) ffi.Py_hash_t {
+            var timer = stats.Timer.start(definition, "__hash__");
+            defer timer.finish();
+
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const result = tramp.coerceError(definition.__hash__(&self.state)) catch return -1;
             return @as(isize, @bitCast(result));
@@ -398,15 +536,22 @@ fn Slots(comptime definition: type, comptime name: [:0]const u8) type {
             const args = if (pyargs) |pa| py.PyTuple.unchecked(.{ .py = pa }) else null;
             const kwargs = if (pykwargs) |pk| py.PyDict.unchecked(.{ .py = pk }) else null;
 
+            var timer = stats.Timer.startConverting(definition, "__call__");
+            defer timer.finish();
+
             const self = tramp.Trampoline(sig.selfParam.?).unwrap(py.PyObject{ .py = pyself }) catch return null;
             const call_args = tramp.Trampoline(sig.argsParam.?).unwrapCallArgs(args, kwargs) catch return null;
             defer call_args.deinit();
+            timer.converted();
 
             const result = tramp.coerceError(definition.__call__(self, call_args.argsStruct)) catch return null;
             return (py.createOwned(result) catch return null).py;
         }
 
         fn nb_bool(pyself: *ffi.PyObject) callconv(.C) c_int {
+            var timer = stats.Timer.start(definition, "__bool__");
+            defer timer.finish();
+
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const result = tramp.coerceError(definition.__bool__(&self.state)) catch return -1;
             return @intCast(@intFromBool(result));
@@ -651,13 +796,226 @@ fn GC(comptime definition: type) type {
     };
 }
 
+/// Whether instances of the class can be pickled.
+/// Classes opt-in by declaring `pub const __pickle__ = true;`.
+pub fn isPicklable(comptime definition: type) bool {
+    if (@hasDecl(definition, "__pickle__")) {
+        if (@TypeOf(definition.__pickle__) != bool) {
+            @compileError("__pickle__ must be declared as a bool: " ++ @typeName(definition));
+        }
+        return definition.__pickle__;
+    }
+    return false;
+}
+
+/// Derive __reduce_ex__ and __setstate__ methods from the fields of a picklable class.
+///
+/// With pickle protocol 5, slice fields are emitted as out-of-band PickleBuffers viewing the Zig memory,
+/// otherwise they are copied into bytes. On unpickling, each buffer is copied into a slice allocated
+/// with py.allocator, so the class should own its slices in the same way, e.g. freeing them in __del__.
+///
+/// __setstate__ replaces the whole state or none of it, and is rejected while out-of-band buffers still view
+/// the slices it would free.
+fn Pickle(comptime definition: type, comptime methoddefs: anytype) type {
+    const empty = ffi.PyMethodDef{ .ml_name = null, .ml_meth = null, .ml_flags = 0, .ml_doc = null };
+    const fields = @typeInfo(definition).Struct.fields;
+
+    return struct {
+        const enabled = isPicklable(definition);
+
+        /// The class methods, extended with the derived pickle methods.
+        pub const pydefs: [methoddefs.len + if (enabled) 2 else 0:empty]ffi.PyMethodDef = blk: {
+            var defs: [methoddefs.len + if (enabled) 2 else 0:empty]ffi.PyMethodDef = undefined;
+            for (methoddefs, 0..) |def, i| {
+                defs[i] = def;
+            }
+            if (!enabled) {
+                break :blk defs;
+            }
+
+            if (@hasDecl(definition, "__reduce_ex__") or @hasDecl(definition, "__setstate__")) {
+                @compileError("Picklable classes cannot define __reduce_ex__ or __setstate__: " ++ @typeName(definition));
+            }
+            if (!@hasDecl(definition, "__init__")) {
+                @compileError("Picklable classes must define __init__ so they can be allocated: " ++ @typeName(definition));
+            }
+
+            defs[methoddefs.len] = ffi.PyMethodDef{
+                .ml_name = "__reduce_ex__",
+                .ml_meth = @ptrCast(&reduce_ex),
+                .ml_flags = ffi.METH_O,
+                .ml_doc = "__reduce_ex__($self, protocol, /)\n--\n\nHelper for pickle.",
+            };
+            defs[methoddefs.len + 1] = ffi.PyMethodDef{
+                .ml_name = "__setstate__",
+                .ml_meth = @ptrCast(&setstate),
+                .ml_flags = ffi.METH_O,
+                .ml_doc = "__setstate__($self, state, /)\n--\n\nRestore the state of an unpickled object.",
+            };
+            break :blk defs;
+        };
+
+        fn reduce_ex(pyself: *ffi.PyObject, pyprotocol: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            const protocol = py.as(i64, py.PyObject{ .py = pyprotocol }) catch return null;
+            const result = reduce(.{ .py = pyself }, protocol) catch return null;
+            return result.obj.py;
+        }
+
+        fn setstate(pyself: *ffi.PyObject, pystate: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself);
+            restore(self, .{ .py = pystate }) catch return null;
+            return py.None().py;
+        }
+
+        /// Returns (copyreg.__newobj__, (cls,), state) such that unpickling allocates an uninitialized
+        /// instance and then passes the state to __setstate__.
+        fn reduce(pyself: py.PyObject, protocol: i64) !py.PyTuple {
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself.py);
+
+            const copyreg = try py.import("copyreg");
+            defer copyreg.decref();
+
+            const result = try py.PyTuple.new(3);
+            errdefer result.decref();
+            try result.setOwnedItem(0, try copyreg.get("__newobj__"));
+            try result.setOwnedItem(1, try py.PyTuple.create(.{py.type_(pyself).obj}));
+
+            const state = try py.PyTuple.new(fields.len);
+            try result.setOwnedItem(2, state);
+            inline for (fields, 0..) |field, i| {
+                try state.setOwnedItem(i, try pickleValue(field.type, @field(self.state, field.name), pyself, &self.pickle_exports, protocol));
+            }
+
+            return result;
+        }
+
+        fn restore(self: *PyTypeStruct(definition), pystate: py.PyObject) !void {
+            const state = try py.PyTuple.checked(pystate);
+            if (state.length() != fields.len) {
+                return py.ValueError.raiseFmt("expected pickled state of length {d}, found {d}", .{ fields.len, state.length() });
+            }
+            // __setstate__ may be called again on an initialized object, whose slices must outlive any buffer viewing them.
+            if (self.pickle_exports > 0) {
+                return py.BufferError.raise("cannot restore the state of an object whose slices are exported");
+            }
+
+            // Unpickle every field before replacing any, so that a failure leaves the object unchanged.
+            var restored = self.state;
+            var unpickled: usize = 0;
+            errdefer {
+                inline for (fields, 0..) |field, i| {
+                    if (i < unpickled) releaseValue(field.type, @field(restored, field.name));
+                }
+            }
+            inline for (fields, 0..) |field, i| {
+                @field(restored, field.name) = try unpickleValue(field.type, try state.getItem(py.PyObject, i));
+                unpickled += 1;
+            }
+
+            const replaced = self.state;
+            self.state = restored;
+            inline for (fields) |field| {
+                releaseValue(field.type, @field(replaced, field.name));
+            }
+        }
+
+        /// Release a value owned by the state, freeing slices and dropping references to Python objects.
+        fn releaseValue(comptime T: type, value: T) void {
+            if (comptime State.hasType(T, .attribute)) {
+                return releaseValue(@typeInfo(T).Struct.fields[0].type, value.value);
+            }
+            if (comptime isPicklableSlice(T)) {
+                // Fresh instances are zero-initialized, so they hold no slices.
+                if (value.len > 0) py.allocator.free(value);
+            } else if (comptime @typeInfo(T) == .Struct) {
+                // Nor do they hold Python objects.
+                if (@intFromPtr(py.object(value).py) != 0) py.object(value).decref();
+            }
+        }
+
+        fn pickleValue(comptime T: type, value: T, owner: py.PyObject, exports: *usize, protocol: i64) !py.PyObject {
+            if (comptime State.hasType(T, .attribute)) {
+                return pickleValue(@typeInfo(T).Struct.fields[0].type, value.value, owner, exports, protocol);
+            }
+            if (comptime isPicklableSlice(T)) {
+                const Child = @typeInfo(T).Pointer.child;
+                if (protocol < 5) {
+                    return (try py.PyBytes.create(std.mem.sliceAsBytes(value))).obj;
+                }
+
+                // The memoryview keeps the owner alive for as long as the buffer is retained by the pickler, and
+                // counts itself as an export so that __setstate__ cannot free the slice beneath it.
+                const view = try py.PyMemoryView.fromTrackedSlice(Child, value, owner, exports);
+                defer view.decref();
+
+                const pickle = try py.import("pickle");
+                defer pickle.decref();
+                return pickle.call(py.PyObject, "PickleBuffer", .{view}, .{});
+            }
+            if (comptime State.findDefinition(T) != null) {
+                @compileError("Pickling Pydust subclasses is not supported: " ++ @typeName(definition));
+            }
+            return py.create(value);
+        }
+
+        fn unpickleValue(comptime T: type, item: py.PyObject) !T {
+            if (comptime State.hasType(T, .attribute)) {
+                return .{ .value = try unpickleValue(@typeInfo(T).Struct.fields[0].type, item) };
+            }
+            if (comptime isPicklableSlice(T)) {
+                const Child = @typeInfo(T).Pointer.child;
+                const view = try item.getBuffer(py.PyBuffer.Flags.ND);
+                defer view.release();
+
+                const bytes = view.asSlice(u8);
+                if (bytes.len % @sizeOf(Child) != 0) {
+                    return py.ValueError.raise("pickled buffer is not a whole number of items");
+                }
+                const values = try py.allocator.alloc(Child, bytes.len / @sizeOf(Child));
+                @memcpy(std.mem.sliceAsBytes(values), bytes);
+                return values;
+            }
+
+            const value = try py.as(T, item);
+            if (comptime @typeInfo(T) == .Struct) {
+                // Python objects are borrowed from the state tuple, so we take our own reference.
+                py.object(value).incref();
+            }
+            return value;
+        }
+
+        fn isPicklableSlice(comptime T: type) bool {
+            return switch (@typeInfo(T)) {
+                .Pointer => |p| p.size == .Slice and (@typeInfo(p.child) == .Int or @typeInfo(p.child) == .Float),
+                else => false,
+            };
+        }
+    };
+}
+
 fn Members(comptime definition: type) type {
     return struct {
-        const count = State.countFieldsWithType(definition, .attribute);
+        const weakrefs = hasWeakrefs(definition);
+        const count = State.countFieldsWithType(definition, .attribute) + @intFromBool(weakrefs);
 
         const memberdefs: [count + 1]ffi.PyMemberDef = blk: {
             var defs: [count + 1]ffi.PyMemberDef = undefined;
             var idx = 0;
+
+            // The special __weaklistoffset__ member tells PyType_FromSpec where to find the weak reference list.
+            // CPython's default dealloc then takes care of clearing weak references for us.
+            // See https://docs.python.org/3/c-api/structures.html#member-flags
+            if (weakrefs) {
+                defs[idx] = ffi.PyMemberDef{
+                    .name = "__weaklistoffset__",
+                    .type = ffi.T_PYSSIZET,
+                    .offset = @offsetOf(PyTypeStruct(definition), "weakreflist"),
+                    .flags = ffi.READONLY,
+                    .doc = null,
+                };
+                idx += 1;
+            }
+
             for (@typeInfo(definition).Struct.fields) |field| {
                 if (!State.hasType(field.type, .attribute)) {
                     continue;
@@ -796,15 +1154,23 @@ fn BinaryOperator(
     comptime op: []const u8,
 ) type {
     return struct {
+        comptime {
+            probes.symbol(definition, op, call);
+        }
+
         fn call(pyself: *ffi.PyObject, pyother: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
             const func = @field(definition, op);
             const typeInfo = @typeInfo(@TypeOf(func)).Fn;
 
             if (typeInfo.params.len != 2) @compileError(op ++ " must take exactly two parameters");
 
+            var timer = stats.Timer.startConverting(definition, op);
+            defer timer.finish();
+
             // TODO(ngates): do we want to trampoline the self argument?
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const other = tramp.Trampoline(typeInfo.params[1].type.?).unwrap(.{ .py = pyother }) catch return null;
+            timer.converted();
 
             const result = tramp.coerceError(func(&self.state, other)) catch return null;
             return (py.createOwned(result) catch return null).py;
@@ -812,17 +1178,145 @@ fn BinaryOperator(
     };
 }
 
+/// Integer keys are bound to the sequence slots, skipping the PyLong argument of the mapping slots.
+/// CPython also adjusts negative indices by __len__ before calling into the sequence slots.
+fn isIndex(comptime Key: type) bool {
+    return @typeInfo(Key) == .Int;
+}
+
+fn castIndex(comptime Key: type, idx: ffi.Py_ssize_t) PyError!Key {
+    return std.math.cast(Key, idx) orelse return py.IndexError.raise("index out of range");
+}
+
+fn GetItem(comptime definition: type) type {
+    const func = definition.__getitem__;
+    const typeInfo = @typeInfo(@TypeOf(func)).Fn;
+    if (typeInfo.params.len != 2) @compileError("__getitem__ must take exactly two parameters");
+    const Key = typeInfo.params[1].type.?;
+
+    return struct {
+        const slot = if (isIndex(Key)) ffi.Py_sq_item else ffi.Py_mp_subscript;
+        const pfunc: *const anyopaque = if (isIndex(Key)) @ptrCast(&sq_item) else @ptrCast(&mp_subscript);
+
+        comptime {
+            probes.symbol(definition, "__getitem__", if (isIndex(Key)) sq_item else mp_subscript);
+        }
+
+        fn sq_item(pyself: *ffi.PyObject, idx: ffi.Py_ssize_t) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.startConverting(definition, "__getitem__");
+            defer timer.finish();
+
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself);
+            const key = castIndex(Key, idx) catch return null;
+            timer.converted();
+            const result = tramp.coerceError(func(&self.state, key)) catch return null;
+            return (py.createOwned(result) catch return null).py;
+        }
+
+        fn mp_subscript(pyself: *ffi.PyObject, pykey: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+            var timer = stats.Timer.startConverting(definition, "__getitem__");
+            defer timer.finish();
+
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself);
+            const key = tramp.Trampoline(Key).unwrap(.{ .py = pykey }) catch return null;
+            timer.converted();
+            const result = tramp.coerceError(func(&self.state, key)) catch return null;
+            return (py.createOwned(result) catch return null).py;
+        }
+    };
+}
+
+/// Item assignment and deletion share a single slot. CPython passes a null value to delete an item.
+fn SetItem(comptime definition: type) type {
+    const hasSet = @hasDecl(definition, "__setitem__");
+    const hasDel = @hasDecl(definition, "__delitem__");
+
+    const Key = blk: {
+        var Key_: ?type = null;
+        if (hasSet) {
+            const typeInfo = @typeInfo(@TypeOf(definition.__setitem__)).Fn;
+            if (typeInfo.params.len != 3) @compileError("__setitem__ must take exactly three parameters");
+            Key_ = typeInfo.params[1].type.?;
+        }
+        if (hasDel) {
+            const typeInfo = @typeInfo(@TypeOf(definition.__delitem__)).Fn;
+            if (typeInfo.params.len != 2) @compileError("__delitem__ must take exactly two parameters");
+            if (Key_ != null and Key_.? != typeInfo.params[1].type.?) {
+                @compileError("__setitem__ and __delitem__ must take the same key type");
+            }
+            Key_ = typeInfo.params[1].type.?;
+        }
+        break :blk Key_.?;
+    };
+
+    return struct {
+        const slot = if (isIndex(Key)) ffi.Py_sq_ass_item else ffi.Py_mp_ass_subscript;
+        const pfunc: *const anyopaque = if (isIndex(Key)) @ptrCast(&sq_ass_item) else @ptrCast(&mp_ass_subscript);
+
+        comptime {
+            probes.symbol(definition, "__setitem__", if (isIndex(Key)) sq_ass_item else mp_ass_subscript);
+        }
+
+        fn sq_ass_item(pyself: *ffi.PyObject, idx: ffi.Py_ssize_t, pyvalue: ?*ffi.PyObject) callconv(.C) c_int {
+            var timer = stats.Timer.startConverting(definition, "__setitem__");
+            defer timer.finish();
+
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself);
+            const key = castIndex(Key, idx) catch return -1;
+            assign(&self.state, key, pyvalue, &timer) catch return -1;
+            return 0;
+        }
+
+        fn mp_ass_subscript(pyself: *ffi.PyObject, pykey: *ffi.PyObject, pyvalue: ?*ffi.PyObject) callconv(.C) c_int {
+            var timer = stats.Timer.startConverting(definition, "__setitem__");
+            defer timer.finish();
+
+            const self: *PyTypeStruct(definition) = @ptrCast(pyself);
+            const key = tramp.Trampoline(Key).unwrap(.{ .py = pykey }) catch return -1;
+            assign(&self.state, key, pyvalue, &timer) catch return -1;
+            return 0;
+        }
+
+        inline fn assign(self: *definition, key: Key, pyvalue: ?*ffi.PyObject, timer: *stats.Timer) PyError!void {
+            if (pyvalue) |pv| {
+                if (comptime hasSet) {
+                    const Value = @typeInfo(@TypeOf(definition.__setitem__)).Fn.params[2].type.?;
+                    const value = try tramp.Trampoline(Value).unwrap(.{ .py = pv });
+                    timer.converted();
+                    try tramp.coerceError(definition.__setitem__(self, key, value));
+                } else {
+                    return py.TypeError.raise("object does not support item assignment");
+                }
+            } else {
+                timer.converted();
+                if (comptime hasDel) {
+                    try tramp.coerceError(definition.__delitem__(self, key));
+                } else {
+                    return py.TypeError.raise("object does not support item deletion");
+                }
+            }
+        }
+    };
+}
+
 fn UnaryOperator(
     comptime definition: type,
     comptime op: []const u8,
 ) type {
     return struct {
+        comptime {
+            probes.symbol(definition, op, call);
+        }
+
         fn call(pyself: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
             const func = @field(definition, op);
             const typeInfo = @typeInfo(@TypeOf(func)).Fn;
 
             if (typeInfo.params.len != 1) @compileError(op ++ " must take exactly one parameter");
 
+            var timer = stats.Timer.start(definition, op);
+            defer timer.finish();
+
             // TODO(ngates): do we want to trampoline the self argument?
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
 
@@ -837,6 +1331,10 @@ fn EqualsOperator(
     comptime op: []const u8,
 ) type {
     return struct {
+        comptime {
+            probes.symbol(definition, op, call);
+        }
+
         const equals = std.mem.eql(u8, op, "__eq__");
         fn call(pyself: *ffi.PyObject, pyother: *ffi.PyObject) callconv(.C) ?*ffi.PyObject {
             const func = @field(definition, op);
@@ -845,6 +1343,9 @@ fn EqualsOperator(
             if (typeInfo.params.len != 2) @compileError(op ++ " must take exactly two parameters");
             const Other = typeInfo.params[1].type.?;
 
+            var timer = stats.Timer.startConverting(definition, op);
+            defer timer.finish();
+
             // If Other arg type is the same as Self, and Other is not a subclass of Self,
             // then we can short-cut and return not-equal.
             if (Other == *const definition) {
@@ -860,6 +1361,7 @@ fn EqualsOperator(
 
             const self: *PyTypeStruct(definition) = @ptrCast(pyself);
             const other = tramp.Trampoline(Other).unwrap(.{ .py = pyother }) catch return null;
+            timer.converted();
 
             const result = tramp.coerceError(func(&self.state, other)) catch return null;
             return (py.createOwned(result) catch return null).py;
@@ -894,6 +1396,10 @@ fn RichCompare(comptime definition: type) type {
 
         const compare = if (@hasDecl(definition, richCmpName)) richCompare else builtCompare;
 
+        comptime {
+            if (@hasDecl(definition, richCmpName)) probes.symbol(definition, richCmpName, richCompare);
+        }
+
         fn richCompare(pyself: *ffi.PyObject, pyother: *ffi.PyObject, op: c_int) callconv(.C) ?*ffi.PyObject {
             const func = definition.__richcompare__;
             const typeInfo = @typeInfo(@TypeOf(func)).Fn;
@@ -905,9 +1411,13 @@ fn RichCompare(comptime definition: type) type {
             const CompareOpArg = typeInfo.params[2].type.?;
             if (CompareOpArg != py.CompareOp) @compileError("Third parameter of __richcompare__ must be a py.CompareOp");
 
+            var timer = stats.Timer.startConverting(definition, richCmpName);
+            defer timer.finish();
+
             const self = py.unchecked(Self, .{ .py = pyself });
             const otherArg = tramp.Trampoline(Other).unwrap(.{ .py = pyother }) catch return null;
             const opEnum: py.CompareOp = @enumFromInt(op);
+            timer.converted();
 
             const result = tramp.coerceError(func(self, otherArg, opEnum)) catch return null;
             return (py.createOwned(result) catch return null).py;
@@ -0,0 +1,182 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Per-function call statistics recorded by the trampolines when built with the `stats` option.
+///
+/// When disabled, timers only hold the USDT probe of the call, which is itself empty unless probes are enabled, so the
+/// instrumentation compiles out.
+const std = @import("std");
+const py = @import("pydust.zig");
+const ffi = py.ffi;
+const probes = @import("probes.zig");
+const Probe = probes.Probe;
+const pyconf = @import("pyconf");
+
+pub const enabled = @hasDecl(pyconf, "stats") and pyconf.stats;
+
+/// Bucket i of the latency histogram counts calls taking [2^i, 2^(i+1)) nanoseconds.
+pub const buckets = 32;
+
+/// The statistics of a single wrapped function or slot.
+pub const Site = struct {
+    name: []const u8,
+    calls: u64 = 0,
+    errors: u64 = 0,
+    total_ns: u64 = 0,
+    convert_ns: u64 = 0,
+    body_ns: u64 = 0,
+    histogram: [buckets]u64 = [_]u64{0} ** buckets,
+
+    registered: bool = false,
+    next: ?*Site = null,
+};
+
+// An intrusive list of every site that has been called at least once.
+var sites: ?*Site = null;
+
+/// Times a single call of a wrapped function or slot. Start the timer on entry, mark when the arguments have been
+/// converted, and finish the timer on exit. Calls that return with a Python exception set are counted as errors.
+///
+/// Trampolines that convert arguments start the timer with startConverting, so that calls failing in conversion
+/// are attributed to the conversion rather than to the body.
+///
+/// Timers also fire the USDT probes of the trampoline, when those are enabled.
+pub const Timer = if (enabled) struct {
+    site: *Site,
+    begin: ?std.time.Instant,
+    converts: bool,
+    convertedAt: ?std.time.Instant = null,
+    probe: Probe,
+
+    pub inline fn start(comptime definition: type, comptime name: []const u8) Timer {
+        return init(definition, name, false);
+    }
+
+    pub inline fn startConverting(comptime definition: type, comptime name: []const u8) Timer {
+        return init(definition, name, true);
+    }
+
+    inline fn init(comptime definition: type, comptime name: []const u8, comptime converts: bool) Timer {
+        const site = &Storage(definition, name).site;
+        if (!@atomicLoad(bool, &site.registered, .Monotonic)) register(site);
+        const probe = Probe.enter(definition, name);
+        return .{ .site = site, .begin = std.time.Instant.now() catch null, .converts = converts, .probe = probe };
+    }
+
+    pub inline fn converted(self: *Timer) void {
+        self.convertedAt = std.time.Instant.now() catch null;
+    }
+
+    pub inline fn finish(self: *const Timer) void {
+        defer self.probe.exit();
+
+        const begin = self.begin orelse return;
+        const end = std.time.Instant.now() catch return;
+        const elapsed = end.since(begin);
+        const site = self.site;
+
+        // Calls normally hold the GIL, so these atomics are uncontended.
+        _ = @atomicRmw(u64, &site.calls, .Add, 1, .Monotonic);
+        _ = @atomicRmw(u64, &site.total_ns, .Add, elapsed, .Monotonic);
+        if (self.convertedAt) |convertedAt| {
+            _ = @atomicRmw(u64, &site.convert_ns, .Add, convertedAt.since(begin), .Monotonic);
+            _ = @atomicRmw(u64, &site.body_ns, .Add, end.since(convertedAt), .Monotonic);
+        } else if (self.converts) {
+            // The call failed before reaching the body.
+            _ = @atomicRmw(u64, &site.convert_ns, .Add, elapsed, .Monotonic);
+        } else {
+            _ = @atomicRmw(u64, &site.body_ns, .Add, elapsed, .Monotonic);
+        }
+        if (ffi.PyErr_Occurred() != null) {
+            _ = @atomicRmw(u64, &site.errors, .Add, 1, .Monotonic);
+        }
+
+        const bucket = @min(buckets - 1, std.math.log2_int(u64, elapsed | 1));
+        _ = @atomicRmw(u64, &site.histogram[bucket], .Add, 1, .Monotonic);
+    }
+} else struct {
+    probe: Probe,
+
+    pub inline fn start(comptime definition: type, comptime name: []const u8) Timer {
+        return .{ .probe = Probe.enter(definition, name) };
+    }
+
+    pub inline fn startConverting(comptime definition: type, comptime name: []const u8) Timer {
+        return start(definition, name);
+    }
+
+    pub inline fn converted(self: *Timer) void {
+        _ = self;
+    }
+
+    pub inline fn finish(self: *const Timer) void {
+        self.probe.exit();
+    }
+};
+
+fn Storage(comptime definition: type, comptime name: []const u8) type {
+    return struct {
+        // Keyed by the full path, so functions of nested classes of the same name are counted separately.
+        var site: Site = .{ .name = probes.qualifiedName(definition, name) };
+    };
+}
+
+fn register(site: *Site) void {
+    if (@atomicRmw(bool, &site.registered, .Xchg, true, .AcqRel)) return;
+    var head = @atomicLoad(?*Site, &sites, .Acquire);
+    while (true) {
+        site.next = head;
+        head = @cmpxchgWeak(?*Site, &sites, head, site, .Release, .Acquire) orelse return;
+    }
+}
+
+/// The methods added to the root module, `__pydust_stats__` when stats are enabled.
+pub const methoddefs: []const ffi.PyMethodDef = if (enabled) &.{.{
+    .ml_name = "__pydust_stats__",
+    .ml_meth = @ptrCast(&pydust_stats),
+    .ml_flags = ffi.METH_NOARGS,
+    .ml_doc = "__pydust_stats__($module, /)\n--\n\nReturn the call statistics of each Pydust function and slot.",
+}} else &.{};
+
+fn pydust_stats(pymodule: *ffi.PyObject, unused: ?*ffi.PyObject) callconv(.C) ?*ffi.PyObject {
+    _ = pymodule;
+    _ = unused;
+    const result = collect() catch return null;
+    return result.obj.py;
+}
+
+/// Returns a dict of qualified function name to its statistics.
+fn collect() !py.PyDict {
+    const result = try py.PyDict.new();
+    errdefer result.decref();
+
+    var next = @atomicLoad(?*Site, &sites, .Acquire);
+    while (next) |site| : (next = site.next) {
+        const entry = try py.PyDict.create(.{
+            .calls = @atomicLoad(u64, &site.calls, .Monotonic),
+            .errors = @atomicLoad(u64, &site.errors, .Monotonic),
+            .total_ns = @atomicLoad(u64, &site.total_ns, .Monotonic),
+            .convert_ns = @atomicLoad(u64, &site.convert_ns, .Monotonic),
+            .body_ns = @atomicLoad(u64, &site.body_ns, .Monotonic),
+        });
+        errdefer entry.decref();
+
+        const histogram = try py.PyList.new(0);
+        try entry.setOwnedItem("histogram", histogram);
+        for (&site.histogram) |*count| {
+            try histogram.append(@atomicLoad(u64, count, .Monotonic));
+        }
+
+        try result.setOwnedItem(site.name, entry);
+    }
+    return result;
+}
@@ -0,0 +1,41 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Prints the .pyi stub of a Pydust module, or with `--check <path>`, checks that an existing stub is up to date.
+/// The module is compiled with the `stubs` build option, so its root module exports the stub generated at comptime.
+const std = @import("std");
+
+comptime {
+    _ = @import("module");
+}
+
+extern fn pydust_stub() [*:0]const u8;
+
+pub fn main() !void {
+    var arena = std.heap.ArenaAllocator.init(std.heap.page_allocator);
+    defer arena.deinit();
+    const allocator = arena.allocator();
+
+    const stub = std.mem.span(pydust_stub());
+
+    const args = try std.process.argsAlloc(allocator);
+    if (args.len == 3 and std.mem.eql(u8, args[1], "--check")) {
+        const existing = try std.fs.cwd().readFileAlloc(allocator, args[2], std.math.maxInt(u32));
+        if (!std.mem.eql(u8, existing, stub)) {
+            std.debug.print("Contents of {s} are out of date. Please run generate-stubs\n", .{args[2]});
+            std.process.exit(1);
+        }
+        return;
+    }
+
+    try std.io.getStdOut().writeAll(stub);
+}
@@ -0,0 +1,369 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Generates .pyi stubs at compile time from the same comptime definitions used to build the module.
+///
+/// Argument and return types are derived from the Zig types, following the conversions made by the trampoline.
+const std = @import("std");
+const py = @import("pydust.zig");
+const ffi = py.ffi;
+const State = @import("discovery.zig").State;
+const funcs = @import("functions.zig");
+const stats = @import("stats.zig");
+const mem = @import("mem.zig");
+
+const indentUnit = "    ";
+
+/// The Python types of Pydust's object wrappers.
+const objectTypes = .{
+    .{ py.PyBool, "bool" },
+    .{ py.PyBytes, "bytes" },
+    .{ py.PyDict, "dict" },
+    .{ py.PyFloat, "float" },
+    .{ py.PyFrozenSet, "frozenset" },
+    .{ py.PyList, "list" },
+    .{ py.PyLong, "int" },
+    .{ py.PyMemoryView, "memoryview" },
+    .{ py.PySet, "set" },
+    .{ py.PySlice, "slice" },
+    .{ py.PyString, "str" },
+    .{ py.PyTuple, "tuple" },
+    .{ py.PyType, "type" },
+};
+
+/// Returns the .pyi stub of a root module.
+pub fn stub(comptime definition: type) [:0]const u8 {
+    @setEvalBranchQuota(1_000_000);
+    // The diagnostic functions that are enabled by build options are added to the root module only.
+    var diagnostics: []const u8 = "";
+    for (stats.methoddefs ++ mem.methoddefs) |def| {
+        diagnostics = diagnostics ++ "def " ++ std.mem.span(def.ml_name) ++ "() -> dict: ...\n";
+    }
+    const blocks = docstring(definition, "") ++ .{"from __future__ import annotations\n"} ++ moduleBlocks(definition, "", diagnostics);
+    return std.fmt.comptimePrint("{s}", .{join(blocks, "\n")});
+}
+
+/// Returns the Python type annotation of a Zig type, as converted to and from Python by the trampoline.
+pub fn pyType(comptime T: type) []const u8 {
+    if (T == py.PyObject) {
+        return "object";
+    }
+    inline for (objectTypes) |entry| {
+        if (T == entry[0]) {
+            return entry[1];
+        }
+    }
+
+    return switch (@typeInfo(T)) {
+        .Void => "None",
+        .Bool => "bool",
+        .Int, .ComptimeInt => "int",
+        .Float, .ComptimeFloat => "float",
+        .ErrorUnion => |e| pyType(e.payload),
+        .Optional => |o| pyType(o.child) ++ " | None",
+        .Pointer => |p| blk: {
+            if (p.child == u8 and p.size == .Slice) {
+                break :blk "str";
+            }
+            if (@typeInfo(p.child) == .Array and @typeInfo(p.child).Array.child == u8) {
+                break :blk "str";
+            }
+            if (State.findDefinition(p.child)) |def| {
+                if (def.type == .class) {
+                    if (State.findIdentifier(p.child)) |id| {
+                        break :blk relativeName(id.qualifiedName);
+                    }
+                }
+            }
+            break :blk "object";
+        },
+        .Struct => |s| blk: {
+            if (s.is_tuple) {
+                var items: []const []const u8 = &.{};
+                for (s.fields) |field| {
+                    items = items ++ .{pyType(field.type)};
+                }
+                break :blk "tuple[" ++ join(items, ", ") ++ "]";
+            }
+            if (py.isHashSet(T)) {
+                break :blk "set";
+            }
+            // Any other wrapped Python object.
+            if (@hasField(T, "obj")) {
+                break :blk "object";
+            }
+            // Plain structs are converted to and from dicts.
+            break :blk "dict";
+        },
+        else => "object",
+    };
+}
+
+/// The stub of a module as blocks separated by blank lines: its functions, classes and submodules.
+fn moduleBlocks(comptime definition: type, comptime indent: []const u8, comptime extra: []const u8) []const []const u8 {
+    var functions: []const u8 = extra;
+    var blocks: []const []const u8 = &.{};
+    var submodules: []const []const u8 = &.{};
+
+    for (@typeInfo(definition).Struct.decls) |decl| {
+        // Private and special names are hidden from module stubs.
+        if (std.mem.startsWith(u8, decl.name, "_")) {
+            continue;
+        }
+
+        const value = @field(definition, decl.name);
+        if (@typeInfo(@TypeOf(value)) == .Fn) {
+            if (!State.isPrivate(&value)) {
+                functions = functions ++ method(definition, decl.name, value, false, indent);
+            }
+        } else if (State.findDefinition(value)) |def| {
+            switch (def.type) {
+                .class => blocks = blocks ++ .{class(decl.name, value, indent)},
+                // Submodules are stubbed as classes, since a .pyi file cannot declare nested modules.
+                .module => submodules = submodules ++ .{
+                    indent ++ "class " ++ decl.name ++ ":\n" ++ body(docstring(value, indent ++ indentUnit) ++ moduleBlocks(value, indent ++ indentUnit, ""), indent),
+                },
+                else => {},
+            }
+        }
+    }
+
+    const functionsBlock: []const []const u8 = if (functions.len > 0) &.{functions} else &.{};
+    return functionsBlock ++ blocks ++ submodules;
+}
+
+fn class(comptime name: []const u8, comptime definition: type, comptime indent: []const u8) []const u8 {
+    const inner = indent ++ indentUnit;
+
+    var bases: []const []const u8 = &.{};
+    var attributes: []const u8 = "";
+    var properties: []const u8 = "";
+    for (@typeInfo(definition).Struct.fields) |field| {
+        if (State.hasType(field.type, .class)) {
+            bases = bases ++ .{pyType(*const field.type)};
+        } else if (State.hasType(field.type, .attribute)) {
+            attributes = attributes ++ inner ++ field.name ++ ": " ++ pyType(@typeInfo(field.type).Struct.fields[0].type) ++ "\n";
+        } else if (State.hasType(field.type, .property)) {
+            properties = properties ++ property(field.name, field.type, inner);
+        }
+    }
+
+    // Attributes come first, followed by the constructor, properties and then the remaining functions.
+    var members = attributes;
+    if (@hasDecl(definition, "__init__")) {
+        members = members ++ method(definition, "__init__", definition.__init__, true, inner);
+    }
+    members = members ++ properties;
+
+    var classes: []const []const u8 = &.{};
+    for (@typeInfo(definition).Struct.decls) |decl| {
+        const value = @field(definition, decl.name);
+        if (@typeInfo(@TypeOf(value)) == .Fn) {
+            if (std.mem.eql(u8, decl.name, "__init__")) {
+                continue;
+            }
+            if (funcs.isReserved(decl.name)) {
+                members = members ++ slot(definition, decl.name, inner);
+            } else if (!State.isPrivate(&value)) {
+                members = members ++ method(definition, decl.name, value, true, inner);
+            }
+        } else if (State.findDefinition(value)) |def| {
+            // Skip aliases of the class itself, e.g. `pub const Self = @This();`
+            if (def.type == .class and value != definition) {
+                classes = classes ++ .{class(decl.name, value, inner)};
+            }
+        }
+    }
+
+    const header = indent ++ "class " ++ name ++ (if (bases.len > 0) "(" ++ join(bases, ", ") ++ ")" else "") ++ ":\n";
+    const membersBlock: []const []const u8 = if (members.len > 0) &.{members} else &.{};
+    return header ++ body(docstring(definition, inner) ++ membersBlock ++ classes, indent);
+}
+
+/// Join the blocks of a class body, or elide the body if it is empty.
+fn body(comptime blocks: []const []const u8, comptime indent: []const u8) []const u8 {
+    return if (blocks.len > 0) join(blocks, "\n") else indent ++ indentUnit ++ "...\n";
+}
+
+/// The stub of a function, along with the functions of its cache if it is memoized.
+fn method(comptime definition: type, comptime name: []const u8, comptime func: anytype, comptime inClass: bool, comptime indent: []const u8) []const u8 {
+    const sig = funcs.parseSignature(name, @typeInfo(@TypeOf(func)).Fn, &.{ py.PyObject, *definition, *const definition });
+    var result = function(sig, inClass, indent);
+
+    if (State.findMemoized(&func)) |Cache| {
+        inline for (.{ "cache_info", "cache_clear" }) |suffix| {
+            const cacheFunc = @field(Cache, suffix);
+            result = result ++ function(funcs.parseSignature(name ++ "_" ++ suffix, @typeInfo(@TypeOf(cacheFunc)).Fn, &.{py.PyModule}), inClass, indent);
+        }
+    }
+    return result;
+}
+
+fn function(comptime sig: funcs.Signature, comptime inClass: bool, comptime indent: []const u8) []const u8 {
+    // Class functions without a self parameter are registered as static methods. Module functions never take one.
+    const decorator = if (inClass and sig.selfParam == null) indent ++ "@staticmethod\n" else "";
+    const selfArg: []const []const u8 = if (inClass and sig.selfParam != null) &.{"self"} else &.{};
+    return decorator ++ indent ++ "def " ++ sig.name ++ "(" ++ join(selfArg ++ params(sig), ", ") ++ ") -> " ++ pyType(sig.returnType) ++ ": ...\n";
+}
+
+/// The parameters of a function, where fields with defaults are keyword-only and all others are positional-only.
+fn params(comptime sig: funcs.Signature) []const []const u8 {
+    const Args = sig.argsParam orelse return &.{};
+
+    var positional: []const []const u8 = &.{};
+    var keyword: []const []const u8 = &.{};
+    var varargs: ?[]const u8 = null;
+    var varkwargs: ?[]const u8 = null;
+    for (@typeInfo(Args).Struct.fields) |field| {
+        if (field.type == py.Args) {
+            varargs = "*" ++ field.name;
+        } else if (field.type == py.Kwargs) {
+            varkwargs = "**" ++ field.name;
+        } else if (field.default_value) |def| {
+            keyword = keyword ++ .{field.name ++ ": " ++ pyType(field.type) ++ " = " ++ defaultValue(field.type, def)};
+        } else {
+            positional = positional ++ .{field.name ++ ": " ++ pyType(field.type)};
+        }
+    }
+
+    var result = positional;
+    if (positional.len > 0) {
+        result = result ++ .{"/"};
+    }
+    if (varargs) |v| {
+        result = result ++ .{v};
+    } else if (keyword.len > 0) {
+        result = result ++ .{"*"};
+    }
+    result = result ++ keyword;
+    if (varkwargs) |v| {
+        result = result ++ .{v};
+    }
+    return result;
+}
+
+fn defaultValue(comptime T: type, comptime ptr: *const anyopaque) []const u8 {
+    const value = @as(*const T, @alignCast(@ptrCast(ptr))).*;
+    return switch (@typeInfo(T)) {
+        .Bool => if (value) "True" else "False",
+        .Int, .ComptimeInt => std.fmt.comptimePrint("{d}", .{value}),
+        .Float, .ComptimeFloat => blk: {
+            if (!std.math.isFinite(value)) {
+                break :blk "...";
+            }
+            const text = std.fmt.comptimePrint("{d}", .{value});
+            break :blk if (std.mem.indexOfAny(u8, text, ".e") == null) text ++ ".0" else text;
+        },
+        .Optional => if (value == null) "None" else "...",
+        .Pointer => |p| if (p.child == u8 and p.size == .Slice) std.fmt.comptimePrint("\"{s}\"", .{value}) else "...",
+        else => "...",
+    };
+}
+
+/// The stub of a slot, such as an operator. Richcompare is expanded into each of the comparison methods.
+fn slot(comptime definition: type, comptime name: []const u8, comptime indent: []const u8) []const u8 {
+    const func = @typeInfo(@TypeOf(@field(definition, name))).Fn;
+
+    if (std.mem.eql(u8, name, "__richcompare__")) {
+        var result: []const u8 = "";
+        inline for (funcs.compareFuncs) |op| {
+            result = result ++ indent ++ "def " ++ op ++ "(self, other: " ++ pyType(func.params[1].type.?) ++ ", /) -> " ++ pyType(func.return_type.?) ++ ": ...\n";
+        }
+        return result;
+    }
+
+    // These slots have no Python-visible method.
+    inline for (.{ "__del__", "__new__", "__buffer__", "__release_buffer__" }) |hidden| {
+        if (std.mem.eql(u8, name, hidden)) {
+            return "";
+        }
+    }
+
+    const names: []const []const u8 = if (std.mem.eql(u8, name, "__setitem__"))
+        &.{ "key", "value" }
+    else if (std.mem.eql(u8, name, "__getitem__") or std.mem.eql(u8, name, "__delitem__") or std.mem.eql(u8, name, "__contains__"))
+        &.{"key"}
+    else if (std.mem.eql(u8, name, "__getattr__"))
+        &.{"name"}
+    else
+        &.{"other"};
+
+    var args: []const []const u8 = &.{"self"};
+    for (func.params[1..], 0..) |param, i| {
+        const argName = if (i < names.len) names[i] else std.fmt.comptimePrint("arg{d}", .{i});
+        args = args ++ .{argName ++ ": " ++ pyType(param.type.?)};
+    }
+    if (func.params.len > 1) {
+        args = args ++ .{"/"};
+    }
+
+    // Iterators return null to signal the end of iteration, which is never seen by Python.
+    var Return = func.return_type.?;
+    if (std.mem.eql(u8, name, "__next__")) {
+        if (@typeInfo(Return) == .ErrorUnion) Return = @typeInfo(Return).ErrorUnion.payload;
+        if (@typeInfo(Return) == .Optional) Return = @typeInfo(Return).Optional.child;
+    }
+
+    return indent ++ "def " ++ name ++ "(" ++ join(args, ", ") ++ ") -> " ++ pyType(Return) ++ ": ...\n";
+}
+
+fn property(comptime name: []const u8, comptime definition: type, comptime indent: []const u8) []const u8 {
+    if (!@hasDecl(definition, "get")) {
+        return "";
+    }
+    var result = indent ++ "@property\n" ++ indent ++ "def " ++ name ++ "(self) -> " ++ pyType(@typeInfo(@TypeOf(definition.get)).Fn.return_type.?) ++ ": ...\n";
+    if (@hasDecl(definition, "set")) {
+        const Value = @typeInfo(@TypeOf(definition.set)).Fn.params[1].type.?;
+        result = result ++ indent ++ "@" ++ name ++ ".setter\n" ++ indent ++ "def " ++ name ++ "(self, value: " ++ pyType(Value) ++ ") -> None: ...\n";
+    }
+    return result;
+}
+
+/// The docstring of a module or class as a single block, if it has one.
+fn docstring(comptime definition: type, comptime indent: []const u8) []const []const u8 {
+    if (!@hasDecl(definition, "__doc__")) {
+        return &.{};
+    }
+    var result: []const u8 = indent ++ "\"\"\"\n";
+    var lines = std.mem.splitScalar(u8, definition.__doc__, '\n');
+    while (lines.next()) |line| {
+        result = result ++ (if (line.len > 0) indent ++ line else "") ++ "\n";
+    }
+    return &.{result ++ indent ++ "\"\"\"\n"};
+}
+
+/// Join the names of a qualified name relative to the root module, e.g. `submodule.Class`.
+fn relativeName(comptime qualifiedName: []const [:0]const u8) []const u8 {
+    var parts: []const []const u8 = &.{};
+    for (qualifiedName[1..]) |part| {
+        parts = parts ++ .{@as([]const u8, part)};
+    }
+    return join(parts, ".");
+}
+
+fn join(comptime parts: []const []const u8, comptime sep: []const u8) []const u8 {
+    var result: []const u8 = "";
+    for (parts, 0..) |part, i| {
+        result = result ++ (if (i > 0) sep else "") ++ part;
+    }
+    return result;
+}
+
+test "pyType" {
+    try std.testing.expectEqualStrings("int", comptime pyType(u32));
+    try std.testing.expectEqualStrings("float | None", comptime pyType(?f64));
+    try std.testing.expectEqualStrings("str", comptime pyType(anyerror![]const u8));
+    try std.testing.expectEqualStrings("tuple[int, bool]", comptime pyType(struct { i64, bool }));
+    try std.testing.expectEqualStrings("dict", comptime pyType(struct { x: f64 }));
+    try std.testing.expectEqualStrings("str", comptime pyType(py.PyString));
+    try std.testing.expectEqualStrings("None", comptime pyType(void));
+}
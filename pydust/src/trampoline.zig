@@ -45,6 +45,12 @@ pub fn Trampoline(comptime T: type) type {
                     if (obj) |object| Trampoline(o.child).decref_objectlike(object);
                 },
                 .Struct => |s| {
+                    // Zig hash sets are converted to Python sets, so we release the Zig allocation.
+                    if (comptime py.isHashSet(T)) {
+                        var owned = obj;
+                        owned.deinit();
+                        return;
+                    }
                     inline for (s.fields) |f| {
                         Trampoline(f.type).decref_objectlike(@field(obj, f.name));
                     }
@@ -57,6 +63,37 @@ pub fn Trampoline(comptime T: type) type {
             }
         }
 
+        /// Recursively incref any PyObjects found in a native Zig type, e.g. to keep the objects borrowed by a
+        /// converted value alive beyond the Python object it was converted from.
+        pub inline fn incref_objectlike(obj: T) void {
+            if (isObjectLike()) {
+                asObject(obj).incref();
+                return;
+            }
+            switch (@typeInfo(T)) {
+                .ErrorUnion => |e| {
+                    Trampoline(e.payload).incref_objectlike(obj catch return);
+                },
+                .Optional => |o| {
+                    if (obj) |object| Trampoline(o.child).incref_objectlike(object);
+                },
+                .Struct => |s| {
+                    // Zig hash sets own their elements, so there is nothing to incref.
+                    if (comptime py.isHashSet(T)) {
+                        return;
+                    }
+                    inline for (s.fields) |f| {
+                        Trampoline(f.type).incref_objectlike(@field(obj, f.name));
+                    }
+                },
+                // Borrowed slices, e.g. of a PyString, cannot be kept alive without their object.
+                .Pointer, .Array, .Union => {
+                    @compileError("Object incref not supported for type: " ++ @typeName(T));
+                },
+                else => {},
+            }
+        }
+
         /// Wraps an object that already represents an existing Python object.
         /// In other words, Zig primitive types are not supported.
         pub inline fn asObject(obj: T) py.PyObject {
@@ -176,6 +213,11 @@ pub fn Trampoline(comptime T: type) type {
                         return (try py.PyTuple.create(obj)).obj;
                     }
 
+                    // If the struct is a hash set, e.g. std.AutoHashMap(T, void), convert into a Python set
+                    if (comptime py.isHashSet(T)) {
+                        return (try py.PySet.create(obj)).obj;
+                    }
+
                     // Otherwise, return a Python dictionary
                     return (try py.PyDict.create(obj)).obj;
                 },
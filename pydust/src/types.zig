@@ -10,6 +10,7 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+pub usingnamespace @import("types/arrow.zig");
 pub usingnamespace @import("types/bool.zig");
 pub usingnamespace @import("types/buffer.zig");
 pub usingnamespace @import("types/bytes.zig");
@@ -25,6 +26,7 @@ pub usingnamespace @import("types/long.zig");
 pub usingnamespace @import("types/memoryview.zig");
 pub usingnamespace @import("types/module.zig");
 pub usingnamespace @import("types/obj.zig");
+pub usingnamespace @import("types/set.zig");
 pub usingnamespace @import("types/slice.zig");
 pub usingnamespace @import("types/str.zig");
 pub usingnamespace @import("types/tuple.zig");
@@ -0,0 +1,522 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+const std = @import("std");
+const py = @import("../pydust.zig");
+const ffi = py.ffi;
+const PyError = @import("../errors.zig").PyError;
+
+/// The Arrow C Data Interface schema struct.
+/// See: https://arrow.apache.org/docs/format/CDataInterface.html
+pub const ArrowSchema = extern struct {
+    const Self = @This();
+
+    pub const Flags = struct {
+        pub const DICTIONARY_ORDERED: i64 = 1;
+        pub const NULLABLE: i64 = 2;
+        pub const MAP_KEYS_SORTED: i64 = 4;
+    };
+
+    format: [*:0]const u8,
+    name: ?[*:0]const u8 = null,
+    metadata: ?[*]const u8 = null,
+    flags: i64 = 0,
+    n_children: i64 = 0,
+    children: ?[*]*ArrowSchema = null,
+    dictionary: ?*ArrowSchema = null,
+    // A null release callback marks the struct as released (or moved).
+    release: ?*const fn (*ArrowSchema) callconv(.C) void = null,
+    private_data: ?*anyopaque = null,
+
+    pub usingnamespace CapsuleMixin("arrow_schema", Self);
+
+    /// Construct a nullable schema describing a column of Zig type T.
+    /// The format string is static, so the schema owns no memory.
+    pub fn init(comptime T: type) Self {
+        return .{
+            .format = getFormat(T).ptr,
+            .name = "",
+            .flags = Flags.NULLABLE,
+            .release = &releaseStatic,
+        };
+    }
+
+    /// Release the schema if it has not already been released or moved.
+    pub fn deinit(self: *Self) void {
+        if (self.release) |release| release(self);
+    }
+
+    pub fn formatSlice(self: *const Self) [:0]const u8 {
+        return std.mem.span(self.format);
+    }
+
+    /// Returns the Arrow format string for the given Zig type.
+    pub fn getFormat(comptime T: type) [:0]const u8 {
+        switch (@typeInfo(T)) {
+            // Arrow booleans are bit-packed, which our views of native Zig slices cannot represent.
+            .Bool => @compileError("Arrow bit-packed booleans are not supported"),
+            .Int => |i| {
+                switch (i.signedness) {
+                    .unsigned => switch (i.bits) {
+                        8 => return "C",
+                        16 => return "S",
+                        32 => return "I",
+                        64 => return "L",
+                        else => {},
+                    },
+                    .signed => switch (i.bits) {
+                        8 => return "c",
+                        16 => return "s",
+                        32 => return "i",
+                        64 => return "l",
+                        else => {},
+                    },
+                }
+            },
+            .Float => |f| {
+                switch (f.bits) {
+                    16 => return "e",
+                    32 => return "f",
+                    64 => return "g",
+                    else => {},
+                }
+            },
+            .Pointer => |p| {
+                // Variable-length UTF-8 strings with 32-bit offsets.
+                if (p.size == .Slice and p.child == u8) {
+                    return "u";
+                }
+            },
+            else => {},
+        }
+
+        @compileError("Unsupported Arrow value type " ++ @typeName(T));
+    }
+
+    fn releaseStatic(self: *ArrowSchema) callconv(.C) void {
+        self.release = null;
+    }
+};
+
+/// The Arrow C Data Interface array struct.
+/// See: https://arrow.apache.org/docs/format/CDataInterface.html
+pub const ArrowArray = extern struct {
+    const Self = @This();
+
+    length: i64,
+    null_count: i64,
+    offset: i64 = 0,
+    n_buffers: i64,
+    n_children: i64 = 0,
+    buffers: ?[*]?*const anyopaque,
+    children: ?[*]*ArrowArray = null,
+    dictionary: ?*ArrowArray = null,
+    // A null release callback marks the struct as released (or moved).
+    release: ?*const fn (*ArrowArray) callconv(.C) void = null,
+    private_data: ?*anyopaque = null,
+
+    pub usingnamespace CapsuleMixin("arrow_array", Self);
+
+    /// Construct an array viewing a slice of primitive values without copying.
+    ///
+    /// The optional validity bitmap holds one bit per value, least-significant bit first.
+    /// The owner is kept alive until the consumer releases the array, so the values must live as long as the owner.
+    pub fn fromSlice(comptime T: type, data: []const T, validity: ?[]const u8, owner: anytype) !Self {
+        if (@typeInfo(T) != .Int and @typeInfo(T) != .Float) {
+            @compileError("Arrow arrays can only be created from slices of ints or floats");
+        }
+        return try exportBuffers(data.len, validity, &.{std.mem.sliceAsBytes(data).ptr}, owner);
+    }
+
+    /// Construct a UTF-8 string array from offsets and data without copying.
+    /// The offsets slice must contain one more entry than there are strings.
+    pub fn fromStrings(offsets: []const i32, data: []const u8, validity: ?[]const u8, owner: anytype) !Self {
+        if (offsets.len == 0) {
+            return py.ValueError.raise("string offsets must contain at least one entry");
+        }
+        if (offsets[offsets.len - 1] > data.len) {
+            return py.ValueError.raise("string offsets exceed the length of the data");
+        }
+        return try exportBuffers(offsets.len - 1, validity, &.{ offsets.ptr, data.ptr }, owner);
+    }
+
+    /// Release the array if it has not already been released or moved.
+    pub fn deinit(self: *Self) void {
+        if (self.release) |release| release(self);
+    }
+
+    pub fn len(self: *const Self) usize {
+        return @intCast(self.length);
+    }
+
+    /// Whether the value at the given index is non-null.
+    pub fn isValid(self: *const Self, idx: usize) bool {
+        const bitmap = self.buffer(u8, 0) orelse return true;
+        const bit = @as(usize, @intCast(self.offset)) + idx;
+        return (bitmap[bit / 8] >> @intCast(bit % 8)) & 1 == 1;
+    }
+
+    /// Returns the values of a primitive array, accounting for the array offset.
+    pub fn values(self: *const Self, comptime T: type) []const T {
+        const data = self.buffer(T, 1) orelse return &.{};
+        const offset: usize = @intCast(self.offset);
+        return data[offset .. offset + self.len()];
+    }
+
+    /// Returns the string at the given index of a UTF-8 string array.
+    pub fn string(self: *const Self, idx: usize) []const u8 {
+        const offsets = self.buffer(i32, 1) orelse return "";
+        const data = self.buffer(u8, 2) orelse return "";
+        const i = @as(usize, @intCast(self.offset)) + idx;
+        return data[@intCast(offsets[i])..@intCast(offsets[i + 1])];
+    }
+
+    fn buffer(self: *const Self, comptime T: type, idx: usize) ?[*]const T {
+        const buffers = self.buffers orelse return null;
+        if (idx >= self.n_buffers) return null;
+        const ptr = buffers[idx] orelse return null;
+        return @alignCast(@ptrCast(ptr));
+    }
+
+    /// Private data backing arrays exported from Zig.
+    const Export = struct {
+        owner: py.PyObject,
+        buffers: [3]?*const anyopaque,
+    };
+
+    fn exportBuffers(length: usize, validity: ?[]const u8, buffers: []const *const anyopaque, owner: anytype) !Self {
+        if (validity) |v| {
+            if (v.len * 8 < length) {
+                return py.ValueError.raise("validity bitmap is shorter than the array");
+            }
+        }
+
+        const private = try py.allocator.create(Export);
+        private.* = .{ .owner = py.object(owner), .buffers = .{ null, null, null } };
+        private.buffers[0] = if (validity) |v| v.ptr else null;
+        for (buffers, 1..) |buf, i| private.buffers[i] = buf;
+
+        // The owner must outlive the exported array, so we hold a reference until it is released.
+        private.owner.incref();
+
+        return .{
+            .length = @intCast(length),
+            .null_count = if (validity) |v| @intCast(countNulls(v, length)) else 0,
+            .n_buffers = @intCast(buffers.len + 1),
+            .buffers = &private.buffers,
+            .release = &releaseExport,
+            .private_data = private,
+        };
+    }
+
+    fn releaseExport(self: *ArrowArray) callconv(.C) void {
+        // Consumers may release the array from any thread, so we must hold the GIL to drop the owner.
+        const gil = py.gil();
+        defer gil.release();
+
+        const private: *Export = @alignCast(@ptrCast(self.private_data));
+        private.owner.decref();
+        py.allocator.destroy(private);
+        self.release = null;
+    }
+
+    fn countNulls(validity: []const u8, length: usize) usize {
+        var valid: usize = 0;
+        for (validity[0 .. length / 8]) |byte| valid += @popCount(byte);
+        if (length % 8 != 0) {
+            const mask = (@as(u8, 1) << @intCast(length % 8)) - 1;
+            valid += @popCount(validity[length / 8] & mask);
+        }
+        return length - valid;
+    }
+};
+
+/// The Arrow C Stream Interface struct.
+/// See: https://arrow.apache.org/docs/format/CStreamInterface.html
+pub const ArrowArrayStream = extern struct {
+    const Self = @This();
+
+    get_schema: ?*const fn (*ArrowArrayStream, *ArrowSchema) callconv(.C) c_int = null,
+    get_next: ?*const fn (*ArrowArrayStream, *ArrowArray) callconv(.C) c_int = null,
+    get_last_error: ?*const fn (*ArrowArrayStream) callconv(.C) ?[*:0]const u8 = null,
+    // A null release callback marks the struct as released (or moved).
+    release: ?*const fn (*ArrowArrayStream) callconv(.C) void = null,
+    private_data: ?*anyopaque = null,
+
+    pub usingnamespace CapsuleMixin("arrow_array_stream", Self);
+
+    /// Construct a stream yielding one zero-copy array per chunk.
+    /// The owner is kept alive until the stream and all arrays it produced are released.
+    pub fn fromSlices(comptime T: type, chunks: []const []const T, owner: anytype) !Self {
+        const Private = SliceStream(T);
+        const private = try py.allocator.create(Private);
+        private.* = .{ .owner = py.object(owner), .chunks = chunks };
+        private.owner.incref();
+
+        return .{
+            .get_schema = &Private.getSchema,
+            .get_next = &Private.getNext,
+            .get_last_error = &Private.getLastError,
+            .release = &Private.release,
+            .private_data = private,
+        };
+    }
+
+    /// Release the stream if it has not already been released or moved.
+    pub fn deinit(self: *Self) void {
+        if (self.release) |release| release(self);
+    }
+
+    /// Returns the schema of the stream. The caller must deinit the schema.
+    pub fn getSchema(self: *Self) !ArrowSchema {
+        var schema: ArrowSchema = undefined;
+        try self.check(self.get_schema.?(self, &schema));
+        return schema;
+    }
+
+    /// Returns the next array of the stream, or null once exhausted. The caller must deinit the array.
+    pub fn getNext(self: *Self) !?ArrowArray {
+        var array: ArrowArray = undefined;
+        try self.check(self.get_next.?(self, &array));
+        // The end of the stream is marked by a released array.
+        if (array.release == null) return null;
+        return array;
+    }
+
+    fn check(self: *Self, rc: c_int) !void {
+        if (rc == 0) return;
+        if (self.get_last_error.?(self)) |msg| {
+            return py.RuntimeError.raiseFmt("Arrow stream error ({d}): {s}", .{ rc, msg });
+        }
+        return py.RuntimeError.raiseFmt("Arrow stream error ({d})", .{rc});
+    }
+
+    fn SliceStream(comptime T: type) type {
+        return struct {
+            owner: py.PyObject,
+            chunks: []const []const T,
+            next: usize = 0,
+
+            fn getSchema(stream: *ArrowArrayStream, out: *ArrowSchema) callconv(.C) c_int {
+                _ = stream;
+                out.* = ArrowSchema.init(T);
+                return 0;
+            }
+
+            fn getNext(stream: *ArrowArrayStream, out: *ArrowArray) callconv(.C) c_int {
+                const self: *@This() = @alignCast(@ptrCast(stream.private_data));
+                if (self.next == self.chunks.len) {
+                    out.* = .{ .length = 0, .null_count = 0, .n_buffers = 0, .buffers = null };
+                    return 0;
+                }
+
+                const gil = py.gil();
+                defer gil.release();
+
+                out.* = ArrowArray.fromSlice(T, self.chunks[self.next], null, self.owner) catch {
+                    ffi.PyErr_Clear();
+                    return @intFromEnum(std.os.E.NOMEM);
+                };
+                self.next += 1;
+                return 0;
+            }
+
+            fn getLastError(stream: *ArrowArrayStream) callconv(.C) ?[*:0]const u8 {
+                _ = stream;
+                return null;
+            }
+
+            fn release(stream: *ArrowArrayStream) callconv(.C) void {
+                const gil = py.gil();
+                defer gil.release();
+
+                const self: *@This() = @alignCast(@ptrCast(stream.private_data));
+                self.owner.decref();
+                py.allocator.destroy(self);
+                stream.release = null;
+            }
+        };
+    }
+};
+
+/// Export a slice as the (schema, array) capsule pair returned from `__arrow_c_array__`.
+pub fn arrowCArray(comptime T: type, values: []const T, validity: ?[]const u8, owner: anytype) !py.PyTuple {
+    const result = try py.PyTuple.new(2);
+    errdefer result.decref();
+
+    var schema = ArrowSchema.init(T);
+    try result.setOwnedItem(0, try schema.toCapsule());
+
+    var array = try ArrowArray.fromSlice(T, values, validity, owner);
+    errdefer array.deinit();
+    try result.setOwnedItem(1, try array.toCapsule());
+
+    return result;
+}
+
+/// Export chunks of a slice as the stream capsule returned from `__arrow_c_stream__`.
+pub fn arrowCStream(comptime T: type, chunks: []const []const T, owner: anytype) !py.PyObject {
+    var stream = try ArrowArrayStream.fromSlices(T, chunks, owner);
+    errdefer stream.deinit();
+    return stream.toCapsule();
+}
+
+/// A typed Zig view over an Arrow array imported from any object implementing `__arrow_c_array__`,
+/// e.g. a pyarrow.Array. The view borrows the underlying buffers and must be released with deinit.
+pub fn ArrowArrayView(comptime T: type) type {
+    return struct {
+        const Self = @This();
+
+        capsules: py.PyTuple,
+        schema: *const ArrowSchema,
+        array: *const ArrowArray,
+
+        pub fn fromObject(obj: py.PyObject) !Self {
+            const capsules = try obj.call0(py.PyTuple, "__arrow_c_array__");
+            errdefer capsules.decref();
+            return fromCapsules(capsules);
+        }
+
+        /// Take ownership of a (schema, array) capsule pair.
+        pub fn fromCapsules(capsules: py.PyTuple) !Self {
+            const schema = try ArrowSchema.fromCapsule(try capsules.getItem(py.PyObject, 0));
+            const array = try ArrowArray.fromCapsule(try capsules.getItem(py.PyObject, 1));
+
+            const expected = ArrowSchema.getFormat(T);
+            if (!std.mem.eql(u8, schema.formatSlice(), expected)) {
+                return py.TypeError.raiseFmt(
+                    "expected Arrow array with format '{s}', found '{s}'",
+                    .{ expected, schema.formatSlice() },
+                );
+            }
+            if (array.n_buffers != comptime if (T == []const u8) 3 else 2) {
+                return py.ValueError.raise("unexpected number of Arrow buffers");
+            }
+
+            return .{ .capsules = capsules, .schema = schema, .array = array };
+        }
+
+        pub fn deinit(self: Self) void {
+            // The capsule destructors release the imported structs.
+            self.capsules.decref();
+        }
+
+        pub fn len(self: Self) usize {
+            return self.array.len();
+        }
+
+        pub fn isValid(self: Self, idx: usize) bool {
+            return self.array.isValid(idx);
+        }
+
+        /// Returns the value at the given index, or null if the value is null.
+        pub fn get(self: Self, idx: usize) ?T {
+            if (!self.isValid(idx)) return null;
+            if (T == []const u8) {
+                return self.array.string(idx);
+            } else {
+                return self.array.values(T)[idx];
+            }
+        }
+
+        /// Returns the primitive values, ignoring validity.
+        pub fn values(self: Self) []const T {
+            return self.array.values(T);
+        }
+    };
+}
+
+/// Functions for moving Arrow C structs in and out of PyCapsules per the Arrow PyCapsule Interface.
+/// See: https://arrow.apache.org/docs/format/CDataInterface/PyCapsuleInterface.html
+fn CapsuleMixin(comptime name: [:0]const u8, comptime Self: type) type {
+    return struct {
+        /// Move the struct into a new capsule. The struct is marked as released and must not be used afterwards.
+        pub fn toCapsule(self: *Self) !py.PyObject {
+            const ptr = try py.allocator.create(Self);
+            ptr.* = self.*;
+            self.release = null;
+
+            const capsule = ffi.PyCapsule_New(ptr, name.ptr, &destroy) orelse {
+                ptr.deinit();
+                py.allocator.destroy(ptr);
+                return PyError.PyRaised;
+            };
+            return .{ .py = capsule };
+        }
+
+        /// Returns the struct held by the capsule. The struct is owned by the capsule.
+        pub fn fromCapsule(capsule: py.PyObject) !*Self {
+            const ptr = ffi.PyCapsule_GetPointer(capsule.py, name.ptr) orelse return PyError.PyRaised;
+            return @alignCast(@ptrCast(ptr));
+        }
+
+        fn destroy(capsule: ?*ffi.PyObject) callconv(.C) void {
+            const ptr: *Self = @alignCast(@ptrCast(ffi.PyCapsule_GetPointer(capsule, name.ptr) orelse return));
+            // If a consumer moved the struct out of the capsule, release will already be null.
+            ptr.deinit();
+            py.allocator.destroy(ptr);
+        }
+    };
+}
+
+const testing = std.testing;
+
+test "ArrowArray round trip" {
+    py.initialize();
+    defer py.finalize();
+
+    const owner = try py.PyString.create("owner");
+    defer owner.decref();
+
+    const values = [_]i64{ 1, 2, 3, 4 };
+    const validity = [_]u8{0b1011};
+
+    const capsules = try arrowCArray(i64, &values, &validity, owner);
+    const view = try ArrowArrayView(i64).fromCapsules(capsules);
+
+    try testing.expectEqual(@as(usize, 4), view.len());
+    try testing.expectEqual(@as(i64, 1), view.array.null_count);
+    try testing.expectEqual(@as(?i64, 2), view.get(1));
+    try testing.expectEqual(@as(?i64, null), view.get(2));
+    try testing.expectEqualSlices(i64, &values, view.values());
+
+    // The exported array holds a reference to its owner until released.
+    try testing.expectEqual(@as(isize, 2), owner.obj.refcnt());
+    view.deinit();
+    try testing.expectEqual(@as(isize, 1), owner.obj.refcnt());
+}
+
+test "ArrowArrayStream" {
+    py.initialize();
+    defer py.finalize();
+
+    const owner = try py.PyString.create("owner");
+    defer owner.decref();
+
+    const chunks = [_][]const f64{ &.{ 1.0, 2.0 }, &.{3.0} };
+    const capsule = try arrowCStream(f64, &chunks, owner);
+    defer capsule.decref();
+
+    const stream = try ArrowArrayStream.fromCapsule(capsule);
+
+    var schema = try stream.getSchema();
+    defer schema.deinit();
+    try testing.expectEqualStrings("g", schema.formatSlice());
+
+    var total: f64 = 0;
+    while (try stream.getNext()) |array| {
+        var chunk = array;
+        defer chunk.deinit();
+        for (chunk.values(f64)) |v| total += v;
+    }
+    try testing.expectEqual(@as(f64, 6.0), total);
+}
@@ -42,6 +42,22 @@ pub const PyMemoryView = extern struct {
         } };
     }
 
+    /// Create a read-only memoryview over the slice that holds a reference to the owner for as long as the
+    /// memoryview, or any buffer derived from it, is alive. The slice must live as long as the owner.
+    pub fn fromOwnedSlice(comptime T: type, values: []const T, owner: anytype) !PyMemoryView {
+        const exporter = try SliceExporter(T).create(values, py.object(owner), null);
+        defer exporter.decref();
+        return fromObject(exporter);
+    }
+
+    /// Like fromOwnedSlice, but increments `exports` until the memoryview and any buffer derived from it are released.
+    /// This allows the owner to reject resizing the slice while it is exported.
+    pub fn fromTrackedSlice(comptime T: type, values: []const T, owner: anytype, exports: *usize) !PyMemoryView {
+        const exporter = try SliceExporter(T).create(values, py.object(owner), exports);
+        defer exporter.decref();
+        return fromObject(exporter);
+    }
+
     fn Slice(comptime T: type) type {
         switch (@typeInfo(T)) {
             .Pointer => |ptr_info| {
@@ -62,6 +78,135 @@ pub const PyMemoryView = extern struct {
     }
 };
 
+/// A minimal Python object exporting a Zig slice through the buffer protocol on behalf of its owner.
+fn SliceExporter(comptime T: type) type {
+    return extern struct {
+        const Self = @This();
+
+        ob_base: ffi.PyObject,
+        owner: *ffi.PyObject,
+        exports: ?*usize,
+        ptr: [*]const T,
+        len: usize,
+        shape: [1]isize,
+
+        const slots = [_]ffi.PyType_Slot{
+            .{ .slot = ffi.Py_bf_getbuffer, .pfunc = @ptrCast(@constCast(&bf_getbuffer)) },
+            .{ .slot = ffi.Py_tp_dealloc, .pfunc = @ptrCast(@constCast(&tp_dealloc)) },
+            .{ .slot = 0, .pfunc = null },
+        };
+
+        /// Returns a borrowed reference to the type for the current interpreter.
+        ///
+        /// Types belong to an interpreter, so rather than caching the type for the whole process, where it would
+        /// dangle after py.finalize() or be shared with subinterpreters, we store it in the interpreter's private
+        /// dict. Since each extension module compiles its own copy of Pydust, the key includes the address of our
+        /// slots.
+        fn pytype() !*ffi.PyObject {
+            const dict = ffi.PyInterpreterState_GetDict(ffi.PyInterpreterState_Get()) orelse {
+                return py.RuntimeError.raise("interpreter has no dict to store the slice exporter type");
+            };
+
+            var keyBuf: [256]u8 = undefined;
+            const key = std.fmt.bufPrintZ(&keyBuf, "pydust.SliceExporter[{s}]@{x}", .{ @typeName(T), @intFromPtr(&slots) }) catch unreachable;
+            if (ffi.PyDict_GetItemString(dict, key.ptr)) |tp| {
+                return tp;
+            }
+
+            var spec = ffi.PyType_Spec{
+                .name = "pydust.SliceExporter",
+                .basicsize = @sizeOf(Self),
+                .itemsize = 0,
+                .flags = ffi.Py_TPFLAGS_DEFAULT,
+                .slots = @constCast(&slots),
+            };
+            const tp = ffi.PyType_FromSpec(&spec) orelse return PyError.PyRaised;
+            // The interpreter dict holds the only reference to the type.
+            defer py.PyObject.decref(.{ .py = tp });
+            if (ffi.PyDict_SetItemString(dict, key.ptr, tp) < 0) {
+                return PyError.PyRaised;
+            }
+            return tp;
+        }
+
+        fn create(values: []const T, owner: py.PyObject, exports: ?*usize) !py.PyObject {
+            const pyself = ffi.PyType_GenericAlloc(@ptrCast(try pytype()), 0) orelse return PyError.PyRaised;
+            const self: *Self = @alignCast(@ptrCast(pyself));
+
+            owner.incref();
+            self.owner = owner.py;
+            self.exports = exports;
+            if (exports) |e| e.* += 1;
+            self.ptr = values.ptr;
+            self.len = values.len;
+            self.shape = .{@intCast(values.len)};
+
+            return .{ .py = pyself };
+        }
+
+        fn bf_getbuffer(pyself: *ffi.PyObject, view: *py.PyBuffer, flags: c_int) callconv(.C) c_int {
+            // In case of any error, the view.obj field must be set to NULL.
+            view.obj = null;
+            if (flags & py.PyBuffer.Flags.WRITABLE != 0) {
+                py.BufferError.raise("request for writable buffer is rejected") catch return -1;
+            }
+
+            const self: *Self = @alignCast(@ptrCast(pyself));
+            view.initFromSlice(T, @constCast(self.ptr[0..self.len]), &self.shape, py.PyObject{ .py = pyself });
+            return 0;
+        }
+
+        fn tp_dealloc(pyself: *ffi.PyObject) callconv(.C) void {
+            const self: *Self = @alignCast(@ptrCast(pyself));
+            if (self.exports) |e| e.* -= 1;
+            py.PyObject.decref(.{ .py = self.owner });
+
+            // Heap types must free the instance and then decref their type.
+            const tp = ffi.Py_TYPE(pyself);
+            const free: *const fn (?*anyopaque) callconv(.C) void = @ptrCast(ffi.PyType_GetSlot(tp, ffi.Py_tp_free));
+            free(pyself);
+            py.PyObject.decref(.{ .py = @ptrCast(tp) });
+        }
+    };
+}
+
+test "from owned slice" {
+    py.initialize();
+    defer py.finalize();
+
+    const owner = try py.PyString.create("owner");
+    defer owner.decref();
+
+    const values = [_]i64{ 1, 2, 3 };
+    const mv = try PyMemoryView.fromOwnedSlice(i64, &values, owner);
+    try std.testing.expectEqual(@as(isize, 2), owner.obj.refcnt());
+
+    var buf = try mv.obj.getBuffer(py.PyBuffer.Flags.ND);
+    try std.testing.expectEqualSlices(i64, &values, buf.asSlice(i64));
+    buf.release();
+
+    mv.decref();
+    try std.testing.expectEqual(@as(isize, 1), owner.obj.refcnt());
+}
+
+test "from owned slice across interpreters" {
+    const values = [_]i64{ 1, 2, 3 };
+    for (0..2) |_| {
+        // Each interpreter creates its own exporter type.
+        py.initialize();
+        defer py.finalize();
+
+        const owner = try py.PyString.create("owner");
+        defer owner.decref();
+        const mv = try PyMemoryView.fromOwnedSlice(i64, &values, owner);
+        defer mv.decref();
+
+        var buf = try mv.obj.getBuffer(py.PyBuffer.Flags.ND);
+        defer buf.release();
+        try std.testing.expectEqualSlices(i64, &values, buf.asSlice(i64));
+    }
+}
+
 test "from array" {
     py.initialize();
     defer py.finalize();
@@ -0,0 +1,261 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+const std = @import("std");
+const py = @import("../pydust.zig");
+const PyObjectMixin = @import("./obj.zig").PyObjectMixin;
+const ffi = py.ffi;
+const PyError = @import("../errors.zig").PyError;
+const tramp = @import("../trampoline.zig");
+
+/// Wrapper for Python PySet.
+/// See: https://docs.python.org/3/c-api/set.html
+pub const PySet = extern struct {
+    obj: py.PyObject,
+
+    pub usingnamespace PyObjectMixin("set", "PySet", @This());
+    pub usingnamespace SetMixin(@This());
+
+    /// Construct a PySet from a Zig slice, array or hash set (e.g. std.AutoHashMap(T, void)).
+    pub fn create(values: anytype) !PySet {
+        const set = try new(null);
+        errdefer set.decref();
+        try addAll(set.obj, values);
+        return set;
+    }
+
+    /// Return a new set containing the objects returned by the iterable, or an empty set if null.
+    pub fn new(iterable: ?py.PyObject) !PySet {
+        const set = ffi.PySet_New(if (iterable) |i| i.py else null) orelse return PyError.PyRaised;
+        return .{ .obj = .{ .py = set } };
+    }
+
+    /// Add the value to the set.
+    pub fn add(self: PySet, value: anytype) !void {
+        try addOne(self.obj, value);
+    }
+
+    /// Remove the value from the set if present. Returns whether the value was found.
+    pub fn discard(self: PySet, value: anytype) !bool {
+        const valueObj = try py.create(value);
+        defer valueObj.decref();
+
+        const result = ffi.PySet_Discard(self.obj.py, valueObj.py);
+        if (result < 0) return PyError.PyRaised;
+        return result == 1;
+    }
+
+    /// Remove and return an arbitrary element of the set.
+    /// Python objects, including Pydust class pointers and the objects within a struct, are new references.
+    pub fn pop(self: PySet, comptime T: type) !T {
+        const item = py.PyObject{ .py = ffi.PySet_Pop(self.obj.py) orelse return PyError.PyRaised };
+        // PySet_Pop returns a new reference, so the objects borrowed by the value need their own references.
+        defer item.decref();
+        const value = try py.as(T, item);
+        tramp.Trampoline(T).incref_objectlike(value);
+        return value;
+    }
+
+    /// Empty an existing set of all elements.
+    pub fn clear(self: PySet) !void {
+        if (ffi.PySet_Clear(self.obj.py) < 0) {
+            return PyError.PyRaised;
+        }
+    }
+};
+
+/// Wrapper for Python PyFrozenSet.
+/// See: https://docs.python.org/3/c-api/set.html
+pub const PyFrozenSet = extern struct {
+    obj: py.PyObject,
+
+    pub usingnamespace PyObjectMixin("frozenset", "PyFrozenSet", @This());
+    pub usingnamespace SetMixin(@This());
+
+    /// Construct a PyFrozenSet from a Zig slice, array or hash set (e.g. std.AutoHashMap(T, void)).
+    pub fn create(values: anytype) !PyFrozenSet {
+        // PySet_Add may be used to fill in brand new frozensets before they are exposed to other code.
+        const set = try new(null);
+        errdefer set.decref();
+        try addAll(set.obj, values);
+        return set;
+    }
+
+    /// Return a new frozenset containing the objects returned by the iterable, or an empty frozenset if null.
+    pub fn new(iterable: ?py.PyObject) !PyFrozenSet {
+        const set = ffi.PyFrozenSet_New(if (iterable) |i| i.py else null) orelse return PyError.PyRaised;
+        return .{ .obj = .{ .py = set } };
+    }
+};
+
+/// Mixin of functions shared by set and frozenset.
+fn SetMixin(comptime Self: type) type {
+    return struct {
+        /// Return the number of elements in the set. This is equivalent to len(s).
+        pub fn length(self: Self) usize {
+            return @intCast(ffi.PySet_Size(self.obj.py));
+        }
+
+        /// Determine if the set contains the value. This is equivalent to the Python expression `value in s`.
+        pub fn contains(self: Self, value: anytype) !bool {
+            const valueObj = try py.create(value);
+            defer valueObj.decref();
+
+            const result = ffi.PySet_Contains(self.obj.py, valueObj.py);
+            if (result < 0) return PyError.PyRaised;
+            return result == 1;
+        }
+
+        /// Iterate the elements of the set. The caller must call deinit on the iterator.
+        pub fn iterator(self: Self) !Iterator {
+            const iter = ffi.PyObject_GetIter(self.obj.py) orelse return PyError.PyRaised;
+            return .{ .iter = .{ .py = iter } };
+        }
+
+        pub const Iterator = struct {
+            iter: py.PyObject,
+
+            /// Returns the next element of the set, or null once exhausted.
+            /// The element is borrowed from the set and remains valid only while the set is unchanged.
+            pub fn next(self: *Iterator, comptime T: type) !?T {
+                // The C API has no public equivalent of _PySet_NextEntry under the limited API, so we drive the
+                // set's own iterator which walks the hash table entries without allocating.
+                const item = ffi.PyIter_Next(self.iter.py) orelse {
+                    if (ffi.PyErr_Occurred() != null) return PyError.PyRaised;
+                    return null;
+                };
+                // The set still holds a reference to the item.
+                defer ffi.Py_DECREF(item);
+                return try py.as(T, py.PyObject{ .py = item });
+            }
+
+            pub fn deinit(self: Iterator) void {
+                self.iter.decref();
+            }
+        };
+    };
+}
+
+/// Whether the type is a managed Zig hash set, i.e. std.AutoHashMap(T, void) or std.AutoArrayHashMap(T, void).
+pub fn isHashSet(comptime T: type) bool {
+    if (@typeInfo(T) != .Struct) return false;
+    if (!@hasDecl(T, "KV") or !@hasDecl(T, "iterator") or !@hasField(T, "allocator")) return false;
+    return @hasField(T.KV, "value") and std.meta.fieldInfo(T.KV, .value).type == void;
+}
+
+fn addAll(set: py.PyObject, values: anytype) !void {
+    if (comptime isHashSet(@TypeOf(values))) {
+        var iter = values.iterator();
+        while (iter.next()) |entry| {
+            try addOne(set, entry.key_ptr.*);
+        }
+    } else {
+        for (values) |value| {
+            try addOne(set, value);
+        }
+    }
+}
+
+fn addOne(set: py.PyObject, value: anytype) !void {
+    const valueObj = try py.create(value);
+    defer valueObj.decref();
+
+    if (ffi.PySet_Add(set.py, valueObj.py) < 0) {
+        return PyError.PyRaised;
+    }
+}
+
+const testing = std.testing;
+
+test "PySet" {
+    py.initialize();
+    defer py.finalize();
+
+    const values = [_]u32{ 1, 2, 2, 3 };
+    const set = try PySet.create(&values);
+    defer set.decref();
+
+    try testing.expectEqual(@as(usize, 3), set.length());
+    try testing.expect(try set.contains(2));
+    try testing.expect(!try set.contains(4));
+
+    try set.add(4);
+    try testing.expect(try set.contains(4));
+    try testing.expect(try set.discard(4));
+    try testing.expect(!try set.discard(4));
+
+    var sum: u32 = 0;
+    var iter = try set.iterator();
+    defer iter.deinit();
+    while (try iter.next(u32)) |v| sum += v;
+    try testing.expectEqual(@as(u32, 6), sum);
+
+    try set.clear();
+    try testing.expectEqual(@as(usize, 0), set.length());
+}
+
+test "PySet pop" {
+    py.initialize();
+    defer py.finalize();
+
+    const set = try PySet.new(null);
+    defer set.decref();
+
+    // Large ints are not cached by the interpreter, so we own the only other reference.
+    const value = try py.PyLong.create(@as(u64, 1 << 40));
+    defer value.decref();
+
+    try set.add(value);
+    try testing.expectEqual(@as(isize, 2), value.obj.refcnt());
+    try testing.expectEqual(@as(u64, 1 << 40), try set.pop(u64));
+    try testing.expectEqual(@as(isize, 1), value.obj.refcnt());
+
+    try set.add(value);
+    const popped = try set.pop(py.PyLong);
+    try testing.expectEqual(@as(isize, 2), value.obj.refcnt());
+    popped.decref();
+    try testing.expectEqual(@as(isize, 1), value.obj.refcnt());
+
+    // The objects within a struct are kept alive beyond the popped tuple.
+    const tuple = try py.PyTuple.create(.{ @as(u64, 1), value });
+    try set.add(tuple);
+    tuple.decref();
+    const pair = try set.pop(struct { u64, py.PyLong });
+    try testing.expectEqual(@as(u64, 1), pair[0]);
+    try testing.expectEqual(@as(isize, 2), value.obj.refcnt());
+    pair[1].decref();
+    try testing.expectEqual(@as(isize, 1), value.obj.refcnt());
+
+    // Plain structs are converted from dicts, so popping an int raises and releases the int.
+    try set.add(value);
+    try testing.expectError(PyError.PyRaised, set.pop(struct { x: u64 }));
+    ffi.PyErr_Clear();
+    try testing.expectEqual(@as(isize, 1), value.obj.refcnt());
+}
+
+test "PyFrozenSet from hash set" {
+    py.initialize();
+    defer py.finalize();
+
+    var hashset = std.AutoHashMap(u64, void).init(testing.allocator);
+    defer hashset.deinit();
+    try hashset.put(1, {});
+    try hashset.put(2, {});
+
+    const set = try PyFrozenSet.create(hashset);
+    defer set.decref();
+
+    try testing.expectEqual(@as(usize, 2), set.length());
+    try testing.expect(try set.contains(1));
+    try testing.expect(try py.PyFrozenSet.check(set.obj));
+    try testing.expect(!try py.PySet.check(set.obj));
+}
@@ -0,0 +1,155 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+const std = @import("std");
+const py = @import("pydust.zig");
+const State = @import("discovery.zig").State;
+
+/// A compact vector of Pydust class states, stored as a struct-of-arrays.
+///
+/// Elements are stored without a Python object header, and a Python object is only materialized when an element
+/// is indexed. Indexing returns a copy, so modified elements must be assigned back. Numeric fields can be exported
+/// as typed buffers with `column(name)`, and the vector cannot be resized while any column is exported.
+///
+/// Elements are copied in and out of the vector, so Cls must not own any resources: its fields must be plain Zig
+/// values without pointers or slices, and it must not declare `__del__`. Python object fields would not be reference
+/// counted, and owned memory would be freed twice. To expose a vector class, add it to a Pydust module,
+/// e.g. `pub const Points = py.Vec(Point);`.
+pub fn Vec(comptime Cls: type) type {
+    if (@hasDecl(Cls, "__del__")) {
+        @compileError("py.Vec does not support classes declaring __del__, found " ++ @typeName(Cls));
+    }
+    const fields = @typeInfo(Cls).Struct.fields;
+    for (fields) |field| {
+        if (isObjectLike(field.type)) {
+            @compileError("py.Vec does not support Python object fields, found " ++ field.name);
+        }
+        if (!isPlainValue(field.type)) {
+            @compileError("py.Vec does not support fields holding pointers or slices, found " ++ field.name);
+        }
+    }
+
+    return py.class(struct {
+        pub const __doc__ = "A compact vector of class instances stored as a struct-of-arrays";
+        const Self = @This();
+
+        pub const Field = std.meta.FieldEnum(Cls);
+
+        items: std.MultiArrayList(Cls),
+        exports: usize,
+
+        pub fn __init__(self: *Self) void {
+            self.* = .{ .items = .{}, .exports = 0 };
+        }
+
+        pub fn __del__(self: *Self) void {
+            // Exported columns hold a reference to us, so none can be alive by the time we are finalized.
+            self.items.deinit(py.allocator);
+        }
+
+        pub fn __len__(self: *const Self) usize {
+            return self.items.len;
+        }
+
+        pub fn __getitem__(self: *const Self, index: usize) !*Cls {
+            if (index >= self.items.len) {
+                return py.IndexError.raise("index out of range");
+            }
+            return py.init(Cls, self.items.get(index));
+        }
+
+        pub fn __setitem__(self: *Self, index: usize, value: *const Cls) !void {
+            if (index >= self.items.len) {
+                return py.IndexError.raise("index out of range");
+            }
+            self.items.set(index, value.*);
+        }
+
+        /// Append a copy of the instance.
+        pub fn append(self: *Self, args: struct { value: *const Cls }) !void {
+            try self.push(args.value.*);
+        }
+
+        /// Remove all elements.
+        pub fn clear(self: *Self) !void {
+            try self.checkResizable();
+            self.items.shrinkRetainingCapacity(0);
+        }
+
+        /// Return a read-only memoryview over the values of a numeric field.
+        pub fn column(self: *Self, args: struct { name: []const u8 }) !py.PyMemoryView {
+            inline for (fields) |field| {
+                if (std.mem.eql(u8, field.name, args.name)) {
+                    if (comptime isExportable(field.type)) {
+                        const slice = self.items.items(@field(Field, field.name));
+                        return py.PyMemoryView.fromTrackedSlice(field.type, slice, self, &self.exports);
+                    } else {
+                        return py.TypeError.raiseFmt("field '{s}' cannot be exported as a buffer", .{field.name});
+                    }
+                }
+            }
+            return py.AttributeError.raiseFmt("no field named '{s}'", .{args.name});
+        }
+
+        pub usingnamespace py.zig(struct {
+            /// Append a state to the vector. Fails if any columns are exported.
+            pub fn push(self: *Self, value: Cls) !void {
+                try self.checkResizable();
+                try self.items.append(py.allocator, value);
+            }
+
+            /// Returns the packed values of a field, for bulk operations in Zig.
+            pub fn values(self: *const Self, comptime field: Field) []std.meta.fieldInfo(Cls, field).type {
+                return self.items.items(field);
+            }
+
+            pub fn checkResizable(self: *const Self) !void {
+                if (self.exports > 0) {
+                    return py.BufferError.raise("cannot resize vector while columns are exported");
+                }
+            }
+        });
+    });
+}
+
+fn isObjectLike(comptime T: type) bool {
+    return switch (@typeInfo(T)) {
+        .Struct => @hasField(T, "obj") or @hasField(T, "py") or @hasField(T, "value") and isObjectLike(std.meta.fieldInfo(T, .value).type),
+        .Pointer => |p| p.child == py.ffi.PyObject or State.findDefinition(p.child) != null,
+        .Optional => |o| isObjectLike(o.child),
+        else => false,
+    };
+}
+
+/// Whether copies of a value are independent, i.e. it holds no pointers or slices.
+fn isPlainValue(comptime T: type) bool {
+    return switch (@typeInfo(T)) {
+        .Int, .Float, .Bool, .Enum, .Void, .Vector => true,
+        .Array => |a| isPlainValue(a.child),
+        .Optional => |o| isPlainValue(o.child),
+        .Struct => |s| for (s.fields) |field| {
+            if (!isPlainValue(field.type)) break false;
+        } else true,
+        .Union => |u| for (u.fields) |field| {
+            if (!isPlainValue(field.type)) break false;
+        } else true,
+        else => false,
+    };
+}
+
+fn isExportable(comptime T: type) bool {
+    return switch (@typeInfo(T)) {
+        .Int => |i| i.bits == 8 or i.bits == 16 or i.bits == 32 or i.bits == 64,
+        .Float => |f| f.bits == 16 or f.bits == 32 or f.bits == 64,
+        else => false,
+    };
+}
@@ -0,0 +1,256 @@
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//         http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+/// Ufunc-style batched variants of scalar Zig functions.
+const std = @import("std");
+const py = @import("pydust.zig");
+const tramp = @import("trampoline.zig");
+const ffi = py.ffi;
+const PyError = @import("errors.zig").PyError;
+
+/// Generate a batched variant of a scalar function, e.g. `pub const hypot_batch = py.vectorize(hypot);`.
+///
+/// The scalar function must take a single args struct of numeric fields and return a numeric value.
+/// Each argument of the batched function accepts a 1-dimensional buffer, a sequence or a scalar, which is
+/// broadcast. The results are written into the optional `out` buffer, or a new memoryview otherwise.
+///
+/// Infallible scalar functions are looped over with the GIL released, so they must not call into Python.
+pub fn vectorize(comptime func: anytype) @TypeOf(Vectorized(func).call) {
+    return Vectorized(func).call;
+}
+
+fn Vectorized(comptime func: anytype) type {
+    const info = @typeInfo(@TypeOf(func)).Fn;
+    if (info.params.len != 1) {
+        @compileError("Vectorized functions must take a single args struct");
+    }
+    const ScalarArgs = info.params[0].type.?;
+    const fields = @typeInfo(ScalarArgs).Struct.fields;
+
+    const ReturnType = info.return_type.?;
+    const fallible = @typeInfo(ReturnType) == .ErrorUnion;
+    const Result = if (fallible) @typeInfo(ReturnType).ErrorUnion.payload else ReturnType;
+    _ = py.PyBuffer.getFormat(Result);
+
+    // The batched args struct has the same fields as the scalar args, accepting any object, plus `out`.
+    const BatchArgs = blk: {
+        var batchFields: [fields.len + 1]std.builtin.Type.StructField = undefined;
+        for (fields, 0..) |field, i| {
+            if (field.default_value != null) {
+                @compileError("Vectorized function args cannot have default values");
+            }
+            if (std.mem.eql(u8, field.name, "out")) {
+                @compileError("Vectorized function args cannot be named 'out'");
+            }
+            _ = py.PyBuffer.getFormat(field.type);
+            batchFields[i] = .{
+                .name = field.name,
+                .type = py.PyObject,
+                .default_value = null,
+                .is_comptime = false,
+                .alignment = @alignOf(py.PyObject),
+            };
+        }
+        const noOut: ?py.PyObject = null;
+        batchFields[fields.len] = .{
+            .name = "out",
+            .type = ?py.PyObject,
+            .default_value = &noOut,
+            .is_comptime = false,
+            .alignment = @alignOf(?py.PyObject),
+        };
+        break :blk @Type(.{ .Struct = .{
+            .layout = .Auto,
+            .fields = &batchFields,
+            .decls = &.{},
+            .is_tuple = false,
+        } });
+    };
+
+    const Columns = blk: {
+        var types: [fields.len]type = undefined;
+        for (fields, 0..) |field, i| types[i] = Column(field.type);
+        break :blk std.meta.Tuple(&types);
+    };
+
+    return struct {
+        fn call(args: BatchArgs) !py.PyObject {
+            var columns: Columns = undefined;
+            inline for (0..fields.len) |i| columns[i] = .{};
+            defer {
+                inline for (0..fields.len) |i| columns[i].deinit();
+            }
+
+            // All non-scalar arguments must have the same length. If every argument is a scalar, we compute one value.
+            var n: ?usize = null;
+            inline for (fields, 0..) |field, i| {
+                try columns[i].init(@field(args, field.name));
+                if (columns[i].len()) |len| {
+                    if (n != null and n.? != len) {
+                        return py.ValueError.raiseFmt("argument '{s}' has length {d}, expected {d}", .{ field.name, len, n.? });
+                    }
+                    n = len;
+                }
+            }
+            const length = n orelse 1;
+
+            if (args.out) |out| {
+                const view = try out.getBuffer(py.PyBuffer.Flags.ND | py.PyBuffer.Flags.FORMAT | py.PyBuffer.Flags.WRITABLE);
+                defer view.release();
+                try checkBuffer(Result, view, "out");
+                if (@as(usize, @intCast(view.len)) / @sizeOf(Result) != length) {
+                    return py.ValueError.raiseFmt("out has length {d}, expected {d}", .{ @as(usize, @intCast(view.len)) / @sizeOf(Result), length });
+                }
+                try run(&columns, view.asSlice(Result));
+
+                out.incref();
+                return out;
+            }
+
+            // We compute directly into a new bytearray and return a typed memoryview over it.
+            const bytes = ffi.PyByteArray_FromStringAndSize(null, @intCast(length * @sizeOf(Result))) orelse return PyError.PyRaised;
+            const bytesObj = py.PyObject{ .py = bytes };
+            defer bytesObj.decref();
+            {
+                const view = try bytesObj.getBuffer(py.PyBuffer.Flags.ND);
+                defer view.release();
+                try run(&columns, view.asSlice(Result));
+            }
+
+            const view = try py.PyMemoryView.fromObject(bytesObj);
+            defer view.decref();
+            return view.obj.call(py.PyObject, "cast", .{py.PyBuffer.getFormat(Result)}, .{});
+        }
+
+        fn run(columns: *const Columns, out: []Result) PyError!void {
+            if (comptime fallible) {
+                for (out, 0..) |*o, i| {
+                    o.* = try tramp.coerceError(func(scalarArgs(columns, i)));
+                }
+            } else {
+                const nogil = py.nogil();
+                defer nogil.acquire();
+                for (out, 0..) |*o, i| {
+                    o.* = func(scalarArgs(columns, i));
+                }
+            }
+        }
+
+        inline fn scalarArgs(columns: *const Columns, i: usize) ScalarArgs {
+            var scalar: ScalarArgs = undefined;
+            inline for (fields, 0..) |field, j| {
+                @field(scalar, field.name) = columns[j].get(i);
+            }
+            return scalar;
+        }
+    };
+}
+
+/// A single argument of a vectorized function, either broadcast from a scalar or read from a column of values.
+fn Column(comptime T: type) type {
+    return struct {
+        const Self = @This();
+
+        scalar: T = undefined,
+        values: ?[]const T = null,
+        view: ?py.PyBuffer = null,
+        owned: ?[]T = null,
+
+        fn init(self: *Self, obj: py.PyObject) !void {
+            if (ffi.PyObject_CheckBuffer(obj.py) == 1) {
+                const view = try obj.getBuffer(py.PyBuffer.Flags.ND | py.PyBuffer.Flags.FORMAT);
+                errdefer view.release();
+                try checkBuffer(T, view, "argument");
+                if (view.ndim == 0) {
+                    // e.g. numpy scalars
+                    self.scalar = view.asSlice(T)[0];
+                    view.release();
+                } else {
+                    self.view = view;
+                    self.values = view.asSlice(T);
+                }
+            } else if (ffi.PySequence_Check(obj.py) == 1) {
+                // Sequences are copied into a Zig slice once, rather than converting each item inside the loop.
+                var values = std.ArrayList(T).init(py.allocator);
+                errdefer values.deinit();
+                const iter = try py.iter(obj);
+                defer iter.decref();
+                while (try iter.next(py.PyObject)) |item| {
+                    defer item.decref();
+                    try values.append(try py.as(T, item));
+                }
+                self.owned = try values.toOwnedSlice();
+                self.values = self.owned;
+            } else {
+                self.scalar = try py.as(T, obj);
+            }
+        }
+
+        fn deinit(self: *Self) void {
+            if (self.view) |view| view.release();
+            if (self.owned) |owned| py.allocator.free(owned);
+        }
+
+        fn len(self: *const Self) ?usize {
+            return if (self.values) |values| values.len else null;
+        }
+
+        inline fn get(self: *const Self, i: usize) T {
+            return if (self.values) |values| values[i] else self.scalar;
+        }
+    };
+}
+
+/// Check the buffer holds a single dimension of native T values, accepting any struct format character of the same kind and size.
+fn checkBuffer(comptime T: type, view: py.PyBuffer, name: []const u8) !void {
+    if (view.ndim > 1) {
+        return py.ValueError.raiseFmt("{s} must be 1-dimensional, found {d} dimensions", .{ name, view.ndim });
+    }
+
+    var format: []const u8 = if (view.format) |f| std.mem.span(f) else "B";
+    if (format.len == 2 and (format[0] == '@' or format[0] == '=')) format = format[1..];
+
+    const kinds = switch (@typeInfo(T)) {
+        .Int => |i| if (i.signedness == .signed) "bhilq" else "BHILQ",
+        .Float => "efd",
+        else => unreachable,
+    };
+    const matches = format.len == 1 and std.mem.indexOfScalar(u8, kinds, format[0]) != null and view.itemsize == @sizeOf(T);
+    if (!matches) {
+        return py.TypeError.raiseFmt("{s} has buffer format '{s}', expected '{s}'", .{ name, format, py.PyBuffer.getFormat(T) });
+    }
+}
+
+const testing = std.testing;
+
+fn scale(args: struct { x: f64, factor: f64 }) f64 {
+    return args.x * args.factor;
+}
+
+test "vectorize" {
+    py.initialize();
+    defer py.finalize();
+
+    const batched = vectorize(scale);
+
+    const xs = try py.PyTuple.create(.{ @as(f64, 1.0), @as(f64, 2.0), @as(f64, 3.0) });
+    defer xs.decref();
+    const factor = try py.PyFloat.create(2.0);
+    defer factor.decref();
+
+    const result = try batched(.{ .x = xs.obj, .factor = factor.obj });
+    defer result.decref();
+
+    const view = try result.getBuffer(py.PyBuffer.Flags.ND | py.PyBuffer.Flags.FORMAT);
+    defer view.release();
+    try testing.expectEqualSlices(f64, &.{ 2.0, 4.0, 6.0 }, view.asSlice(f64));
+}
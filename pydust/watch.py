@@ -0,0 +1,236 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from pydust import buildzig, config
+from pydust.protocol import TestProtocol
+
+
+class CompilerServer:
+    """A long-lived Zig compiler for a single extension module.
+
+    The compiler keeps its analysis in memory between updates, so an incremental rebuild avoids re-analysing
+    Pydust's comptime machinery from scratch as a cold `zig build` would.
+    """
+
+    def __init__(self, ext_module: config.ExtModule, argv: list[str]):
+        self.ext_module = ext_module
+        self.argv = argv
+        self._proc = subprocess.Popen(argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        # Zig first sends us its version.
+        h = TestProtocol.Header.unpack(self._proc.stdout)
+        assert h.tag == TestProtocol.ResponseTag.zig_version.value
+        self.zig_version = self._proc.stdout.read(h.bytes_len).decode("utf-8")
+
+    def update(self) -> tuple[Path, bool] | None:
+        """Recompile the module, returning the emitted binary and whether it was a cache hit, or None on errors."""
+        self._proc.stdin.write(TestProtocol.Header(tag=TestProtocol.RequestTag.update.value).pack())
+        self._proc.stdin.flush()
+
+        while True:
+            h = TestProtocol.Header.unpack(self._proc.stdout)
+            body = self._proc.stdout.read(h.bytes_len)
+            if h.tag == TestProtocol.ResponseTag.error_bundle.value:
+                return None
+            if h.tag == TestProtocol.ResponseTag.emit_bin_path.value:
+                # The body is a flags byte, whose lowest bit marks a cache hit, followed by the path.
+                return Path(body[1:].decode("utf-8")), bool(body[0] & 0x01)
+
+    def install(self, emitted: Path):
+        """Atomically replace the installed module, so a concurrently importing process never sees a partial file."""
+        dest = self.ext_module.install_path
+        tmp = dest.with_name(dest.name + ".tmp")
+        shutil.copyfile(emitted, tmp)
+        os.replace(tmp, dest)
+
+    def close(self):
+        try:
+            self._proc.stdin.write(TestProtocol.Header(tag=TestProtocol.RequestTag.exit.value).pack())
+            self._proc.stdin.close()
+            self._proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+        self._proc.stdout.close()
+
+
+# The directory holding the pyconf module generated for each watched extension module.
+WATCH_DIR = Path("zig-cache") / "pydust-watch"
+
+
+def start_servers(conf: config.ToolPydust, optimize: str) -> list[CompilerServer]:
+    """Run a full build, then start a compiler server for each extension module."""
+    proc = buildzig.zig_build(
+        ["install", f"-Doptimize={optimize}", f"-Dpython-exe={sys.executable}", "-Dcpu-variants=false"],
+        conf=conf,
+        check=False,
+    )
+    if proc.returncode != 0:
+        return []
+
+    servers = []
+    for ext_module in conf.ext_modules:
+        if ext_module.bundle:
+            print(f"{ext_module.name} is bundled into {ext_module.bundle}, it will not be watched", file=sys.stderr)
+            continue
+        servers.append(CompilerServer(ext_module, compiler_command(conf, ext_module, optimize)))
+    return servers
+
+
+def compiler_command(conf: config.ToolPydust, ext_module: config.ExtModule, optimize: str) -> list[str]:
+    """The zig build-lib command of an extension module, building the same library as pydust.build.zig.
+
+    Only the module itself is rebuilt on changes, so it is built for the native CPU without dispatching to CPU variants.
+    """
+    pyconf = WATCH_DIR / ext_module.libname / "pyconf.zig"
+    pyconf.parent.mkdir(parents=True, exist_ok=True)
+    buildzig.write_if_changed(pyconf, pyconf_source(ext_module))
+
+    python = buildzig.python_config()
+    zig_exe = [os.path.expanduser(conf.zig_exe)] if conf.zig_exe else [sys.executable, "-m", "ziglang"]
+    return [
+        *zig_exe,
+        "build-lib",
+        "-dynamic",
+        "-O",
+        ext_module.optimize or optimize,
+        "--name",
+        ext_module.libname,
+        "-lc",
+        "-fallow-shlib-undefined",
+        "-I",
+        python["include_dir"],
+        "--mod",
+        f"pyconf::{pyconf.resolve()}",
+        "--mod",
+        f"pydust:pyconf:{python['pydust_source_file']}",
+        "--deps",
+        "pydust",
+        str(ext_module.root),
+        "--cache-dir",
+        "zig-cache",
+        "--listen=-",
+    ]
+
+
+def pyconf_source(ext_module: config.ExtModule) -> str:
+    """The build options of the module, as added to its pyconf module by pydust.build.zig."""
+    options = {
+        "module_name": ("[:0]const u8", json.dumps(ext_module.name)),
+        "limited_api": ("bool", _zig_bool(ext_module.limited_api)),
+        "stats": ("bool", _zig_bool(ext_module.stats)),
+        "probes": ("bool", _zig_bool(ext_module.probes)),
+        "track_allocations": ("bool", _zig_bool(ext_module.track_allocations)),
+        "track_allocation_sites": ("bool", _zig_bool(ext_module.track_allocation_sites)),
+        "stubs": ("bool", "false"),
+        "cpu_variants": ("[]const []const u8", "&.{}"),
+        "runtime_safety_enabled": (
+            "[]const []const u8",
+            buildzig.zig_strings(k for k, v in ext_module.runtime_safety.items() if v),
+        ),
+        "runtime_safety_disabled": (
+            "[]const []const u8",
+            buildzig.zig_strings(k for k, v in ext_module.runtime_safety.items() if not v),
+        ),
+        "hexversion": ("[]const u8", json.dumps(buildzig.PYVER_HEX)),
+        "bundled": ("bool", "false"),
+    }
+    return "".join(f"pub const {name}: {type_} = {value};\n" for name, (type_, value) in options.items())
+
+
+def _zig_bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def source_roots(conf: config.ToolPydust) -> list[Path]:
+    """The directories of the extension module roots, beneath which their Zig sources are watched."""
+    dirs = {ext_module.root.parent.resolve() for ext_module in conf.ext_modules}
+    # Directories nested within another watched directory are already walked.
+    return sorted(d for d in dirs if not any(parent in dirs for parent in d.parents))
+
+
+def snapshot(roots: list[Path]) -> dict[Path, int]:
+    """The modification times of the Zig sources beneath the roots and the Pydust configuration."""
+    paths = [*(p for root in roots for p in buildzig.zig_sources(root)), Path("pyproject.toml").resolve()]
+    return {p: p.stat().st_mtime_ns for p in paths if p.exists()}
+
+
+def watch(optimize: str = "Debug", pytest_args: list[str] | None = None, interval: float = 0.2):
+    """Rebuild the extension modules whenever their sources change, optionally re-running pytest afterwards."""
+    conf = config.load()
+    if conf.self_managed:
+        raise ValueError("pydust watch does not support self-managed builds")
+
+    servers = start_servers(conf, optimize)
+    roots = source_roots(conf)
+    mtimes = snapshot(roots)
+    print(f"Watching {len(servers)} extension module(s) for changes...")
+
+    try:
+        while True:
+            time.sleep(interval)
+            current = snapshot(roots)
+            if current == mtimes:
+                continue
+            changed = {p for p in current.keys() | mtimes.keys() if current.get(p) != mtimes.get(p)}
+            mtimes = current
+
+            if Path("pyproject.toml").resolve() in changed:
+                # The set of modules or their options may have changed, so we start over with a full build.
+                config.load.cache_clear()
+                conf = config.load()
+                for server in servers:
+                    server.close()
+                servers = start_servers(conf, optimize)
+                roots = source_roots(conf)
+                mtimes = snapshot(roots)
+                continue
+
+            start = time.perf_counter()
+            rebuilt = []
+            for server in servers:
+                result = server.update()
+                if result is None:
+                    # The compiler server reports errors as a binary error bundle. Rather than rendering it
+                    # ourselves, we let a regular build print the errors.
+                    print(f"Failed to compile {server.ext_module.name}", file=sys.stderr)
+                    buildzig.zig_build(
+                        ["install", f"-Doptimize={optimize}", f"-Dpython-exe={sys.executable}", "-Dcpu-variants=false"],
+                        conf=conf,
+                        check=False,
+                    )
+                    break
+                emitted, cache_hit = result
+                if not cache_hit:
+                    server.install(emitted)
+                    rebuilt.append(server.ext_module.name)
+            else:
+                elapsed = time.perf_counter() - start
+                print(f"Rebuilt {', '.join(rebuilt) or 'nothing'} in {elapsed:.2f}s")
+                if rebuilt and pytest_args is not None:
+                    # The modules are already rebuilt, so the pytest plugin must not run a cold build of its own.
+                    env = {**os.environ, buildzig.SKIP_BUILD_ENV: "1"}
+                    subprocess.run([sys.executable, "-m", "pytest", *pytest_args], env=env)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.close()
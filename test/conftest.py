@@ -14,13 +14,7 @@ limitations under the License.
 
 import pytest
 
-from pydust import buildzig
-
-
-def pytest_collection(session):
-    """We use the same pydust build system for our example modules, but we trigger it from a pytest hook."""
-    # We can't use a temp-file since zig build's caching depends on the file path.
-    buildzig.zig_build(["install"])
+pytest_plugins = ["pytester"]
 
 
 def pytest_collection_modifyitems(session, config, items):
@@ -0,0 +1,94 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import math
+from pathlib import Path
+
+import pytest
+
+from pydust import bench, buildzig
+
+
+def test_bench_run():
+    result = bench.run("noop", lambda loops: loops * 100, repeat=5, min_time=1e-6)
+    assert result.loops == 16
+    assert result.samples == [100.0] * 5
+
+
+def test_bench_compare(tmp_path):
+    baseline = [bench.Result("a", 1, [100.0, 101.0, 99.0, 100.5, 99.5]), bench.Result("b", 1, [50.0, 51.0, 49.0])]
+    bench.save(baseline, tmp_path / "baseline.json")
+    loaded = bench.load(tmp_path / "baseline.json")
+
+    results = [bench.Result("a", 1, [120.0, 121.0, 119.0, 120.5, 119.5]), bench.Result("b", 1, [50.5, 50.0, 49.5])]
+    comparisons = {c.name: c for c in bench.compare(loaded, results)}
+    assert comparisons["a"].regressed
+    assert comparisons["a"].change == pytest.approx(0.2)
+    assert not comparisons["b"].regressed
+
+
+def test_bench_welch_pvalue():
+    # Matches scipy.stats.ttest_ind(a, b, equal_var=False)
+    assert bench.welch_pvalue([1.0, 2.0, 3.0, 4.0], [2.0, 3.0, 4.0, 5.0, 6.0]) == pytest.approx(0.1613, abs=1e-4)
+
+
+def test_bench_short_samples():
+    with pytest.raises(ValueError):
+        bench.run("noop", lambda loops: loops * 100, repeat=1, min_time=1e-6)
+
+    # Baselines recorded with a single repetition compare without a p-value, and are never counted as regressions.
+    comparisons = bench.compare({"a": bench.Result("a", 1, [100.0])}, [bench.Result("a", 1, [120.0, 121.0])])
+    assert math.isnan(comparisons[0].pvalue)
+    assert not comparisons[0].regressed
+
+
+def test_bench_discover():
+    benchmarks = bench.discover([Path(__file__).parent.parent / "bench"], pattern="*::bench_positional")
+    assert list(benchmarks) == ["bench_trampolines::bench_positional"]
+
+
+def test_bench_allocations(tmp_path):
+    results = [bench.Result("zig", 8, [10.0, 11.0], allocations=1.0, allocated_bytes=8000.0), bench.Result("py", 1)]
+    bench.save(results, tmp_path / "baseline.json")
+    loaded = bench.load(tmp_path / "baseline.json")
+    assert loaded["zig"] == results[0]
+    assert loaded["py"].allocations is None
+
+
+def test_plugin_bench_results(pytester, monkeypatch):
+    # The results of py.bench are parsed from the stderr of a Zig test, so we feed them through a Python test instead.
+    monkeypatch.setenv(buildzig.SKIP_BUILD_ENV, "1")
+    pytester.makefile(".toml", pyproject="[build-system]\nrequires = []\n\n[tool.pydust]\nzig_tests = false\n")
+    pytester.makepyfile(
+        test_fake_bench="""
+        import json
+
+        from pydust import pytest_plugin
+
+        def test_sum(request):
+            result = json.dumps({"loops": 10, "samples": [120.0, 121.0, 119.0, 120.5, 119.5]})
+            stderr = pytest_plugin.BENCH_RESULT_PREFIX + result + "\\nother output\\n"
+            assert pytest_plugin.ZigItem._collect_bench_results(request.node, stderr) == "other output\\n"
+        """
+    )
+
+    saved = pytester.path / "saved.json"
+    pytester.runpytest_subprocess("--zig-bench-save", str(saved)).assert_outcomes(passed=1)
+    assert bench.load(saved)["test_fake_bench.py::test_sum"].samples == [120.0, 121.0, 119.0, 120.5, 119.5]
+
+    baseline = pytester.path / "baseline.json"
+    bench.save([bench.Result("test_fake_bench.py::test_sum", 10, [100.0, 101.0, 99.0, 100.5, 99.5])], baseline)
+    result = pytester.runpytest_subprocess("--zig-bench-compare", str(baseline))
+    assert result.ret == pytest.ExitCode.TESTS_FAILED
+    result.stdout.fnmatch_lines(["*1 benchmark(s) regressed by more than 5%"])
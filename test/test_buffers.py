@@ -12,6 +12,12 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import array
+import io
+import os
+
+import pytest
+
 from example import buffers
 
 
@@ -32,3 +38,126 @@ def test_sum():
 
 
 # --8<-- [end:sum]
+
+
+# --8<-- [start:arrow]
+def test_arrow_round_trip():
+    column = buffers.Int64Column(10)
+    # Values 2, 5 and 8 are null.
+    assert buffers.arrow_sum(column) == 45 - 2 - 5 - 8
+
+
+# --8<-- [end:arrow]
+
+
+def test_arrow_requested_schema():
+    column = buffers.Int64Column(3)
+    assert len(column.__arrow_c_array__()) == 2
+    assert len(column.__arrow_c_array__(None)) == 2
+    assert len(column.__arrow_c_array__(requested_schema=None)) == 2
+
+
+def test_arrow_pyarrow():
+    pa = pytest.importorskip("pyarrow")
+
+    column = buffers.Int64Column(4)
+    array = pa.array(column)
+    assert array.to_pylist() == [0, 1, None, 3]
+    del column
+    assert array.to_pylist() == [0, 1, None, 3]
+
+    assert buffers.arrow_sum(pa.array([1, None, 3], type=pa.int64())) == 4
+    with pytest.raises(TypeError):
+        buffers.arrow_sum(pa.array([1.0], type=pa.float64()))
+
+
+# --8<-- [start:mapped]
+def test_mapped_buffer(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(array.array("q", range(10)).tobytes())
+
+    buf = buffers.MappedBuffer(path, format="l")
+    buf.madvise("sequential")
+    assert len(buf) == 10
+    assert buffers.mapped_sum(buf) == 45
+
+    view = memoryview(buf)
+    assert view[3] == 3
+    with pytest.raises(BufferError):
+        buf.close()
+
+    view.release()
+    buf.close()
+    with pytest.raises(ValueError):
+        memoryview(buf)
+
+
+# --8<-- [end:mapped]
+
+
+def test_mapped_buffer_writable(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"hello")
+
+    with open(path, "r+b") as f:
+        buf = buffers.MappedBuffer(f.fileno(), writable=True)
+        with memoryview(buf) as view:
+            view[0] = ord("j")
+        buf.close()
+    assert path.read_bytes() == b"jello"
+
+    readonly = buffers.MappedBuffer(str(path))
+    with pytest.raises(TypeError):
+        memoryview(readonly)[0] = 0
+    with pytest.raises(ValueError):
+        readonly.madvise("sometimes")
+
+
+# --8<-- [start:io]
+def test_file_io(tmp_path):
+    assert buffers.count_lines(io.BytesIO(b"a\nb\nc\n")) == 3
+
+    out = io.BytesIO()
+    buffers.write_squares(out, 4)
+    assert out.getvalue() == b"0\n1\n4\n9\n"
+
+    path = tmp_path / "squares.txt"
+    with open(path, "wb") as f:
+        buffers.write_squares(f, 100_000)
+    with open(path, "rb") as f:
+        assert buffers.count_lines(f) == 100_000
+
+
+# --8<-- [end:io]
+
+
+def test_file_io_direct(tmp_path):
+    path = tmp_path / "lines.txt"
+    path.write_bytes(b"first\nsecond line\nthird\n")
+    with open(path, "rb") as f:
+        # The Python file object buffers ahead of the descriptor.
+        assert f.read(1) == b"f"
+        assert buffers.read_line_direct(f) == b"irst"
+        assert f.readline() == b"second line\n"
+        assert f.read() == b"third\n"
+
+    # Pipes cannot seek, so the bytes buffered by Python are read with readinto instead.
+    r, w = os.pipe()
+    os.write(w, b"first\nsecond\n")
+    os.close(w)
+    with open(r, "rb") as f:
+        assert f.read(1) == b"f"
+        assert buffers.read_line_direct(f) == b"irst"
+
+
+def test_file_io_errors():
+    with pytest.raises(AttributeError):
+        buffers.count_lines(object())
+    with pytest.raises(AttributeError):
+        buffers.count_lines(io.StringIO("text"))
+
+    # The bytes still buffered when the flush fails are discarded, rather than aborting the process.
+    closed = io.BytesIO()
+    closed.close()
+    with pytest.raises(ValueError):
+        buffers.write_squares(closed, 4)
@@ -0,0 +1,25 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+from example import bundle, bundled_math, bundled_text
+
+
+def test_bundled_modules():
+    assert bundled_math.add(1, 2) == 3
+    assert bundled_text.greet("Nick") == "Hello, Nick!"
+
+
+def test_bundled_modules_share_library():
+    assert bundled_math.__file__ == bundled_text.__file__ == bundle.__file__
+    assert bundle.__file__.endswith("bundle.abi3.so")
@@ -12,7 +12,9 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import pickle
 import sys
+import weakref
 
 import pytest
 
@@ -45,6 +47,15 @@ def test_subclasses():
 # --8<-- [end:subclass]
 
 
+def test_set_pop_class():
+    d = classes.Dog("labrador")
+    dogs = {d}
+    refcount = sys.getrefcount(d)
+    assert classes.pop_dog(dogs) is d
+    assert not dogs
+    assert sys.getrefcount(d) == refcount - 1
+
+
 # --8<-- [start:staticmethods]
 def test_static_methods():
     assert classes.Math.add(10, 30) == 40
@@ -83,6 +94,151 @@ def test_attributes():
 # --8<-- [end:attributes]
 
 
+# --8<-- [start:weakref]
+def test_weakref():
+    obj = classes.WeakRefable()
+    ref = weakref.ref(obj)
+    assert ref() is obj
+
+    cache = weakref.WeakValueDictionary()
+    cache["key"] = obj
+    del obj
+    assert ref() is None
+    assert "key" not in cache
+
+
+# --8<-- [end:weakref]
+
+
+def test_weakref_subclass():
+    # Only the subclass reserves a weak reference slot, so inherited methods must still find the base state.
+    obj = classes.WeakRefableDog()
+    ref = weakref.ref(obj)
+    assert obj.species() == "dog"
+    assert ref().species() == "dog"
+    del obj
+    assert ref() is None
+
+
+def test_no_weakref():
+    with pytest.raises(TypeError):
+        weakref.ref(classes.Counter())
+
+
+# --8<-- [start:pickle]
+def test_pickle_out_of_band():
+    h = classes.Histogram(4)
+    for b in [1, 1, 3]:
+        h.add(b)
+
+    buffers = []
+    data = pickle.dumps(h, protocol=5, buffer_callback=buffers.append)
+    assert len(buffers) == 1
+
+    restored = pickle.loads(data, buffers=buffers)
+    assert [restored.count(b) for b in range(4)] == [0, 2, 0, 1]
+    assert restored.size() == 3
+
+
+# --8<-- [end:pickle]
+
+
+@pytest.mark.parametrize("protocol", range(pickle.HIGHEST_PROTOCOL + 1))
+def test_pickle(protocol):
+    h = classes.Histogram(2)
+    h.add(0)
+
+    restored = pickle.loads(pickle.dumps(h, protocol=protocol))
+    assert restored.count(0) == 1
+    assert restored.size() == 1
+
+    # The restored histogram owns a copy of the counts.
+    restored.add(0)
+    assert h.count(0) == 1
+
+
+def test_setstate_initialized():
+    # Restoring the state of an initialized object replaces the slices it owns.
+    h = classes.Histogram(2)
+    other = classes.Histogram(3)
+    other.add(2)
+    h.__setstate__(other.__reduce_ex__(2)[2])
+    assert [h.count(b) for b in range(3)] == [0, 0, 1]
+    assert h.size() == 1
+
+
+def test_setstate_exported():
+    # The slices of the histogram cannot be replaced while an out-of-band buffer still views them.
+    h = classes.Histogram(2)
+    state = h.__reduce_ex__(5)[2]
+    with pytest.raises(BufferError):
+        h.__setstate__(state)
+
+    del state
+    h.__setstate__(classes.Histogram(3).__reduce_ex__(2)[2])
+    assert h.count(2) == 0
+
+
+def test_setstate_failure():
+    # A state that fails to unpickle part way leaves the object unchanged.
+    h = classes.Histogram(2)
+    h.add(1)
+    with pytest.raises(TypeError):
+        h.__setstate__((5, "not a buffer"))
+    assert h.size() == 1
+    assert h.count(1) == 1
+
+
+def test_setstate_objects():
+    old, new = object(), object()
+    tagged = classes.Tagged(old)
+    refs = sys.getrefcount(old)
+    tagged.__setstate__(classes.Tagged(new).__reduce_ex__(2)[2])
+    assert tagged.tag() is new
+    # The replaced object is released.
+    assert sys.getrefcount(old) == refs - 1
+
+
+def test_not_picklable():
+    with pytest.raises(TypeError):
+        pickle.dumps(classes.Counter())
+
+
+# --8<-- [start:vec]
+def test_vec():
+    points = classes.Points()
+    for i in range(3):
+        points.append(classes.Point(float(i), 0.0))
+    assert len(points) == 3
+
+    # Indexing materializes a copy of the element.
+    assert points[2].norm() == 2.0
+    points[1] = classes.Point(3.0, 4.0)
+    assert points[1].norm() == 5.0
+
+    classes.translate(points, 1.0, 1.0)
+    with points.column("x") as xs:
+        assert xs.tolist() == [1.0, 4.0, 3.0]
+
+        # The vector cannot be resized while a column is exported.
+        with pytest.raises(BufferError):
+            points.append(classes.Point(0.0, 0.0))
+
+    points.clear()
+    assert len(points) == 0
+
+
+# --8<-- [end:vec]
+def test_vec_errors():
+    points = classes.Points()
+    with pytest.raises(IndexError):
+        points[0]
+    with pytest.raises(AttributeError):
+        points.column("z")
+    with pytest.raises(TypeError):
+        points.append(classes.Counter())
+
+
 def test_hash():
     h = classes.Hash(42)
     assert hash(h) == -7849439630130923510
@@ -0,0 +1,50 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from pydust import config
+
+
+def tool_pydust(*ext_modules: dict) -> config.ToolPydust:
+    return config.ToolPydust.model_validate({"ext_module": list(ext_modules)})
+
+
+def test_bundle():
+    conf = tool_pydust(
+        {"name": "example.a", "root": "example/a.zig", "bundle": "example.bundle"},
+        {"name": "example.b", "root": "example/b.zig", "bundle": "example.bundle"},
+        {"name": "example.c", "root": "example/c.zig"},
+    )
+    assert [m.name for m in conf.bundles["example.bundle"]] == ["example.a", "example.b"]
+    assert conf.ext_modules[0].library_paths[0] == conf.ext_modules[1].library_paths[0]
+
+
+@pytest.mark.parametrize(
+    "option,value",
+    [("stats", True), ("optimize", "ReleaseFast"), ("cpu_variants", ["x86_64_v2"])],
+)
+def test_bundle_options_must_agree(option, value):
+    with pytest.raises(ValidationError, match=f"Modules of bundle example.bundle must share the {option} option"):
+        tool_pydust(
+            {"name": "example.a", "root": "example/a.zig", "bundle": "example.bundle"},
+            {"name": "example.b", "root": "example/b.zig", "bundle": "example.bundle", option: value},
+        )
+
+
+@pytest.mark.parametrize("names", [("example.a", "other.a"), ("example.a", "example.bundle")])
+def test_bundle_names_must_be_distinct(names):
+    with pytest.raises(ValidationError, match="Modules of bundle example.bundle must have distinct names"):
+        tool_pydust(*({"name": name, "root": "example/a.zig", "bundle": "example.bundle"} for name in names))
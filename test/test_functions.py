@@ -12,6 +12,7 @@ See the License for the specific language governing permissions and
 limitations under the License.
 """
 
+import array
 import inspect
 
 import pytest
@@ -67,3 +68,49 @@ def test_variadic():
             inspect.Parameter("kwargs", kind=inspect._ParameterKind.VAR_KEYWORD),
         ]
     )
+
+
+def test_vectorize():
+    assert functions.hypot(3.0, 4.0) == 5.0
+
+    xs = array.array("d", [3.0, 5.0, 8.0])
+    result = functions.hypot_batch(xs, [4.0, 12.0, 15.0])
+    assert result.format == "d"
+    assert result.tolist() == [5.0, 13.0, 17.0]
+
+    # Scalars are broadcast
+    assert functions.hypot_batch(xs, 0.0).tolist() == [3.0, 5.0, 8.0]
+
+    out = array.array("d", [0.0] * 3)
+    assert functions.hypot_batch(xs, 4.0, out=out) is out
+    assert out[0] == 5.0
+
+    with pytest.raises(ValueError, match="has length 2, expected 3"):
+        functions.hypot_batch(xs, [1.0, 2.0])
+    with pytest.raises(TypeError, match="buffer format 'q', expected 'd'"):
+        functions.hypot_batch(array.array("q", [1, 2, 3]), 1.0)
+
+
+# --8<-- [start:memoize]
+def test_memoize():
+    functions.collatz_cache_clear()
+    assert functions.collatz(27) == 111
+    assert functions.collatz(27) == 111
+    assert functions.collatz(1) == 0
+    assert functions.collatz_cache_info() == {"hits": 1, "misses": 2, "maxsize": 2, "currsize": 2}
+
+    # The capacity is bounded, so the least recently referenced entry is evicted.
+    assert functions.collatz(6) == 8
+    assert functions.collatz_cache_info()["currsize"] == 2
+
+    functions.collatz_cache_clear()
+    assert functions.collatz_cache_info() == {"hits": 0, "misses": 0, "maxsize": 2, "currsize": 0}
+
+
+# --8<-- [end:memoize]
+
+
+def test_apply():
+    assert functions.apply(lambda x: x + 1, 41) == 42
+    with pytest.raises(ZeroDivisionError):
+        functions.apply(lambda x: 1 // x, 0)
@@ -0,0 +1,47 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import platform
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from example import kernels
+
+
+@pytest.mark.skipif(platform.machine().lower() not in ("x86_64", "amd64"), reason="CPU variants are x86-64 only")
+def test_cpu_variants():
+    assert Path(kernels.__file__).with_name("kernels.x86_64_v2.abi3.so").exists()
+    assert kernels.sum_squares([1.0, 2.0, 3.0]) == 14.0
+
+
+def test_runtime_safety_disabled():
+    assert kernels.Unchecked.add(1, 2) == 3
+    # Overflow is undefined without safety checks, but must not abort the process.
+    assert 0 <= kernels.Unchecked.add(200, 100) < 256
+
+
+def test_runtime_safety_enabled():
+    assert kernels.Checked.add(1, 2) == 3
+    # Overflow panics with safety checks, aborting the process, so we run it in a subprocess.
+    proc = subprocess.run(
+        [sys.executable, "-c", "from example import kernels; kernels.Checked.add(200, 100)"],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    assert proc.returncode != 0
+    assert "integer overflow" in proc.stderr
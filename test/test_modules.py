@@ -37,3 +37,15 @@ def test_modules_mutable_state():
 
 def test_submodules():
     assert submod.world() == "Hello, World!"
+
+
+def test_lazy_submodule():
+    lazy = modules.lazy
+    assert "Point" not in vars(lazy)
+    assert "Point" in dir(lazy)
+
+    assert lazy.Point(21).double() == 42
+    assert "Point" in vars(lazy)
+
+    assert lazy.inner.answer() == 42
+    assert "inner" in vars(lazy)
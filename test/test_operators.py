@@ -176,3 +176,43 @@ def test_justLessThan():
     assert not (cmp1 >= cmp2)
     assert not (cmp1 == cmp2)
     assert cmp1 != cmp2
+
+
+# --8<-- [start:test_sequence]
+def test_sequence():
+    seq = operators.Sequence()
+    seq[1] = 5
+
+    assert len(seq) == 4
+    assert seq[1] == 5
+    assert seq[-3] == 5
+    assert 5 in seq
+    assert 7 not in seq
+    # Values that cannot be converted to the Zig value type are not contained.
+    assert "5" not in seq
+    assert 2**64 not in seq
+    assert list(seq) == [0, 5, 0, 0]
+
+    with pytest.raises(IndexError):
+        seq[4]
+    with pytest.raises(IndexError):
+        seq[-5]
+    with pytest.raises(TypeError):
+        del seq[0]
+
+
+# --8<-- [end:test_sequence]
+
+
+def test_mapping():
+    mapping = operators.Mapping()
+    mapping["a"] = 1
+
+    assert mapping["a"] == 1
+    assert "a" in mapping
+    assert "b" not in mapping
+
+    del mapping["a"]
+    assert "a" not in mapping
+    with pytest.raises(KeyError):
+        mapping["a"]
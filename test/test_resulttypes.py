@@ -86,3 +86,9 @@ def test_zigstruct():
     result = result_types.zigstruct()
     assert result == {"foo": 1234, "bar": True}
     assert sys.getrefcount(result) == 2
+
+
+def test_zigset():
+    result = result_types.zigset()
+    assert result == {1, 2, 3}
+    assert sys.getrefcount(result) == 2
@@ -0,0 +1,113 @@
+"""
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+        http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+"""
+
+import ctypes
+import tracemalloc
+
+import pytest
+
+from example import stats
+
+
+# --8<-- [start:ex]
+def test_stats():
+    for i in range(10):
+        assert stats.add(i, 1) == i + 1
+    with pytest.raises(ValueError):
+        stats.fail()
+
+    add = stats.__pydust_stats__()["example.stats.add"]
+    assert add["calls"] >= 10
+    assert add["errors"] == 0
+    assert add["total_ns"] >= add["body_ns"]
+    assert sum(add["histogram"]) == add["calls"]
+
+    fail = stats.__pydust_stats__()["example.stats.fail"]
+    assert fail["errors"] == fail["calls"] >= 1
+
+
+# --8<-- [end:ex]
+
+
+def test_stats_failed_conversion():
+    stats.add(1, 1)
+    before = stats.__pydust_stats__()["example.stats.add"]
+    with pytest.raises(TypeError):
+        stats.add("one", 1)
+
+    # Calls failing to convert their arguments never reach the body.
+    after = stats.__pydust_stats__()["example.stats.add"]
+    assert after["errors"] == before["errors"] + 1
+    assert after["body_ns"] == before["body_ns"]
+    assert after["convert_ns"] >= before["convert_ns"]
+
+
+def test_stats_slots():
+    counter = stats.Counter()
+    counter.increment()
+    assert len(counter) == 1
+
+    result = stats.__pydust_stats__()
+    assert result["example.stats.Counter.__init__"]["calls"] >= 1
+    assert result["example.stats.Counter.increment"]["calls"] >= 1
+    assert result["example.stats.Counter.__len__"]["calls"] >= 1
+    assert len(result["example.stats.Counter.__len__"]["histogram"]) == 32
+
+
+def test_stats_nested_classes():
+    before = stats.__pydust_stats__()
+    stats.Left.Inner.ping()
+    stats.Left.Inner.ping()
+    stats.Right.Inner.ping()
+
+    after = stats.__pydust_stats__()
+    for name, calls in [("example.stats.Left.Inner.ping", 2), ("example.stats.Right.Inner.ping", 1)]:
+        assert after[name]["calls"] == before.get(name, {"calls": 0})["calls"] + calls
+
+
+def test_symbols():
+    # Trampolines are exported under their qualified Python names, for profilers such as perf.
+    lib = ctypes.CDLL(stats.__file__)
+    assert lib["example.stats.add"]
+    assert lib["example.stats.Counter.__len__"]
+
+
+# --8<-- [start:allocations]
+def test_allocations():
+    before = stats.__pydust_allocations__()
+    stats.reserve(1 << 20)
+    during = stats.__pydust_allocations__()
+    assert during["live_bytes"] >= before["live_bytes"] + (1 << 20)
+    assert during["peak_bytes"] >= during["live_bytes"]
+    assert any(site["live_bytes"] >= 1 << 20 for site in during["sites"].values())
+
+    stats.release()
+    after = stats.__pydust_allocations__()
+    assert after["live_bytes"] == before["live_bytes"]
+    assert after["frees"] > before["frees"]
+
+
+# --8<-- [end:allocations]
+
+
+def test_allocations_tracemalloc():
+    domain = stats.__pydust_allocations__()["tracemalloc_domain"]
+    tracemalloc.start()
+    try:
+        stats.reserve(4096)
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.DomainFilter(True, domain)])
+        assert sum(stat.size for stat in snapshot.statistics("filename")) >= 4096
+    finally:
+        stats.release()
+        tracemalloc.stop()